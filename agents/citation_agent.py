@@ -1,19 +1,18 @@
-from typing import List, Dict, Any
-from langchain_openai import ChatOpenAI
+import re
+from typing import List, Dict, Any, Tuple
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.tools import tool
 from config import Config
+from utils.llm_cache import invoke_llm
+from utils.llm_clients import get_chat_model
 from tools.citation_tools import add_citations_to_report, extract_key_facts, format_company_info
+from tools.source_index import SourceIndex
 
 class CitationAgent:
     """Agente especializado em adicionar citações aos relatórios"""
     
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model=Config.MODEL_NAME,
-            temperature=0.1,  # Temperatura baixa para precisão
-            api_key=Config.OPENAI_API_KEY
-        )
+        self.llm = get_chat_model(temperature=0.1)  # Temperatura baixa para precisão
     
     def process_research_report(self, report: str, sources: List[Dict]) -> str:
         """Processa relatório de pesquisa adicionando citações apropriadas"""
@@ -75,7 +74,7 @@ class CitationAgent:
                 HumanMessage(content=f"Texto para análise:\n\n{text}")
             ]
             
-            response = self.llm.invoke(messages)
+            response = invoke_llm(self.llm, messages, call_site="citation_agent.identify_citation_locations")
             
             import json
             try:
@@ -122,73 +121,72 @@ class CitationAgent:
         
         source_mappings = {}
         
+        # Indexa o corpus uma única vez antes de casar as declarações
+        source_index = SourceIndex(sources)
+        
         for location in citation_locations:
             statement = location["text"]
-            best_source_idx = self._find_best_source_for_statement(statement, sources)
+            best_source_idx = self._find_best_source_for_statement(statement, source_index)
             
             if best_source_idx is not None:
                 source_mappings[statement] = best_source_idx + 1  # Citations são 1-indexed
         
         return source_mappings
     
-    def _find_best_source_for_statement(self, statement: str, sources: List[Dict]) -> int:
+    def _find_best_source_for_statement(self, statement: str, source_index: SourceIndex) -> int:
         """Encontra a melhor fonte para uma declaração específica"""
         
-        best_score = 0
-        best_idx = None
-        
-        statement_words = set(statement.lower().split())
-        
-        for i, source in enumerate(sources):
-            score = self._calculate_source_relevance(statement_words, source)
-            
-            if score > best_score:
-                best_score = score
-                best_idx = i
-        
-        # Só retorna se a relevância for significativa
-        return best_idx if best_score > 0.3 else None
+        # Só retorna se a relevância (sobreposição + bônus de qualidade) for significativa
+        return source_index.best_match(statement, min_score=0.3, quality_weight=0.2)
     
-    def _calculate_source_relevance(self, statement_words: set, source: Dict) -> float:
-        """Calcula relevância entre declaração e fonte"""
-        
-        source_content = source.get("content", "").lower()
-        source_title = source.get("title", "").lower()
-        
-        source_words = set((source_content + " " + source_title).split())
-        
-        # Conta palavras em comum
-        common_words = statement_words.intersection(source_words)
-        
-        if not statement_words:
-            return 0.0
+    def _add_inline_citations(self, text: str, source_mappings: Dict[str, int]) -> str:
+        """Adiciona citações inline ao texto"""
         
-        # Score baseado em sobreposição de palavras
-        overlap_score = len(common_words) / len(statement_words)
+        # Localiza todas as declarações primeiro e monta o texto uma única vez
+        parts = []
+        last_end = 0
         
-        # Bonus por qualidade da fonte
-        quality_bonus = source.get("relevance_score", source.get("score", 0.5)) * 0.2
+        for start, end, citation_num in self._locate_statements(text, source_mappings):
+            # Adiciona citação no final da declaração
+            parts.append(text[last_end:end])
+            parts.append(f" [{citation_num}]")
+            last_end = end
         
-        return min(overlap_score + quality_bonus, 1.0)
+        parts.append(text[last_end:])
+        return "".join(parts)
     
-    def _add_inline_citations(self, text: str, source_mappings: Dict[str, int]) -> str:
-        """Adiciona citações inline ao texto"""
+    def _locate_statements(self, text: str, source_mappings: Dict[str, int]) -> List[Tuple[int, int, int]]:
+        """Encontra a primeira ocorrência livre de cada declaração em uma varredura do texto"""
         
-        cited_text = text
+        statements = [statement for statement in source_mappings if statement]
+        if not statements:
+            return []
         
-        # Ordena por tamanho decrescente para evitar conflitos de substituição
-        sorted_statements = sorted(source_mappings.keys(), key=len, reverse=True)
+        # Alternativas mais longas primeiro: na mesma posição, a declaração mais longa vence
+        statements.sort(key=lambda statement: (-len(statement), statement))
+        pattern = re.compile("|".join(re.escape(statement) for statement in statements))
         
-        for statement in sorted_statements:
-            citation_num = source_mappings[statement]
+        spans = []
+        cited = set()
+        position = 0
+        
+        while len(cited) < len(statements):
+            match = pattern.search(text, position)
+            if match is None:
+                break
             
-            # Adiciona citação no final da declaração
-            citation_marker = f" [{citation_num}]"
+            statement = match.group()
+            if statement in cited:
+                # Ocorrência repetida: não cita de novo, mas permite declarações sobrepostas
+                position = match.start() + 1
+                continue
             
-            # Substitui apenas a primeira ocorrência
-            cited_text = cited_text.replace(statement, statement + citation_marker, 1)
+            # Cita apenas a primeira ocorrência; trechos já citados não são reutilizados
+            cited.add(statement)
+            spans.append((match.start(), match.end(), source_mappings[statement]))
+            position = match.end()
         
-        return cited_text
+        return spans
     
     def _generate_bibliography(self, sources: List[Dict]) -> str:
         """Gera bibliografia formatada"""
@@ -1,20 +1,20 @@
-from typing import List, Dict, Any
-from langchain_openai import ChatOpenAI
+from typing import List, Dict, Any, Iterator
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.tools import tool
 from config import Config
+from utils.llm_cache import invoke_llm, stream_llm
+from utils.llm_clients import get_chat_model
+from utils.context_packer import context_packer, compact_json_text, groups_from_results
+from utils.token_counter import count_tokens
 from tools.web_search import search_web, search_companies
+from tools.source_index import SourceIndex
 from memory.research_memory import save_plan, retrieve_context, add_research_result, update_memory_context
 
 class LeadResearcher:
     """Agente líder que coordena todo o processo de pesquisa"""
     
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model=Config.MODEL_NAME,
-            temperature=Config.TEMPERATURE,
-            api_key=Config.OPENAI_API_KEY
-        )
+        self.llm = get_chat_model()
         self.subagents_created = 0
         self.research_complete = False
         
@@ -49,7 +49,7 @@ class LeadResearcher:
                 HumanMessage(content=f"Query: {query}")
             ]
             
-            response = self.llm.invoke(messages)
+            response = invoke_llm(self.llm, messages, call_site="lead_researcher.analyze_query")
             
             # Parse da resposta JSON
             import json
@@ -66,7 +66,7 @@ class LeadResearcher:
             
             # Salva o plano na memória
             plan_text = json.dumps(plan_dict, indent=2, ensure_ascii=False)
-            save_plan(plan_text, query)
+            save_plan.invoke({"plan": plan_text, "query": query})
             
             return plan_dict
             
@@ -97,10 +97,73 @@ class LeadResearcher:
         
         return False  # Para se tem resultados suficientes
     
+    def find_coverage_gaps(self, plan: Dict[str, Any], sources: List[Dict]) -> List[str]:
+        """Aspectos do plano (research_aspects) ainda cobertos por menos de COVERAGE_MIN_SOURCES fontes"""
+        
+        aspects = [aspect for aspect in plan.get("research_aspects", []) if isinstance(aspect, str) and aspect.strip()]
+        if not aspects:
+            return []
+        
+        index = SourceIndex(sources)
+        gaps = []
+        
+        for aspect in aspects:
+            # Palavras curtas (artigos, preposições) não indicam cobertura
+            terms = {term for term in SourceIndex.tokenize(aspect) if len(term) > 2}
+            if not terms:
+                continue
+            
+            covering = sum(
+                1 for _, matches in index.score_statement(" ".join(terms)).values()
+                if matches / len(terms) >= Config.COVERAGE_TERM_OVERLAP
+            )
+            if covering < Config.COVERAGE_MIN_SOURCES:
+                gaps.append(aspect)
+        
+        return gaps
+    
+    def plan_gap_tasks(self, query: str, gaps: List[str], iteration: int) -> List[Dict[str, str]]:
+        """Tarefas de subagente para os aspectos pouco cobertos (sem chamada de LLM)"""
+        
+        return [
+            {"id": f"gap_{iteration}_{i}", "task": f"{query}: {gap}", "focus": gap}
+            for i, gap in enumerate(gaps[:Config.MAX_SUBAGENTS], 1)
+        ]
+    
     def synthesize_results(self, query: str, subagent_results: List[Dict]) -> str:
         """Sintetiza todos os resultados dos subagentes em um relatório final"""
         
-        context = retrieve_context()
+        messages = self._build_synthesis_messages(query, subagent_results)
+        
+        try:
+            response = invoke_llm(self.llm, messages, call_site="lead_researcher.synthesize_results")
+            return response.content
+            
+        except Exception as e:
+            print(f"Erro na síntese: {e}")
+            return self._fallback_report(query, subagent_results)
+    
+    def stream_synthesis(self, query: str, subagent_results: List[Dict]) -> Iterator[str]:
+        """Sintetiza o relatório final emitindo trechos à medida que são gerados"""
+        
+        messages = self._build_synthesis_messages(query, subagent_results)
+        emitted = False
+        
+        try:
+            for chunk in stream_llm(self.llm, messages, call_site="lead_researcher.synthesize_results"):
+                emitted = True
+                yield chunk
+                
+        except Exception as e:
+            print(f"Erro na síntese: {e}")
+            # Só é possível recorrer ao fallback se nada foi emitido ainda
+            if not emitted:
+                yield self._fallback_report(query, subagent_results)
+    
+    def _build_synthesis_messages(self, query: str, subagent_results: List[Dict]) -> List:
+        """Monta o prompt de síntese a partir do plano e dos resultados dos subagentes"""
+        
+        context = retrieve_context.invoke({})
         
         system_prompt = """Você é um especialista em síntese de pesquisa.
         
@@ -123,34 +186,28 @@ class LeadResearcher:
         - Informações relevantes adicionais
         """
         
-        # Prepara contexto para síntese
-        synthesis_context = f"""
-        Query original: {query}
+        # Prepara contexto para síntese: plano compactado + achados dentro do orçamento de tokens
+        plan = compact_json_text(context.get('plan')) or 'N/A'
+        header = f"Query original: {query}\n\nPlano de pesquisa: {plan}\n\nResultados dos subagentes:\n"
         
-        Plano de pesquisa: {context.get('plan', 'N/A')}
+        packed = context_packer.pack(query, groups_from_results(subagent_results), reserved_tokens=count_tokens(header))
+        synthesis_context = header + packed["text"]
         
-        Resultados dos subagentes:
-        """
+        print(f"📦 Contexto da síntese: {packed['snippets_used']}/{packed['snippets_total']} trechos, "
+              f"{packed['tokens']} tokens ({packed['duplicates']} duplicados removidos)")
         
-        for i, result in enumerate(subagent_results, 1):
-            synthesis_context += f"\n\nSubagente {i}:\n{result.get('summary', str(result))}"
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=synthesis_context)
+        ]
+    
+    def _fallback_report(self, query: str, subagent_results: List[Dict]) -> str:
+        """Fallback: concatena resultados simples"""
         
-        try:
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=synthesis_context)
-            ]
-            
-            response = self.llm.invoke(messages)
-            return response.content
-            
-        except Exception as e:
-            print(f"Erro na síntese: {e}")
-            # Fallback: concatena resultados simples
-            fallback_report = f"# Relatório de Pesquisa: {query}\n\n"
-            for i, result in enumerate(subagent_results, 1):
-                fallback_report += f"## Resultado {i}\n{result.get('summary', str(result))}\n\n"
-            return fallback_report
+        fallback_report = f"# Relatório de Pesquisa: {query}\n\n"
+        for i, result in enumerate(subagent_results, 1):
+            fallback_report += f"## Resultado {i}\n{result.get('summary', str(result))}\n\n"
+        return fallback_report
     
     def coordinate_research(self, query: str) -> Dict[str, Any]:
         """Coordena todo o processo de pesquisa"""
@@ -1,25 +1,42 @@
-from typing import List, Dict, Any
-from langchain_openai import ChatOpenAI
+import numpy as np
+from typing import List, Dict, Any, Optional, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.tools import tool
 from config import Config
+from utils.llm_cache import invoke_llm
+from utils.llm_clients import get_chat_model
 from tools.web_search import search_web, search_companies
 from memory.research_memory import research_memory
+from utils.tracing import run_in_context
+from utils.session import current_session
+from utils.near_duplicates import deduplicate_sources
+from tools.relevance_scorer import BatchRelevanceScorer, select_top_k
+from tools.search_cache import SearchCache
+from utils.helpers import canonicalize_url
 
 class SearchSubagent:
     """Subagente especializado em pesquisas específicas"""
     
-    def __init__(self, agent_id: str, task: str, focus: str):
+    def __init__(self, agent_id: str, task: str, focus: str,
+                 exclude_queries: Optional[Iterable[str]] = None, exclude_urls: Optional[Iterable[str]] = None):
         self.agent_id = agent_id
         self.task = task
         self.focus = focus
-        self.llm = ChatOpenAI(
-            model=Config.MODEL_NAME,
-            temperature=Config.TEMPERATURE,
-            api_key=Config.OPENAI_API_KEY
-        )
+        # Cliente compartilhado entre subagentes (mesmo pool de conexões)
+        self.llm = get_chat_model()
         self.search_iterations = 0
         self.max_iterations = 3
+        self.parallel_queries = Config.PARALLEL_SEARCH_QUERIES
+        self.relevance_scorer = BatchRelevanceScorer(task, focus)
+        
+        # Trabalho de rodadas anteriores: queries já feitas e URLs (canônicas) já vistas
+        self.exclude_queries = {SearchCache.normalize_query(query) for query in exclude_queries or ()}
+        self.exclude_urls = set(exclude_urls or ())
+        self.issued_queries: List[str] = []
+        
+        # Marcado quando o corte da fase de pesquisa interrompe pesquisas ou o resumo
+        self.cut_by_deadline = False
         
     def execute_search(self) -> Dict[str, Any]:
         """Executa a pesquisa especializada"""
@@ -28,22 +45,25 @@ class SearchSubagent:
         
         # 1. Planeja estratégia de pesquisa
         search_strategy = self._plan_search_strategy()
+        queries = self._new_queries(search_strategy.get("queries", []))
         
-        # 2. Executa pesquisas iterativas
-        all_results = []
-        for query in search_strategy["queries"]:
-            print(f"   🔎 Pesquisando: {query}")
-            results = self._perform_search(query)
-            all_results.extend(results)
-            
-            # Avalia se precisa continuar
-            if self._evaluate_results(all_results):
-                break
+        if not queries:
+            print(f"⏭️ {self.agent_id}: todas as queries já foram feitas em rodadas anteriores")
         
-        # 3. Processa e filtra resultados
-        processed_results = self._process_results(all_results)
+        # 2. Executa pesquisas (em paralelo ou iterativas)
+        if self.parallel_queries:
+            all_results = self._search_parallel(queries)
+        else:
+            all_results = self._search_sequential(queries)
         
-        # 4. Gera resumo
+        # URLs vistas nesta pesquisa (inclusive as já conhecidas) para as próximas rodadas
+        seen_urls = list(dict.fromkeys(url for url in (canonicalize_url(r.get("url", "")) for r in all_results) if url))
+        
+        # 3. Processa e filtra resultados (só o que ainda não foi visto)
+        new_results = [r for r in all_results if canonicalize_url(r.get("url", "")) not in self.exclude_urls]
+        processed_results = self._process_results(new_results)
+        
+        # 4. Gera resumo (sem chamada de LLM quando não há nada novo)
         summary = self._generate_summary(processed_results)
         
         result = {
@@ -55,12 +75,91 @@ class SearchSubagent:
             "processed_results": processed_results,
             "summary": summary,
             "sources": processed_results,
-            "status": "completed"
+            "issued_queries": list(self.issued_queries),
+            "seen_urls": seen_urls,
+            "status": "partial" if self.cut_by_deadline else "completed"
         }
         
         print(f"✅ {self.agent_id} concluído: {len(processed_results)} resultados")
         return result
     
+    def _new_queries(self, queries: List[str]) -> List[str]:
+        """Remove queries repetidas ou já feitas em rodadas anteriores"""
+        
+        new_queries = []
+        seen = set(self.exclude_queries)
+        for query in queries:
+            normalized = SearchCache.normalize_query(query)
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                new_queries.append(query)
+        return new_queries
+    
+    def _search_sequential(self, queries: List[str]) -> List[Dict]:
+        """Executa as queries uma a uma, parando quando os resultados bastam"""
+        
+        all_results = []
+        for i, query in enumerate(queries):
+            if self._research_time_over():
+                print(f"   ⏰ {self.agent_id}: prazo da pesquisa atingido, {len(queries) - i} pesquisa(s) não feita(s)")
+                break
+            
+            print(f"   🔎 Pesquisando: {query}")
+            self.issued_queries.append(query)
+            results = self._perform_search(query)
+            all_results.extend(results)
+            
+            # Avalia se precisa continuar
+            if self._evaluate_results(all_results):
+                break
+        
+        return all_results
+    
+    def _search_parallel(self, queries: List[str]) -> List[Dict]:
+        """Dispara todas as queries de uma vez e cancela as pendentes quando os resultados bastam"""
+        
+        if len(queries) <= 1 or self._research_time_over():
+            return self._search_sequential(queries)
+        
+        executor = ThreadPoolExecutor(max_workers=len(queries), thread_name_prefix=f"{self.agent_id}-search")
+        futures = {}
+        for i, query in enumerate(queries):
+            print(f"   🔎 Pesquisando: {query}")
+            futures[executor.submit(run_in_context(self._perform_search), query)] = i
+        
+        results_by_query = {}
+        try:
+            # Sem prazo, espera indefinidamente; com prazo, até o corte da fase de pesquisa
+            for future in as_completed(futures, timeout=current_session().time_left(research=True)):
+                results_by_query[futures[future]] = future.result()
+                
+                arrived = [r for i in sorted(results_by_query) for r in results_by_query[i]]
+                if self._evaluate_results(arrived):
+                    pending = len(futures) - len(results_by_query)
+                    if pending:
+                        print(f"   ⏹️ {self.agent_id}: resultados suficientes, cancelando {pending} pesquisa(s)")
+                    break
+        except FuturesTimeoutError:
+            self.cut_by_deadline = True
+            print(f"   ⏰ {self.agent_id}: prazo da pesquisa atingido, abandonando {len(futures) - len(results_by_query)} pesquisa(s)")
+        finally:
+            # Não espera pelas pesquisas em andamento; as que não começaram são canceladas
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        # Registradas nesta thread e na ordem da estratégia (não na ordem em que as threads rodaram)
+        started = sorted(i for future, i in futures.items() if not future.cancelled())
+        self.issued_queries.extend(queries[i] for i in started)
+        
+        # Ordena pela posição da query na estratégia para manter o resultado determinístico
+        return [r for i in sorted(results_by_query) for r in results_by_query[i]]
+    
+    def _research_time_over(self) -> bool:
+        """True quando o corte da fase de pesquisa (prazo da execução) já passou"""
+        if current_session().deadline_passed(research=True):
+            self.cut_by_deadline = True
+            return True
+        return False
+    
     def _plan_search_strategy(self) -> Dict[str, Any]:
         """Planeja estratégia de pesquisa baseada na tarefa"""
         
@@ -87,7 +186,7 @@ class SearchSubagent:
                 HumanMessage(content=f"Tarefa: {self.task}\nFoco: {self.focus}")
             ]
             
-            response = self.llm.invoke(messages)
+            response = invoke_llm(self.llm, messages, call_site="search_subagent.plan_search_strategy")
             
             import json
             try:
@@ -113,12 +212,14 @@ class SearchSubagent:
     def _perform_search(self, query: str) -> List[Dict]:
         """Executa uma pesquisa específica"""
         
+        current_session().increment("searches")
+        
         try:
             # Escolhe ferramenta de pesquisa baseada no foco
             if "company" in self.focus.lower() or "companies" in query.lower():
-                results = search_companies(query)
+                results = search_companies.invoke({"query": query})
             else:
-                results = search_web(query, num_results=Config.MAX_SEARCH_RESULTS)
+                results = search_web.invoke({"query": query, "num_results": Config.MAX_SEARCH_RESULTS})
             
             return results
             
@@ -147,62 +248,29 @@ class SearchSubagent:
     def _process_results(self, raw_results: List[Dict]) -> List[Dict]:
         """Processa e filtra resultados para melhor qualidade"""
         
-        processed = []
-        seen_urls = set()
+        # Filtra resultados com pouco conteúdo
+        candidates = [result for result in raw_results if len(result.get("content", "")) >= 50]
         
-        for result in raw_results:
-            url = result.get("url", "")
-            content = result.get("content", "")
-            
-            # Remove duplicatas
-            if url in seen_urls:
-                continue
-            seen_urls.add(url)
-            
-            # Filtra resultados com pouco conteúdo
-            if len(content) < 50:
-                continue
-            
-            # Adiciona metadados do processamento
-            processed_result = {
+        # Pontua todo o lote de uma vez (tarefa e foco tokenizados uma única vez)
+        scores = self.relevance_scorer.score(candidates)
+        
+        # Adiciona metadados do processamento
+        processed = [
+            {
                 **result,
                 "processed_by": self.agent_id,
-                "relevance_score": self._calculate_relevance(result),
-                "content_length": len(content)
+                "relevance_score": float(score),
+                "content_length": len(result.get("content", ""))
             }
-            
-            processed.append(processed_result)
-        
-        # Ordena por relevância
-        processed.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
-        
-        # Retorna top 10 resultados
-        return processed[:10]
-    
-    def _calculate_relevance(self, result: Dict) -> float:
-        """Calcula score de relevância para um resultado"""
-        
-        content = result.get("content", "").lower()
-        title = result.get("title", "").lower()
-        
-        # Palavras-chave da tarefa
-        task_words = set(self.task.lower().split())
-        focus_words = set(self.focus.lower().split())
+            for result, score in zip(candidates, scores)
+        ]
         
-        # Conta ocorrências
-        content_words = set(content.split())
-        title_words = set(title.split())
+        # Remove duplicatas (URL canônica e conteúdo quase idêntico), mantendo a mais relevante
+        processed = deduplicate_sources(processed)
         
-        task_matches = len(task_words.intersection(content_words.union(title_words)))
-        focus_matches = len(focus_words.intersection(content_words.union(title_words)))
-        
-        # Score base do resultado
-        base_score = result.get("score", 0.5)
-        
-        # Score combinado
-        relevance = (task_matches * 0.4 + focus_matches * 0.3 + base_score * 0.3)
-        
-        return min(relevance, 1.0)
+        # Top 10 por relevância com seleção parcial (sem ordenar o lote inteiro)
+        relevance = np.array([result["relevance_score"] for result in processed])
+        return [processed[index] for index in select_top_k(relevance, 10)]
     
     def _generate_summary(self, results: List[Dict]) -> str:
         """Gera resumo dos resultados encontrados"""
@@ -210,6 +278,10 @@ class SearchSubagent:
         if not results:
             return f"Nenhum resultado encontrado para: {self.task}"
         
+        # Fora do prazo da pesquisa não há tempo para mais uma chamada de LLM
+        if self._research_time_over():
+            return f"Encontrados {len(results)} resultados para: {self.task}"
+        
         # Prepara contexto para resumo
         context = f"Tarefa: {self.task}\nFoco: {self.focus}\n\nResultados encontrados:\n"
         
@@ -235,7 +307,7 @@ class SearchSubagent:
                 HumanMessage(content=context)
             ]
             
-            response = self.llm.invoke(messages)
+            response = invoke_llm(self.llm, messages, call_site="search_subagent.generate_summary")
             return response.content
             
         except Exception as e:
@@ -243,12 +315,14 @@ class SearchSubagent:
             return f"Encontrados {len(results)} resultados para: {self.task}"
 
 # Factory function para criar subagentes
-def create_subagent(agent_id: str, task: str, focus: str) -> SearchSubagent:
+def create_subagent(agent_id: str, task: str, focus: str,
+                    exclude_queries: Optional[Iterable[str]] = None, exclude_urls: Optional[Iterable[str]] = None) -> SearchSubagent:
     """Cria uma nova instância de SearchSubagent"""
-    return SearchSubagent(agent_id, task, focus)
+    return SearchSubagent(agent_id, task, focus, exclude_queries, exclude_urls)
 
 @tool
-def run_subagent(agent_id: str, task: str, focus: str = "general") -> Dict:
+def run_subagent(agent_id: str, task: str, focus: str = "general",
+                 exclude_queries: Optional[List[str]] = None, exclude_urls: Optional[List[str]] = None) -> Dict:
     """
     Executa um subagente de pesquisa.
     
@@ -256,11 +330,13 @@ def run_subagent(agent_id: str, task: str, focus: str = "general") -> Dict:
         agent_id: ID único do agente
         task: Tarefa específica de pesquisa
         focus: Foco ou especialização da pesquisa
+        exclude_queries: Queries já feitas em rodadas anteriores (não são repetidas)
+        exclude_urls: URLs canônicas já vistas (descartadas dos resultados)
         
     Returns:
         Resultado completo da pesquisa do subagente
     """
-    subagent = create_subagent(agent_id, task, focus)
+    subagent = create_subagent(agent_id, task, focus, exclude_queries, exclude_urls)
     result = subagent.execute_search()
     
     # Salva resultado na memória
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Execução em lote (não interativa) de pesquisas multi-agente.
+
+Lê queries de um arquivo JSONL ({"id": ..., "query": ...}) ou texto (uma por
+linha), executa com paralelismo configurável e grava cada relatório no JSONL
+de saída assim que termina. O próprio arquivo de saída serve de checkpoint:
+ao reiniciar, queries já registradas são puladas.
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Set
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import Config
+
+class BatchResearchRunner:
+    """Executa um arquivo de queries em lote com checkpoint e retomada"""
+    
+    def __init__(self, input_path: str, output_path: str, parallelism: int = None, retry_failed: bool = False):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.parallelism = max(1, parallelism or Config.BATCH_PARALLELISM)
+        self.retry_failed = retry_failed
+        self._write_lock = threading.Lock()
+    
+    def load_queries(self) -> List[Dict[str, str]]:
+        """
+        Carrega queries do arquivo de entrada (JSONL ou texto simples).
+        
+        Sem "id" explícito, o ID vem do hash da query normalizada, então inserir,
+        remover ou reordenar linhas não muda o ID das demais. Uma query repetida é
+        ignorada; um mesmo ID com queries diferentes invalida o arquivo (ValueError).
+        """
+        queries = []
+        positions: Dict[str, int] = {}
+        
+        with open(self.input_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                
+                query = line
+                query_id = None
+                
+                if line.startswith("{"):
+                    try:
+                        record = json.loads(line)
+                        query = str(record.get("query", "")).strip()
+                        query_id = str(record["id"]) if record.get("id") else None
+                    except json.JSONDecodeError:
+                        print(f"⚠️ Linha {line_number} ignorada: JSON inválido")
+                        continue
+                
+                if not query:
+                    continue
+                
+                query_id = query_id or make_query_id(query)
+                position = positions.get(query_id)
+                if position is not None:
+                    if normalize_query(queries[position]["query"]) != normalize_query(query):
+                        raise ValueError(f"ID '{query_id}' repetido com queries diferentes (linha {line_number})")
+                    print(f"⚠️ Linha {line_number} ignorada: query repetida ({query_id})")
+                    continue
+                
+                positions[query_id] = len(queries)
+                queries.append({"id": query_id, "query": query})
+        
+        return queries
+    
+    def load_completed(self) -> Set[str]:
+        """Lê o JSONL de saída e retorna os IDs já concluídos (checkpoint)"""
+        completed = set()
+        
+        if not os.path.exists(self.output_path):
+            return completed
+        
+        with open(self.output_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Linha truncada por uma execução interrompida
+                    continue
+                
+                if record.get("success") or not self.retry_failed:
+                    completed.add(record.get("id"))
+        
+        return completed
+    
+    def run(self) -> Dict[str, Any]:
+        """Executa as queries pendentes e retorna um resumo do lote"""
+        queries = self.load_queries()
+        completed = self.load_completed()
+        pending = [item for item in queries if item["id"] not in completed]
+        
+        print(f"📦 Lote: {len(queries)} queries, {len(queries) - len(pending)} já concluídas, {len(pending)} pendentes")
+        print(f"⚙️ Paralelismo: {self.parallelism}")
+        
+        self._repair_output_tail()
+        
+        start_time = time.time()
+        succeeded = 0
+        failed = 0
+        
+        with ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix="batch") as executor:
+            futures = {executor.submit(self._run_one, item): item for item in pending}
+            
+            for done, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                self._append_record(record)
+                
+                if record["success"]:
+                    succeeded += 1
+                    status = "✅"
+                else:
+                    failed += 1
+                    status = "❌"
+                
+                print(f"{status} [{done}/{len(pending)}] {record['id']} ({record['elapsed_s']:.1f}s)")
+        
+        summary = {
+            "total": len(queries),
+            "skipped": len(queries) - len(pending),
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed_s": time.time() - start_time
+        }
+        
+        print(f"🏁 Lote concluído: {succeeded} sucesso(s), {failed} falha(s) em {summary['elapsed_s']:.1f}s")
+        return summary
+    
+    def _run_one(self, item: Dict[str, str]) -> Dict[str, Any]:
+        """Executa uma query isolando falhas"""
+        from graph.research_workflow import research_workflow
+        
+        start_time = time.time()
+        
+        try:
+            # Com CHECKPOINT_ENABLED, uma query interrompida é retomada de onde parou
+            run_id = f"batch:{item['id']}" if Config.CHECKPOINT_ENABLED else None
+            result = research_workflow.run_research(item["query"], run_id=run_id)
+        except Exception as e:
+            result = {"success": False, "error": str(e), "final_report": "", "sources": [], "metadata": {}}
+        
+        return {
+            "id": item["id"],
+            "query": item["query"],
+            "success": bool(result.get("success")),
+            "error": result.get("error"),
+            "final_report": result.get("final_report", ""),
+            "sources": result.get("sources", []),
+            "metadata": result.get("metadata", {}),
+            "elapsed_s": time.time() - start_time,
+            "completed_at": datetime.now().isoformat()
+        }
+    
+    def _append_record(self, record: Dict[str, Any]):
+        """Acrescenta um registro ao JSONL de saída e o força para o disco"""
+        line = json.dumps(record, ensure_ascii=False)
+        
+        with self._write_lock:
+            with open(self.output_path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def _repair_output_tail(self):
+        """Garante que novos registros não sejam colados a uma linha truncada"""
+        if not os.path.exists(self.output_path) or os.path.getsize(self.output_path) == 0:
+            return
+        
+        with open(self.output_path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+def normalize_query(query: str) -> str:
+    """Caixa e espaços não mudam a identidade de uma query"""
+    return " ".join(query.lower().split())
+
+def make_query_id(query: str) -> str:
+    """ID estável derivado do texto da query (independe da posição no arquivo)"""
+    return "q-" + hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()[:12]
+
+def main(argv: Optional[List[str]] = None):
+    """Ponto de entrada da linha de comando"""
+    parser = argparse.ArgumentParser(description="Executa pesquisas multi-agente em lote")
+    parser.add_argument("input", help="Arquivo de queries (JSONL com id/query ou texto, uma por linha)")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL de saída (também usado como checkpoint)")
+    parser.add_argument("-p", "--parallelism", type=int, default=None, help="Número de pesquisas simultâneas")
+    parser.add_argument("--retry-failed", action="store_true", help="Reexecuta queries que falharam anteriormente")
+    args = parser.parse_args(argv)
+    
+    Config.validate()
+    
+    runner = BatchResearchRunner(args.input, args.output, args.parallelism, args.retry_failed)
+    try:
+        summary = runner.run()
+    except ValueError as e:
+        print(f"❌ Arquivo de queries inválido: {e}")
+        return 2
+    
+    return 0 if summary["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
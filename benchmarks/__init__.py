@@ -0,0 +1 @@
+"""Benchmarks offline do workflow de pesquisa"""
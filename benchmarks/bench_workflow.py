@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline do workflow de pesquisa (sem chamadas pagas).
+
+Substitui ChatOpenAI e WebSearchTool por simuladores locais com latência e
+tamanho de payload configuráveis, executa o grafo completo várias vezes e
+relata p50/p95 por nó, pico de RSS e alocações.
+
+Uso:
+    python -m benchmarks.bench_workflow --runs 10 --llm-latency lognormal:0.05,0.4
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import resource
+import tracemalloc
+import contextlib
+from functools import partial
+from collections import defaultdict
+from typing import Dict, List, Any, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import LatencyDistribution, FakeChatModel, FakeWebSearchTool
+from utils.session import research_session
+
+NODE_ORDER = [
+    "plan_research",
+    "execute_subagents",
+    "evaluate_progress",
+    "synthesize_results",
+    "add_citations",
+    "finalize_report"
+]
+
+def install_fakes(args: argparse.Namespace) -> Dict[str, Any]:
+    """Troca os clientes reais (LLM e pesquisa) pelos simuladores locais"""
+    from config import Config
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or "sk-benchmark"
+    Config.SEARCH_CACHE_ENABLED = False
+    
+    # Caches e limites de taxa desativados para medir o custo real de orquestração
+    from utils.llm_cache import set_llm_cache
+    from utils.rate_limiter import set_rate_limiter
+    set_llm_cache(None)
+    set_rate_limiter(None)
+    
+    llm_factory = partial(
+        FakeChatModel,
+        latency=LatencyDistribution(args.llm_latency, seed=args.seed),
+        report_chars=args.report_chars,
+        summary_chars=args.summary_chars,
+        num_subagents=args.subagents
+    )
+    search_tool = FakeWebSearchTool(
+        latency=LatencyDistribution(args.search_latency, seed=args.seed + 1),
+        num_results=args.results_per_query,
+        content_chars=args.result_chars
+    )
+    
+    # import_module devolve o submódulo: agents/__init__ reexporta instâncias com o mesmo nome
+    lead_module = importlib.import_module("agents.lead_researcher")
+    citation_module = importlib.import_module("agents.citation_agent")
+    web_search_module = importlib.import_module("tools.web_search")
+    llm_clients_module = importlib.import_module("utils.llm_clients")
+    
+    lead_module.lead_researcher.llm = llm_factory()
+    citation_module.citation_agent.llm = llm_factory()
+    llm_clients_module.ChatOpenAI = llm_factory
+    llm_clients_module.reset_chat_models()
+    web_search_module.web_search_tool = search_tool
+    
+    return {"search_tool": search_tool}
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por interpolação linear"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def run_once(workflow, query: str, node_timings: Dict[str, List[float]]) -> float:
+    """Executa o grafo uma vez, registrando o tempo de cada nó"""
+    state = workflow.create_initial_state(query)
+    start = last = time.perf_counter()
+    
+    # Sessão própria por rodada, como em run_research (memória e citações não vazam entre rodadas)
+    with research_session(query=query):
+        # O grafo é sequencial: o intervalo entre atualizações é o tempo do nó
+        for update in workflow.graph.stream(state, stream_mode="updates"):
+            now = time.perf_counter()
+            for node in update:
+                node_timings[node].append(now - last)
+            last = now
+    
+    return time.perf_counter() - start
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Executa aquecimento + rodadas medidas e agrega as métricas"""
+    fakes = install_fakes(args)
+    from graph.research_workflow import research_workflow
+    
+    node_timings: Dict[str, List[float]] = defaultdict(list)
+    totals: List[float] = []
+    output = None if args.verbose else io.StringIO()
+    
+    with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+        for i in range(args.warmup):
+            run_once(research_workflow, f"{args.query} (aquecimento {i})", defaultdict(list))
+        
+        if args.trace_allocations:
+            tracemalloc.start()
+        
+        for i in range(args.runs):
+            totals.append(run_once(research_workflow, f"{args.query} #{i}", node_timings))
+            if output:
+                output.seek(0)
+                output.truncate()
+        
+        allocations = {}
+        if args.trace_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            allocations = {
+                "traced_current_bytes": current,
+                "traced_peak_bytes": peak,
+                "live_blocks": sum(stat.count for stat in snapshot.statistics("filename"))
+            }
+    
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_bytes = max_rss if sys.platform == "darwin" else max_rss * 1024
+    
+    nodes = {}
+    for node in sorted(node_timings, key=lambda name: NODE_ORDER.index(name) if name in NODE_ORDER else len(NODE_ORDER)):
+        values = node_timings[node]
+        nodes[node] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "max_ms": max(values) * 1000
+        }
+    
+    return {
+        "config": {
+            "runs": args.runs,
+            "warmup": args.warmup,
+            "subagents": args.subagents,
+            "llm_latency": args.llm_latency,
+            "search_latency": args.search_latency,
+            "results_per_query": args.results_per_query,
+            "result_chars": args.result_chars,
+            "report_chars": args.report_chars
+        },
+        "total": {
+            "p50_ms": percentile(totals, 50) * 1000,
+            "p95_ms": percentile(totals, 95) * 1000,
+            "max_ms": max(totals) * 1000 if totals else 0.0
+        },
+        "nodes": nodes,
+        "search_calls": fakes["search_tool"].calls,
+        "peak_rss_bytes": peak_rss_bytes,
+        "allocations": allocations
+    }
+
+def print_report(report: Dict[str, Any]):
+    """Imprime o relatório do benchmark em formato de tabela"""
+    print("\n⏱️  Benchmark do workflow (offline)")
+    print("-" * 64)
+    print(f"{'nó':<22}{'n':>6}{'p50 (ms)':>12}{'p95 (ms)':>12}{'max (ms)':>12}")
+    print("-" * 64)
+    
+    for node, stats in report["nodes"].items():
+        print(f"{node:<22}{stats['count']:>6}{stats['p50_ms']:>12.1f}{stats['p95_ms']:>12.1f}{stats['max_ms']:>12.1f}")
+    
+    total = report["total"]
+    print("-" * 64)
+    print(f"{'total':<22}{report['config']['runs']:>6}{total['p50_ms']:>12.1f}{total['p95_ms']:>12.1f}{total['max_ms']:>12.1f}")
+    print(f"\nPico de RSS: {report['peak_rss_bytes'] / 1024 / 1024:.1f} MB")
+    print(f"Chamadas de pesquisa: {report['search_calls']}")
+    
+    allocations = report["allocations"]
+    if allocations:
+        print(f"Alocações (tracemalloc): pico {allocations['traced_peak_bytes'] / 1024 / 1024:.1f} MB, "
+              f"{allocations['live_blocks']} blocos vivos")
+
+def main(argv: Optional[List[str]] = None):
+    """Ponto de entrada da linha de comando"""
+    parser = argparse.ArgumentParser(description="Benchmark offline do workflow multi-agente")
+    parser.add_argument("--runs", type=int, default=5, help="Rodadas medidas")
+    parser.add_argument("--warmup", type=int, default=1, help="Rodadas de aquecimento (não medidas)")
+    parser.add_argument("--query", default="benchmark de orquestração", help="Query base")
+    parser.add_argument("--subagents", type=int, default=3, help="Tarefas no plano simulado")
+    parser.add_argument("--llm-latency", default="fixed:0.05", help="Distribuição de latência do LLM")
+    parser.add_argument("--search-latency", default="fixed:0.02", help="Distribuição de latência da pesquisa")
+    parser.add_argument("--results-per-query", type=int, default=5, help="Resultados por pesquisa")
+    parser.add_argument("--result-chars", type=int, default=800, help="Tamanho do conteúdo de cada resultado")
+    parser.add_argument("--summary-chars", type=int, default=1200, help="Tamanho dos resumos dos subagentes")
+    parser.add_argument("--report-chars", type=int, default=4000, help="Tamanho do relatório sintetizado")
+    parser.add_argument("--seed", type=int, default=42, help="Semente das distribuições de latência")
+    parser.add_argument("--trace-allocations", action="store_true", help="Mede alocações com tracemalloc (mais lento)")
+    parser.add_argument("--json", dest="json_path", default=None, help="Grava o relatório em JSON")
+    parser.add_argument("--verbose", action="store_true", help="Mostra a saída do workflow")
+    args = parser.parse_args(argv)
+    
+    report = run_benchmark(args)
+    print_report(report)
+    
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Relatório salvo em: {args.json_path}")
+    
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
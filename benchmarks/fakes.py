@@ -0,0 +1,161 @@
+import json
+import math
+import time
+import random
+import asyncio
+import threading
+from typing import List, Dict, Any, Iterator
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+
+class LatencyDistribution:
+    """
+    Distribuição de latência (em segundos) a partir de uma especificação textual.
+    
+    Formatos aceitos:
+        fixed:0.05            latência constante
+        uniform:0.02,0.10     uniforme entre mínimo e máximo
+        normal:0.05,0.01      normal (média, desvio), truncada em zero
+        lognormal:0.05,0.5    log-normal (mediana, sigma)
+    """
+    
+    def __init__(self, spec: str = "fixed:0", seed: int = 0):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.params = [float(value) for value in params.split(",") if value.strip()] or [0.0]
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Distribuição de latência desconhecida: {spec}")
+    
+    def sample(self) -> float:
+        """Sorteia uma latência"""
+        with self._lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return self._random.uniform(self.params[0], self.params[1])
+            if self.kind == "normal":
+                return max(0.0, self._random.gauss(self.params[0], self.params[1]))
+            # lognormal: params = (mediana, sigma)
+            return self._random.lognormvariate(math.log(max(self.params[0], 1e-9)), self.params[1])
+    
+    def wait(self, timeout: float = None):
+        """Dorme pela latência sorteada (TimeoutError se passar do timeout, como o cliente HTTP)"""
+        delay = self.sample()
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("Request timed out.")
+        if delay > 0:
+            time.sleep(delay)
+
+class FakeChatModel:
+    """Substituto determinístico do ChatOpenAI com respostas prontas por tipo de prompt"""
+    
+    def __init__(self, latency: LatencyDistribution = None, report_chars: int = 4000,
+                 summary_chars: int = 1200, num_subagents: int = 3, stream_chunk_chars: int = 16,
+                 model: str = "fake-model", temperature: float = 0.1, **kwargs):
+        self.latency = latency or LatencyDistribution()
+        self.report_chars = report_chars
+        self.summary_chars = summary_chars
+        self.num_subagents = num_subagents
+        self.stream_chunk_chars = stream_chunk_chars
+        self.model_name = model
+        self.temperature = temperature
+        self.calls = 0
+        self._lock = threading.Lock()
+    
+    def invoke(self, messages: List[BaseMessage], timeout: float = None, **kwargs) -> AIMessage:
+        self._count_call()
+        self.latency.wait(timeout)
+        return AIMessage(content=self._respond(messages))
+    
+    def stream(self, messages: List[BaseMessage], timeout: float = None, **kwargs) -> Iterator[AIMessageChunk]:
+        self._count_call()
+        self.latency.wait(timeout)
+        content = self._respond(messages)
+        for start in range(0, len(content), self.stream_chunk_chars):
+            yield AIMessageChunk(content=content[start:start + self.stream_chunk_chars])
+    
+    def _count_call(self):
+        with self._lock:
+            self.calls += 1
+    
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        """Escolhe a resposta pronta a partir do prompt de sistema"""
+        system_prompt = messages[0].content if messages else ""
+        
+        if "Lead Researcher" in system_prompt:
+            return json.dumps({
+                "analysis": "Análise sintética para benchmark",
+                "research_aspects": [f"aspecto {i + 1}" for i in range(self.num_subagents)],
+                "subagent_tasks": [
+                    {"id": f"subagent_{i + 1}", "task": f"tarefa de benchmark {i + 1}", "focus": "general"}
+                    for i in range(self.num_subagents)
+                ],
+                "synthesis_strategy": "combinar resultados"
+            })
+        
+        if "estratégias de pesquisa" in system_prompt:
+            task = messages[-1].content.splitlines()[0].replace("Tarefa: ", "")
+            return json.dumps({
+                "queries": [task, f"{task} análise", f"{task} 2025"],
+                "strategy": "estratégia de benchmark",
+                "expected_sources": ["web"]
+            })
+        
+        if "citações" in system_prompt:
+            return json.dumps({
+                "citation_needs": [
+                    {"text": f"fato relevante número {i}", "type": "fact", "priority": "high", "context": "benchmark"}
+                    for i in range(10)
+                ]
+            })
+        
+        if "síntese de pesquisa" in system_prompt:
+            return _filler_text("# Relatório de benchmark\n\n", self.report_chars)
+        
+        return _filler_text("Resumo de benchmark. ", self.summary_chars)
+
+class FakeWebSearchTool:
+    """Substituto do WebSearchTool que devolve resultados sintéticos"""
+    
+    def __init__(self, latency: LatencyDistribution = None, num_results: int = 5, content_chars: int = 800):
+        self.latency = latency or LatencyDistribution()
+        self.num_results = num_results
+        self.content_chars = content_chars
+        self.calls = 0
+        self.cache = None
+        self._lock = threading.Lock()
+    
+    def search_web(self, query: str, num_results: int = None) -> List[Dict]:
+        with self._lock:
+            self.calls += 1
+        self.latency.wait()
+        
+        slug = "-".join(query.lower().split())
+        return [
+            {
+                "title": f"{query} resultado {i + 1}",
+                "url": f"https://bench.example/{slug}/{i + 1}",
+                "content": _filler_text(f"{query} company fato relevante número {i} ", self.content_chars),
+                "score": round(0.95 - i * 0.05, 2)
+            }
+            for i in range(num_results or self.num_results)
+        ]
+    
+    async def asearch_web(self, query: str, num_results: int = None) -> List[Dict]:
+        return await asyncio.to_thread(self.search_web, query, num_results)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return {"enabled": False}
+
+def _filler_text(prefix: str, size: int) -> str:
+    """Gera texto determinístico com o tamanho pedido"""
+    body = prefix
+    sentence = 0
+    while len(body) < size:
+        body += f"Frase de preenchimento {sentence} com fato relevante número {sentence % 10}. "
+        sentence += 1
+    return body[:size]
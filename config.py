@@ -20,6 +20,96 @@ class Config:
     MAX_SUBAGENTS = int(os.getenv("MAX_SUBAGENTS", "3"))
     MEMORY_LIMIT_TOKENS = int(os.getenv("MEMORY_LIMIT_TOKENS", "200000"))
     
+    # Paralelismo
+    MAX_CONCURRENT_SUBAGENTS = int(os.getenv("MAX_CONCURRENT_SUBAGENTS", "3"))
+    PARALLEL_SEARCH_QUERIES = os.getenv("PARALLEL_SEARCH_QUERIES", "true").lower() == "true"
+    
+    # Cache de pesquisa
+    SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", ".cache/search_cache.sqlite3")
+    SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "86400"))
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+    
+    # Cache de respostas do LLM
+    LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "sqlite")  # sqlite | memory | none
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "604800"))
+    LLM_CACHE_BYPASS = [site.strip() for site in os.getenv("LLM_CACHE_BYPASS", "").split(",") if site.strip()]
+    
+    # Pool de conexões HTTP (pesquisa assíncrona)
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+    HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+    
+    # Execução em lote
+    BATCH_PARALLELISM = int(os.getenv("BATCH_PARALLELISM", "2"))
+    
+    # Serviço HTTP local
+    SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+    SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+    SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "2"))
+    SERVICE_QUEUE_SIZE = int(os.getenv("SERVICE_QUEUE_SIZE", "16"))
+    SERVICE_MAX_JOBS_RETAINED = int(os.getenv("SERVICE_MAX_JOBS_RETAINED", "200"))
+    SERVICE_STREAM_HEARTBEAT_SECONDS = float(os.getenv("SERVICE_STREAM_HEARTBEAT_SECONDS", "15"))
+    
+    # Tracing (spans por nó, chamada de LLM e pesquisa)
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+    TRACE_DIR = os.getenv("TRACE_DIR", "traces")
+    TRACE_FORMAT = os.getenv("TRACE_FORMAT", "chrome")  # chrome | jsonl
+    
+    # Contagem de tokens
+    TOKEN_COUNTER_BACKEND = os.getenv("TOKEN_COUNTER_BACKEND", "tiktoken")  # tiktoken | heuristic
+    TOKEN_COUNTER_ENCODING = os.getenv("TOKEN_COUNTER_ENCODING", "")  # vazio = encoding do MODEL_NAME
+    TOKEN_COUNTER_CACHE_SIZE = int(os.getenv("TOKEN_COUNTER_CACHE_SIZE", "20000"))
+    TOKENIZER_BPE_DIR = os.getenv("TOKENIZER_BPE_DIR", "data/tiktoken")  # <encoding>.tiktoken, nunca baixado
+    
+    # Orçamento de contexto da síntese
+    SYNTHESIS_CONTEXT_TOKENS = int(os.getenv("SYNTHESIS_CONTEXT_TOKENS", "8000"))
+    CONTEXT_SNIPPET_MAX_TOKENS = int(os.getenv("CONTEXT_SNIPPET_MAX_TOKENS", "400"))
+    CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.8"))
+    
+    # Deduplicação de fontes quase idênticas (MinHash + LSH)
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))  # 1.0 = apenas duplicatas exatas
+    NEAR_DUPLICATE_NUM_PERM = int(os.getenv("NEAR_DUPLICATE_NUM_PERM", "32"))
+    NEAR_DUPLICATE_BANDS = int(os.getenv("NEAR_DUPLICATE_BANDS", "8"))
+    NEAR_DUPLICATE_MIN_WORDS = int(os.getenv("NEAR_DUPLICATE_MIN_WORDS", "20"))
+    
+    # Relevância dos resultados de pesquisa
+    RELEVANCE_WEIGHTING = os.getenv("RELEVANCE_WEIGHTING", "binary")  # binary | tfidf
+    
+    # Rodadas iterativas: um aspecto do plano está coberto quando tem COVERAGE_MIN_SOURCES
+    # fontes com pelo menos COVERAGE_TERM_OVERLAP dos seus termos
+    COVERAGE_MIN_SOURCES = int(os.getenv("COVERAGE_MIN_SOURCES", "2"))
+    COVERAGE_TERM_OVERLAP = float(os.getenv("COVERAGE_TERM_OVERLAP", "0.5"))
+    
+    # Política de parada das rodadas (marginal_gain | heuristic) e orçamentos por execução (0 = sem limite)
+    STOPPING_POLICY = os.getenv("STOPPING_POLICY", "marginal_gain")
+    STOP_MIN_MARGINAL_GAIN = float(os.getenv("STOP_MIN_MARGINAL_GAIN", "0.15"))
+    RUN_TOKEN_BUDGET = int(os.getenv("RUN_TOKEN_BUDGET", "0"))
+    RUN_TIME_BUDGET_SECONDS = float(os.getenv("RUN_TIME_BUDGET_SECONDS", "0"))
+    
+    # Prazo por execução (run_research(deadline_s=...); 0 = sem prazo) e fração dele dedicada à coleta;
+    # o restante fica para síntese e citações sobre o que já chegou
+    RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "0"))
+    DEADLINE_RESEARCH_SHARE = float(os.getenv("DEADLINE_RESEARCH_SHARE", "0.7"))
+    
+    # Limites de taxa do processo (0 = sem limite): acima deles as chamadas esperam em fila em vez de
+    # receber 429. RATE_LIMIT_OVERRIDES (JSON) ajusta por provedor ou provedor:modelo,
+    # ex.: {"openai:gpt-4o": {"rpm": 500, "tpm": 30000}, "tavily": {"rpm": 100}}
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+    OPENAI_TPM = int(os.getenv("OPENAI_TPM", "200000"))
+    OPENAI_MAX_IN_FLIGHT = int(os.getenv("OPENAI_MAX_IN_FLIGHT", "16"))
+    SEARCH_RPM = int(os.getenv("SEARCH_RPM", "100"))
+    SEARCH_MAX_IN_FLIGHT = int(os.getenv("SEARCH_MAX_IN_FLIGHT", "8"))
+    RATE_LIMIT_OVERRIDES = os.getenv("RATE_LIMIT_OVERRIDES", "")
+    
+    # Checkpoints do workflow (retomada de execuções interrompidas)
+    CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "false").lower() == "true"
+    CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", ".cache/checkpoints.sqlite3")
+    
     @classmethod
     def validate(cls):
         """Valida se as configurações obrigatórias estão definidas"""
@@ -0,0 +1,357 @@
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.serde.jsonplus import JsonPlusSerializer
+from config import Config
+
+# Formas de gravar o valor de um canal em relação à última versão persistida
+FULL = "full"      # valor completo
+APPEND = "append"  # lista: só os itens acrescentados depois da versão base
+SAME = "same"      # idêntico à versão base (nenhum payload)
+
+class SQLiteCheckpointStore(BaseCheckpointSaver):
+    """
+    Checkpointer do LangGraph em SQLite com gravação incremental.
+    
+    Cada checkpoint guarda só o esqueleto (versões dos canais e o que cada nó já
+    viu); os valores ficam em uma tabela por (canal, versão) e só são gravados
+    quando a versão muda. Listas que apenas cresceram gravam os itens novos e
+    valores repetidos viram uma referência à versão anterior. As escritas
+    pendentes de um passo são descartadas quando o checkpoint seguinte é salvo.
+    """
+    
+    def __init__(self, path: str = None, compression_level: int = 6):
+        super().__init__(serde=JsonPlusSerializer())
+        self.path = path or Config.CHECKPOINT_PATH
+        self.compression_level = compression_level
+        
+        # Última versão persistida de cada (thread, canal): (versão, digest, digests dos itens se lista)
+        self._latest: Dict[Tuple[str, str], Tuple[str, str, Optional[List[str]]]] = {}
+        
+        self.bytes_written = 0
+        
+        # Uma única conexão compartilhada entre threads, serializada pelo lock
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Abre o banco e cria as tabelas se necessário"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError:
+            pass
+        
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_id TEXT,
+                step INTEGER,
+                source TEXT,
+                checkpoint BLOB NOT NULL,
+                metadata BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_id)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS channel_values (
+                thread_id TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                base_version TEXT,
+                payload BLOB,
+                PRIMARY KEY (thread_id, channel, version)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS pending_writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                base_version TEXT,
+                payload BLOB,
+                PRIMARY KEY (thread_id, checkpoint_id, task_id, idx)
+            )
+        """)
+        conn.commit()
+        return conn
+    
+    # Serialização
+    
+    def _dumps(self, value: Any) -> bytes:
+        return self.serde.dumps(value)
+    
+    def _compress(self, data: bytes) -> bytes:
+        compressed = zlib.compress(data, self.compression_level)
+        self.bytes_written += len(compressed)
+        return compressed
+    
+    def _loads(self, payload: bytes) -> Any:
+        return self.serde.loads(zlib.decompress(payload))
+    
+    @staticmethod
+    def _digest(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    
+    def _fingerprint(self, value: Any) -> Tuple[str, Optional[List[str]]]:
+        """Digest do valor e, para listas, o digest de cada item (para detectar acréscimos)"""
+        if isinstance(value, list):
+            items = [self._digest(self._dumps(item)) for item in value]
+            return self._digest("".join(items).encode("ascii")), items
+        return self._digest(self._dumps(value)), None
+    
+    def _encode(self, thread_id: str, channel: str, value: Any) -> Tuple[str, Optional[str], Optional[bytes], Tuple[str, Optional[List[str]]]]:
+        """Codifica um valor relativo à última versão persistida do canal: (kind, base_version, payload, fingerprint)"""
+        fingerprint = self._fingerprint(value)
+        digest, items = fingerprint
+        latest = self._latest.get((thread_id, channel))
+        
+        if latest is not None:
+            base_version, base_digest, base_items = latest
+            if digest == base_digest:
+                return SAME, base_version, None, fingerprint
+            if items is not None and base_items is not None and items[:len(base_items)] == base_items:
+                return APPEND, base_version, self._compress(self._dumps(value[len(base_items):])), fingerprint
+        
+        return FULL, None, self._compress(self._dumps(value)), fingerprint
+    
+    def _resolve(self, thread_id: str, channel: str, version: str, memo: Dict[Tuple[str, str], Any]) -> Any:
+        """Reconstrói o valor de um canal seguindo a cadeia de versões base"""
+        key = (channel, version)
+        if key in memo:
+            return memo[key]
+        
+        row = self._conn.execute(
+            "SELECT kind, base_version, payload FROM channel_values WHERE thread_id = ? AND channel = ? AND version = ?",
+            (thread_id, channel, version)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"Valor ausente no checkpoint: {channel}@{version}")
+        
+        memo[key] = self._decode(thread_id, channel, row, memo)
+        return memo[key]
+    
+    def _decode(self, thread_id: str, channel: str, row: Tuple[str, Optional[str], Optional[bytes]], memo: Dict) -> Any:
+        kind, base_version, payload = row
+        if kind == FULL:
+            return self._loads(payload)
+        
+        base = self._resolve(thread_id, channel, base_version, memo)
+        if kind == APPEND:
+            return list(base) + self._loads(payload)
+        return base
+    
+    # API do BaseCheckpointSaver
+    
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata) -> RunnableConfig:
+        """Persiste um checkpoint gravando só os canais cuja versão mudou"""
+        thread_id = config["configurable"]["thread_id"]
+        parent_id = config["configurable"].get("thread_ts")
+        channel_versions = dict(checkpoint["channel_versions"])
+        
+        # Canais nunca escritos (ex.: listas vazias iniciais) não têm versão e são recriados pelo grafo
+        channel_values = {
+            channel: value for channel, value in checkpoint["channel_values"].items() if channel in channel_versions
+        }
+        
+        # O esqueleto guarda só os nomes dos canais com valor; os valores vão para channel_values
+        skeleton = {**checkpoint, "channel_versions": channel_versions, "channel_values": sorted(channel_values)}
+        
+        # As escritas de cada nó já estão nos canais; o metadata guarda só quais canais cada nó alterou
+        writes = metadata.get("writes") or {}
+        compact_metadata = {
+            **metadata,
+            "writes": {node: sorted(value) if isinstance(value, dict) else None for node, value in writes.items()}
+        }
+        
+        with self._lock:
+            updated = {}
+            for channel, value in channel_values.items():
+                version = str(channel_versions[channel])
+                latest = self._latest.get((thread_id, channel))
+                if latest is not None and latest[0] == version:
+                    continue
+                
+                kind, base_version, payload, fingerprint = self._encode(thread_id, channel, value)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO channel_values (thread_id, channel, version, kind, base_version, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (thread_id, channel, version, kind, base_version, payload)
+                )
+                updated[channel] = (version, *fingerprint)
+            
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(thread_id, checkpoint_id, parent_id, step, source, checkpoint, metadata, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint["id"], parent_id, metadata.get("step"), metadata.get("source"),
+                    self._compress(self._dumps(skeleton)), self._compress(self._dumps(compact_metadata)), time.time()
+                )
+            )
+            
+            # As escritas pendentes do passo anterior foram aplicadas neste checkpoint
+            if parent_id:
+                self._conn.execute(
+                    "DELETE FROM pending_writes WHERE thread_id = ? AND checkpoint_id = ?", (thread_id, parent_id)
+                )
+            self._conn.commit()
+            
+            for channel, latest in updated.items():
+                self._latest[(thread_id, channel)] = latest
+        
+        return {"configurable": {"thread_id": thread_id, "thread_ts": checkpoint["id"]}}
+    
+    def put_writes(self, config: RunnableConfig, writes: List[Tuple[str, Any]], task_id: str) -> None:
+        """Persiste as escritas de um nó concluído (codificadas contra o último valor de cada canal)"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = config["configurable"]["thread_ts"]
+        
+        with self._lock:
+            # O LangGraph grava checkpoints e escritas em threads de fundo: se o checkpoint
+            # seguinte já foi salvo, estas escritas já estão nele e não devem ficar órfãs
+            child = self._conn.execute(
+                "SELECT 1 FROM checkpoints WHERE thread_id = ? AND parent_id = ? LIMIT 1", (thread_id, checkpoint_id)
+            ).fetchone()
+            if child is not None:
+                return
+            
+            for idx, (channel, value) in enumerate(writes):
+                kind, base_version, payload, _ = self._encode(thread_id, channel, value)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pending_writes "
+                    "(thread_id, checkpoint_id, task_id, idx, channel, kind, base_version, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_id, task_id, idx, channel, kind, base_version, payload)
+                )
+            self._conn.commit()
+    
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Carrega um checkpoint (o mais recente da thread se thread_ts não for informado)"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = config["configurable"].get("thread_ts")
+        
+        with self._lock:
+            if checkpoint_id:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_id, checkpoint, metadata FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_id)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_id, checkpoint, metadata FROM checkpoints "
+                    "WHERE thread_id = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id,)
+                ).fetchone()
+            
+            if row is None:
+                return None
+            
+            return self._load_tuple(thread_id, row, prime=not checkpoint_id)
+    
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        """Lista os checkpoints de uma thread do mais recente para o mais antigo"""
+        if config is None:
+            return
+        
+        thread_id = config["configurable"]["thread_id"]
+        query = "SELECT checkpoint_id, parent_id, checkpoint, metadata FROM checkpoints WHERE thread_id = ?"
+        params: List[Any] = [thread_id]
+        if before is not None:
+            query += " AND checkpoint_id < ?"
+            params.append(before["configurable"]["thread_ts"])
+        query += " ORDER BY checkpoint_id DESC"
+        
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        
+        yielded = 0
+        for row in rows:
+            if limit is not None and yielded >= limit:
+                break
+            with self._lock:
+                checkpoint_tuple = self._load_tuple(thread_id, row)
+            if filter and any(checkpoint_tuple.metadata.get(key) != value for key, value in filter.items()):
+                continue
+            yielded += 1
+            yield checkpoint_tuple
+    
+    def _load_tuple(self, thread_id: str, row: Tuple, prime: bool = False) -> CheckpointTuple:
+        """Reconstrói checkpoint, metadata e escritas pendentes a partir das linhas compactas"""
+        checkpoint_id, parent_id, skeleton_payload, metadata_payload = row
+        skeleton = self._loads(skeleton_payload)
+        memo: Dict[Tuple[str, str], Any] = {}
+        
+        channel_values = {}
+        for channel in skeleton["channel_values"]:
+            version = str(skeleton["channel_versions"][channel])
+            channel_values[channel] = self._resolve(thread_id, channel, version, memo)
+            
+            # Retomada em outro processo: as próximas gravações continuam incrementais
+            if prime and (thread_id, channel) not in self._latest:
+                self._latest[(thread_id, channel)] = (version, *self._fingerprint(channel_values[channel]))
+        
+        pending_writes = [
+            (task_id, channel, self._decode(thread_id, channel, (kind, base_version, payload), memo))
+            for task_id, channel, kind, base_version, payload in self._conn.execute(
+                "SELECT task_id, channel, kind, base_version, payload FROM pending_writes "
+                "WHERE thread_id = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                (thread_id, checkpoint_id)
+            )
+        ]
+        
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "thread_ts": checkpoint_id}},
+            checkpoint={**skeleton, "channel_values": channel_values},
+            metadata=self._loads(metadata_payload),
+            parent_config={"configurable": {"thread_id": thread_id, "thread_ts": parent_id}} if parent_id else None,
+            pending_writes=pending_writes
+        )
+    
+    # Manutenção
+    
+    def delete_thread(self, thread_id: str) -> None:
+        """Remove todos os checkpoints de uma execução"""
+        with self._lock:
+            for table in ("checkpoints", "channel_values", "pending_writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+            for key in [key for key in self._latest if key[0] == thread_id]:
+                del self._latest[key]
+    
+    def get_stats(self, thread_id: str = None) -> Dict[str, Any]:
+        """Número de checkpoints e bytes armazenados (de uma execução ou do banco inteiro)"""
+        where, params = ("WHERE thread_id = ?", (thread_id,)) if thread_id else ("", ())
+        
+        with self._lock:
+            checkpoints, checkpoint_bytes = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints {where}", params
+            ).fetchone()
+            values, value_bytes = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM channel_values {where}", params
+            ).fetchone()
+        
+        return {
+            "checkpoints": checkpoints,
+            "channel_values": values,
+            "stored_bytes": checkpoint_bytes + value_bytes,
+            "bytes_written": self.bytes_written
+        }
@@ -1,34 +1,98 @@
-from typing import Dict, List, Any, Annotated
+import json
+import uuid
+import queue
+import time
+import threading
+import functools
+from typing import Dict, List, Any, Annotated, Optional, Callable, Iterator, Hashable, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, END
+from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
 from langchain_core.messages import BaseMessage
-import operator
+from langchain_core.runnables import RunnableConfig
 
 from agents.lead_researcher import lead_researcher, create_research_plan, evaluate_research_progress, synthesize_research_results
 from agents.search_subagent import run_subagent
 from agents.citation_agent import citation_agent, process_documents_for_citations
 from memory.research_memory import save_plan, retrieve_context, research_memory
 from config import Config
+from utils.tracing import trace_run, span, traced_node, run_in_context
+from utils.session import research_session, current_session
+from utils.near_duplicates import deduplicate_sources, source_quality
+from utils.helpers import source_key
+from graph.checkpoint_store import SQLiteCheckpointStore
+from graph.stopping_policy import create_stopping_policy, measure_round, marginal_gain, DEADLINE_STOP_REASON
+
+def merge_by_key(key: Callable[[Any], Hashable],
+                 prefer: Callable[[Any, Any], bool] = lambda new, old: True) -> Callable[[List[Any], List[Any]], List[Any]]:
+    """
+    Cria um reducer que mescla listas por chave.
+    
+    Entradas com chave nova são acrescentadas no fim; uma chave repetida substitui
+    a entrada existente (na mesma posição) quando prefer(nova, atual) é verdadeiro.
+    Reaplicar a mesma atualização não altera o estado (idempotente).
+    """
+    def reducer(current: List[Any], update: List[Any]) -> List[Any]:
+        if not update:
+            return current
+        
+        merged = list(current)
+        positions = {key(item): i for i, item in enumerate(merged)}
+        
+        for item in update:
+            item_key = key(item)
+            position = positions.get(item_key)
+            if position is None:
+                positions[item_key] = len(merged)
+                merged.append(item)
+            elif prefer(item, merged[position]):
+                merged[position] = item
+        
+        return merged
+    
+    return reducer
+
+# Um resultado por subagente e iteração (reexecuções substituem o anterior)
+merge_subagent_results = merge_by_key(lambda result: (result.get("agent_id"), result.get("iteration")))
+
+# Uma fonte por URL canônica, mantendo a versão mais relevante
+merge_sources = merge_by_key(source_key, prefer=lambda new, old: source_quality(new) > source_quality(old))
+
+# Conjuntos ordenados (queries feitas, URLs vistas) acumulados entre rodadas
+merge_unique = merge_by_key(lambda item: item, prefer=lambda new, old: False)
+
+# Estatísticas de novidade e custo, uma entrada por rodada
+merge_round_stats = merge_by_key(lambda stats: stats["iteration"])
 
 class ResearchState(TypedDict):
-    """Estado do workflow de pesquisa"""
+    """Estado do workflow de pesquisa (os nós devolvem só os campos que alteram)"""
     query: str
     research_plan: Dict[str, Any]
-    subagent_results: Annotated[List[Dict], operator.add]
+    subagent_results: Annotated[List[Dict], merge_subagent_results]
     current_iteration: int
     max_iterations: int
     research_complete: bool
     final_report: str
     cited_report: str
-    sources: Annotated[List[Dict], operator.add]
-    messages: Annotated[List[BaseMessage], operator.add]
+    sources: Annotated[List[Dict], merge_sources]
+    messages: Annotated[List[BaseMessage], add_messages]
+    issued_queries: Annotated[List[str], merge_unique]
+    seen_urls: Annotated[List[str], merge_unique]
+    coverage_gaps: List[str]
+    round_stats: Annotated[List[Dict], merge_round_stats]
+    stop_reason: str
+    partial: bool
 
 class MultiAgentResearchWorkflow:
     """Workflow principal para pesquisa multi-agente"""
     
     def __init__(self):
         self.graph = None
+        # Checkpoints persistidos após cada nó (opt-in), permitindo retomar execuções
+        self.checkpointer = SQLiteCheckpointStore() if Config.CHECKPOINT_ENABLED else None
+        self.stopping_policy = create_stopping_policy()
         self._build_graph()
     
     def _build_graph(self):
@@ -37,13 +101,17 @@ class MultiAgentResearchWorkflow:
         # Define o grafo
         workflow = StateGraph(ResearchState)
         
-        # Adiciona nós
-        workflow.add_node("plan_research", self.plan_research)
-        workflow.add_node("execute_subagents", self.execute_subagents)
-        workflow.add_node("evaluate_progress", self.evaluate_progress)
-        workflow.add_node("synthesize_results", self.synthesize_results)
-        workflow.add_node("add_citations", self.add_citations)
-        workflow.add_node("finalize_report", self.finalize_report)
+        # Adiciona nós (cada execução de nó vira um span quando o tracing está ativo)
+        nodes = {
+            "plan_research": self.plan_research,
+            "execute_subagents": self.execute_subagents,
+            "evaluate_progress": self.evaluate_progress,
+            "synthesize_results": self.synthesize_results,
+            "add_citations": self.add_citations,
+            "finalize_report": self.finalize_report
+        }
+        for name, node in nodes.items():
+            workflow.add_node(name, traced_node(name, node))
         
         # Define entradas e saídas
         workflow.set_entry_point("plan_research")
@@ -67,9 +135,9 @@ class MultiAgentResearchWorkflow:
         workflow.add_edge("finalize_report", END)
         
         # Compila o grafo
-        self.graph = workflow.compile()
+        self.graph = workflow.compile(checkpointer=self.checkpointer)
     
-    def plan_research(self, state: ResearchState) -> ResearchState:
+    def plan_research(self, state: ResearchState) -> Dict[str, Any]:
         """Nó para planejamento da pesquisa"""
         
         print(f"📋 Planejando pesquisa para: {state['query']}")
@@ -77,17 +145,16 @@ class MultiAgentResearchWorkflow:
         # Cria plano de pesquisa
         plan = lead_researcher.analyze_query(state["query"])
         
-        # Atualiza estado
-        state["research_plan"] = plan
-        state["current_iteration"] = 0
-        state["max_iterations"] = min(len(plan.get("subagent_tasks", [])) * 2, 6)
-        state["research_complete"] = False
-        
         print(f"✅ Plano criado com {len(plan.get('subagent_tasks', []))} tarefas")
         
-        return state
+        return {
+            "research_plan": plan,
+            "current_iteration": 0,
+            "max_iterations": min(len(plan.get("subagent_tasks", [])) * 2, 6),
+            "research_complete": False
+        }
     
-    def execute_subagents(self, state: ResearchState) -> ResearchState:
+    def execute_subagents(self, state: ResearchState) -> Dict[str, Any]:
         """Nó para execução de subagentes"""
         
         print(f"🤖 Executando subagentes (iteração {state['current_iteration'] + 1})")
@@ -95,62 +162,153 @@ class MultiAgentResearchWorkflow:
         plan = state["research_plan"]
         current_iteration = state["current_iteration"]
         
-        # Determina quais subagentes executar nesta iteração
-        subagent_tasks = plan.get("subagent_tasks", [])
+        # Primeira rodada: tarefas do plano; depois, só os aspectos ainda pouco cobertos
+        if current_iteration == 0:
+            selected_tasks = plan.get("subagent_tasks", [])
+        else:
+            selected_tasks = lead_researcher.plan_gap_tasks(state["query"], state.get("coverage_gaps", []), current_iteration)
+        
+        if not selected_tasks:
+            print("⏭️ Nenhuma lacuna a preencher nesta iteração")
+            return {
+                "current_iteration": current_iteration + 1,
+                "round_stats": [{"iteration": current_iteration, **measure_round(state["sources"], []), "tokens": 0, "seconds": 0.0}]
+            }
+        
+        # Custo da rodada (tokens pagos e tempo) para a política de parada
+        session = current_session()
+        round_start = time.time()
+        tokens_before = session.get_counters().get("llm_tokens", 0)
+        
+        # Executa subagentes em paralelo com concorrência limitada, sem repetir queries nem URLs
+        exclusions = {
+            "exclude_queries": state.get("issued_queries", []),
+            "exclude_urls": state.get("seen_urls", [])
+        }
+        outcomes, abandoned = self._run_subagents_concurrently(selected_tasks, exclusions)
+        if abandoned:
+            print(f"⏰ Prazo da pesquisa atingido: {abandoned} subagente(s) abandonado(s)")
         
         new_results = []
         new_sources = []
-        
-        # Executa subagentes em paralelo (simulado sequencialmente)
-        for i, task in enumerate(subagent_tasks):
-            if current_iteration == 0 or i % 2 == current_iteration % 2:
-                print(f"   🔍 Executando {task['id']}: {task['task']}")
-                
-                try:
-                    result = run_subagent(
-                        agent_id=task["id"],
-                        task=task["task"],
-                        focus=task.get("focus", "general")
-                    )
-                    
-                    new_results.append(result)
-                    new_sources.extend(result.get("sources", []))
-                    
-                except Exception as e:
-                    print(f"❌ Erro no subagente {task['id']}: {e}")
-                    # Continua com outros subagentes
-                    
-        # Atualiza estado
-        state["subagent_results"].extend(new_results)
-        state["sources"].extend(new_sources)
-        state["current_iteration"] += 1
-        
-        print(f"✅ Iteração concluída: {len(new_results)} novos resultados")
-        
-        return state
+        issued_queries = []
+        seen_urls = []
+        
+        # Mescla na ordem do plano (não na ordem de término) para manter o relatório reprodutível
+        for result in outcomes:
+            if result is None:
+                continue
+            # A iteração compõe a chave do resultado no estado (agent_id + iteration)
+            new_results.append({**result, "iteration": current_iteration})
+            new_sources.extend(result.get("sources", []))
+            issued_queries.extend(result.get("issued_queries", []))
+            seen_urls.extend(result.get("seen_urls", []))
+        
+        round_stats = {
+            "iteration": current_iteration,
+            "subagents": len(new_results),
+            **measure_round(state["sources"], new_sources),
+            "tokens": session.get_counters().get("llm_tokens", 0) - tokens_before,
+            "seconds": time.time() - round_start
+        }
+        print(f"✅ Iteração concluída: {len(new_results)} novos resultados, {round_stats['new_sources']} fontes novas "
+              f"(ganho marginal {marginal_gain(round_stats):.2f})")
+        
+        # Só o delta: os reducers mesclam resultados e fontes por chave
+        delta = {
+            "subagent_results": new_results,
+            "sources": new_sources,
+            "issued_queries": issued_queries,
+            "seen_urls": seen_urls,
+            "current_iteration": current_iteration + 1,
+            "round_stats": [round_stats]
+        }
+        if abandoned or any(result.get("status") == "partial" for result in new_results):
+            delta["partial"] = True
+        return delta
     
-    def evaluate_progress(self, state: ResearchState) -> ResearchState:
+    def _run_subagents_concurrently(self, tasks: List[Dict], exclusions: Optional[Dict[str, List[str]]] = None) -> Tuple[List[Optional[Dict]], int]:
+        """
+        Executa subagentes em um pool de threads, preservando a ordem das tarefas.
+        
+        Com prazo, espera só até o corte da fase de pesquisa: subagentes ainda em
+        andamento são abandonados (None) e os que não começaram, cancelados.
+        Retorna os resultados e quantos subagentes ficaram de fora.
+        """
+        
+        if not tasks:
+            return [], 0
+        
+        session = current_session()
+        run_task = functools.partial(self._run_subagent_task, exclusions=exclusions)
+        max_workers = max(1, min(Config.MAX_CONCURRENT_SUBAGENTS, len(tasks)))
+        
+        if max_workers == 1:
+            outcomes = []
+            for task in tasks:
+                if session.deadline_passed(research=True):
+                    break
+                outcomes.append(run_task(task))
+            abandoned = len(tasks) - len(outcomes)
+            return outcomes + [None] * abandoned, abandoned
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="subagent")
+        try:
+            futures = [executor.submit(run_in_context(run_task), task) for task in tasks]
+            done, not_done = wait(futures, timeout=session.time_left(research=True))
+        finally:
+            # Não espera pelos subagentes abandonados; eles terminam em segundo plano
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        # Resultados na ordem de submissão
+        return [future.result() if future in done else None for future in futures], len(not_done)
+    
+    def _run_subagent_task(self, task: Dict, exclusions: Optional[Dict[str, List[str]]] = None) -> Optional[Dict]:
+        """Executa um subagente isolando falhas (retorna None em caso de erro)"""
+        
+        print(f"   🔍 Executando {task['id']}: {task['task']}")
+        current_session().increment("subagents_started")
+        
+        with span(task["id"], "subagent", task=task["task"], focus=task.get("focus", "general")) as subagent_span:
+            try:
+                result = run_subagent.invoke({
+                    "agent_id": task["id"],
+                    "task": task["task"],
+                    "focus": task.get("focus", "general"),
+                    **(exclusions or {})
+                })
+                subagent_span.set(num_sources=len(result.get("sources", [])))
+                return result
+            except Exception as e:
+                print(f"❌ Erro no subagente {task['id']}: {e}")
+                subagent_span.set(error=str(e))
+                current_session().increment("subagents_failed")
+                # Continua com outros subagentes
+                return None
+    
+    def evaluate_progress(self, state: ResearchState) -> Dict[str, Any]:
         """Nó para avaliação do progresso"""
         
         print("🔍 Avaliando progresso da pesquisa...")
         
         current_results = state["subagent_results"]
-        current_iteration = state["current_iteration"]
-        max_iterations = state["max_iterations"]
         
-        # Critérios para finalizar pesquisa
-        should_continue = (
-            current_iteration < max_iterations and
-            len(current_results) < Config.MAX_SUBAGENTS * 2 and
-            lead_researcher.should_continue_research(current_results)
-        )
+        # Aspectos do plano ainda pouco cobertos pelas fontes reunidas
+        gaps = lead_researcher.find_coverage_gaps(state["research_plan"], state["sources"])
         
-        state["research_complete"] = not should_continue
+        # A política de parada (STOPPING_POLICY) decide se mais uma rodada compensa
+        stop_reason = self.stopping_policy.should_stop(state, gaps)
         
         total_sources = len(state["sources"])
-        print(f"📊 Progresso: {len(current_results)} resultados, {total_sources} fontes")
-        
-        return state
+        print(f"📊 Progresso: {len(current_results)} resultados, {total_sources} fontes, {len(gaps)} aspecto(s) pouco coberto(s)")
+        if stop_reason:
+            print(f"🛑 Encerrando rodadas: {stop_reason}")
+        
+        delta = {"research_complete": stop_reason is not None, "coverage_gaps": gaps, "stop_reason": stop_reason or ""}
+        if stop_reason == DEADLINE_STOP_REASON:
+            # Ainda havia lacunas: o relatório sai com o que chegou até aqui
+            delta["partial"] = True
+        return delta
     
     def should_continue_research(self, state: ResearchState) -> str:
         """Decide se deve continuar pesquisando ou sintetizar"""
@@ -160,18 +318,25 @@ class MultiAgentResearchWorkflow:
         else:
             return "continue"
     
-    def synthesize_results(self, state: ResearchState) -> ResearchState:
+    def synthesize_results(self, state: ResearchState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
         """Nó para síntese dos resultados"""
         
         print("🧠 Sintetizando resultados da pesquisa...")
         
         query = state["query"]
         subagent_results = state["subagent_results"]
+        on_report_chunk = (config or {}).get("configurable", {}).get("on_report_chunk")
         
         try:
-            # Sintetiza resultados
-            final_report = lead_researcher.synthesize_results(query, subagent_results)
-            state["final_report"] = final_report
+            # Sintetiza resultados (em streaming quando há um consumidor de trechos)
+            if on_report_chunk:
+                chunks = []
+                for chunk in lead_researcher.stream_synthesis(query, subagent_results):
+                    chunks.append(chunk)
+                    on_report_chunk(chunk)
+                final_report = "".join(chunks)
+            else:
+                final_report = lead_researcher.synthesize_results(query, subagent_results)
             
             print("✅ Síntese concluída")
             
@@ -181,11 +346,15 @@ class MultiAgentResearchWorkflow:
             fallback_report = f"# Relatório de Pesquisa: {query}\n\n"
             for i, result in enumerate(subagent_results, 1):
                 fallback_report += f"## Resultado {i}\n{result.get('summary', str(result))}\n\n"
-            state["final_report"] = fallback_report
+            final_report = fallback_report
         
-        return state
+        delta = {"final_report": final_report}
+        if current_session().deadline_passed():
+            # A síntese estourou o prazo e caiu no relatório concatenado
+            delta["partial"] = True
+        return delta
     
-    def add_citations(self, state: ResearchState) -> ResearchState:
+    def add_citations(self, state: ResearchState) -> Dict[str, Any]:
         """Nó para adição de citações"""
         
         print("📚 Adicionando citações ao relatório...")
@@ -194,39 +363,32 @@ class MultiAgentResearchWorkflow:
         sources = state["sources"]
         
         try:
-            # Remove duplicatas das fontes
-            unique_sources = []
-            seen_urls = set()
-            
-            for source in sources:
-                url = source.get("url", "")
-                if url not in seen_urls:
-                    unique_sources.append(source)
-                    seen_urls.add(url)
+            # Remove duplicatas das fontes (URL canônica e conteúdo quase idêntico)
+            unique_sources = deduplicate_sources(sources)
             
             # Adiciona citações
             cited_report = citation_agent.process_research_report(final_report, unique_sources)
-            state["cited_report"] = cited_report
             
-            print(f"✅ Citações adicionadas: {len(unique_sources)} fontes")
+            print(f"✅ Citações adicionadas: {len(unique_sources)} fontes ({len(sources) - len(unique_sources)} duplicatas removidas)")
             
         except Exception as e:
             print(f"❌ Erro ao adicionar citações: {e}")
             # Fallback: usa relatório sem citações
-            state["cited_report"] = final_report + "\n\n## Sources\n" + "\n".join(
+            cited_report = final_report + "\n\n## Sources\n" + "\n".join(
                 f"- {source.get('title', 'Untitled')}: {source.get('url', '')}"
                 for source in sources[:10]
             )
         
-        return state
+        return {"cited_report": cited_report}
     
-    def finalize_report(self, state: ResearchState) -> ResearchState:
+    def finalize_report(self, state: ResearchState) -> Dict[str, Any]:
         """Nó para finalização do relatório"""
         
         print("📝 Finalizando relatório...")
         
         # Adiciona metadados ao relatório final
         cited_report = state["cited_report"]
+        partial_notice = "\n- ⚠️ Relatório parcial: o prazo da execução encerrou a pesquisa antes do fim" if state.get("partial") else ""
         
         metadata = f"""
 ---
@@ -234,31 +396,24 @@ class MultiAgentResearchWorkflow:
 - Query: {state['query']}
 - Subagentes executados: {len(state['subagent_results'])}
 - Fontes consultadas: {len(state['sources'])}
-- Iterações: {state['current_iteration']}
+- Iterações: {state['current_iteration']}{partial_notice}
 ---
 
 {cited_report}
         """.strip()
         
-        state["cited_report"] = metadata
-        
         # Persiste resultados na memória
         research_memory.update_context("final_report", metadata)
         research_memory.update_context("research_completed", True)
         
         print("✅ Relatório finalizado!")
         
-        return state
+        return {"cited_report": metadata}
     
-    def run_research(self, query: str) -> Dict[str, Any]:
-        """Executa o workflow completo de pesquisa"""
+    def create_initial_state(self, query: str) -> ResearchState:
+        """Cria o estado inicial do workflow para uma query"""
         
-        print(f"\n🚀 Iniciando pesquisa multi-agente")
-        print(f"Query: {query}")
-        print("=" * 50)
-        
-        # Estado inicial
-        initial_state = {
+        return {
             "query": query,
             "research_plan": {},
             "subagent_results": [],
@@ -268,27 +423,111 @@ class MultiAgentResearchWorkflow:
             "final_report": "",
             "cited_report": "",
             "sources": [],
-            "messages": []
+            "messages": [],
+            "issued_queries": [],
+            "seen_urls": [],
+            "coverage_gaps": [],
+            "round_stats": [],
+            "stop_reason": "",
+            "partial": False
         }
+    
+    def run_research(self, query: str, on_report_chunk: Optional[Callable[[str], None]] = None,
+                     run_id: Optional[str] = None, deadline_s: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Executa o workflow completo de pesquisa (com tracing se TRACING_ENABLED).
+        
+        Cada chamada roda em uma research_session própria (memória e citações
+        isoladas), então várias pesquisas podem rodar em paralelo no mesmo processo.
+        Com CHECKPOINT_ENABLED, o estado é persistido após cada nó e uma nova
+        chamada com o mesmo run_id retoma a partir do último nó concluído.
+        
+        Com deadline_s (ou RUN_DEADLINE_SECONDS), a coleta para em
+        DEADLINE_RESEARCH_SHARE do prazo, subagentes e pesquisas pendentes são
+        abandonados e síntese e citações usam o que já chegou; nesse caso o
+        relatório e metadata["partial"] indicam que o resultado é parcial.
+        """
+        
+        if deadline_s is None and Config.RUN_DEADLINE_SECONDS > 0:
+            deadline_s = Config.RUN_DEADLINE_SECONDS
+        
+        if run_id is None and self.checkpointer is not None:
+            run_id = uuid.uuid4().hex
+        elif run_id is not None and self.checkpointer is None:
+            print("⚠️ run_id ignorado: checkpoints desativados (CHECKPOINT_ENABLED=false)")
+            run_id = None
+        
+        with research_session(run_id, query) as session:
+            if deadline_s is not None:
+                # Todos os nós e threads da execução enxergam o prazo pela sessão
+                session.set_deadline(deadline_s, Config.DEADLINE_RESEARCH_SHARE)
+            with trace_run("research", enabled=Config.TRACING_ENABLED, query=query, run_id=session.run_id) as trace:
+                result = self._execute_research(query, on_report_chunk, run_id)
+            result["metadata"]["counters"] = session.get_counters()
+            if deadline_s is not None:
+                result["metadata"]["deadline_s"] = deadline_s
+        
+        if trace is not None:
+            try:
+                trace_file = trace.export(Config.TRACE_DIR, Config.TRACE_FORMAT)
+                trace.print_summary()
+                print(f"📈 Trace salvo em: {trace_file}")
+                result["metadata"]["trace_file"] = trace_file
+            except Exception as e:
+                print(f"⚠️ Erro ao exportar trace: {e}")
+        
+        return result
+    
+    def _execute_research(self, query: str, on_report_chunk: Optional[Callable[[str], None]] = None,
+                          run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Executa (ou retoma) o grafo e monta o resultado da pesquisa"""
+        
+        print(f"\n🚀 Iniciando pesquisa multi-agente")
+        print(f"Query: {query}")
+        print("=" * 50)
         
         try:
-            # Executa workflow
-            final_state = self.graph.invoke(initial_state)
+            configurable = {}
+            if on_report_chunk:
+                configurable["on_report_chunk"] = on_report_chunk
+            if run_id:
+                configurable["thread_id"] = run_id
+            config = {"configurable": configurable} if configurable else None
+            
+            # Executa workflow (ou retoma do último nó concluído, sem repetir chamadas de LLM e pesquisa)
+            snapshot = self._load_checkpoint(query, config) if run_id else None
+            if snapshot is None:
+                final_state = self.graph.invoke(self.create_initial_state(query), config=config)
+            elif snapshot.next:
+                print(f"♻️ Retomando execução {run_id} em: {', '.join(snapshot.next)}")
+                self._restore_memory(snapshot.values)
+                # Entrada None faz o LangGraph continuar a partir do checkpoint salvo
+                final_state = self.graph.invoke(None, config=config)
+            else:
+                print(f"♻️ Execução {run_id} já concluída; usando o estado salvo")
+                final_state = snapshot.values
             
             print("=" * 50)
             print("✅ Pesquisa concluída com sucesso!")
             
+            metadata = {
+                "iterations": final_state["current_iteration"],
+                "num_sources": len(final_state["sources"]),
+                "num_subagents": len(final_state["subagent_results"]),
+                "stop_reason": final_state.get("stop_reason", ""),
+                "rounds": final_state.get("round_stats", []),
+                "partial": final_state.get("partial", False)
+            }
+            if run_id:
+                metadata["run_id"] = run_id
+            
             return {
                 "success": True,
                 "query": query,
                 "final_report": final_state["cited_report"],
                 "sources": final_state["sources"],
                 "subagent_results": final_state["subagent_results"],
-                "metadata": {
-                    "iterations": final_state["current_iteration"],
-                    "num_sources": len(final_state["sources"]),
-                    "num_subagents": len(final_state["subagent_results"])
-                }
+                "metadata": metadata
             }
             
         except Exception as e:
@@ -300,8 +539,74 @@ class MultiAgentResearchWorkflow:
                 "final_report": f"Erro na pesquisa: {e}",
                 "sources": [],
                 "subagent_results": [],
-                "metadata": {}
+                "metadata": {"run_id": run_id} if run_id else {}
             }
+    
+    def _load_checkpoint(self, query: str, config: RunnableConfig) -> Optional[Any]:
+        """Snapshot salvo da execução (None se não houver checkpoint para esta query)"""
+        
+        # Para um thread desconhecido, get_state devolve os valores padrão dos reducers (nunca vazio)
+        if self.checkpointer.get_tuple(config) is None:
+            return None
+        
+        snapshot = self.graph.get_state(config)
+        
+        if snapshot.values.get("query") != query:
+            # run_id reaproveitado para outra query: descarta os checkpoints antigos
+            run_id = config["configurable"]["thread_id"]
+            print(f"⚠️ run_id {run_id} pertence a outra query; recomeçando")
+            self.checkpointer.delete_thread(run_id)
+            return None
+        
+        return snapshot
+    
+    def _restore_memory(self, state: Dict[str, Any]):
+        """Recarrega na ResearchMemory (que vive só em memória) o que os nós já concluídos tinham gravado"""
+        
+        if state.get("research_plan"):
+            plan_text = json.dumps(state["research_plan"], indent=2, ensure_ascii=False)
+            research_memory.save_research_plan(plan_text, state["query"])
+        
+        for result in state.get("subagent_results", []):
+            research_memory.add_subagent_result(result.get("agent_id", ""), result)
+            research_memory.add_sources(result.get("sources", []))
+    
+    def stream_research(self, query: str, run_id: Optional[str] = None, deadline_s: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Executa o workflow emitindo eventos à medida que o relatório é gerado.
+        
+        Emite {"type": "report_chunk", "content": ...} para cada trecho da síntese
+        e, ao final, {"type": "result", "result": ...} com o relatório citado completo.
+        Uma exceção que escape de run_research é relançada para quem consome os eventos.
+        """
+        events = queue.Queue()
+        
+        def on_report_chunk(chunk: str):
+            events.put({"type": "report_chunk", "content": chunk})
+        
+        def worker():
+            # Sempre termina com um evento final: sem ele o consumidor ficaria preso em events.get()
+            try:
+                result = self.run_research(query, on_report_chunk=on_report_chunk, run_id=run_id, deadline_s=deadline_s)
+            except BaseException as e:
+                events.put({"type": "error", "error": e})
+            else:
+                events.put({"type": "result", "result": result})
+        
+        thread = threading.Thread(target=worker, name="research-stream", daemon=True)
+        thread.start()
+        
+        while True:
+            event = events.get()
+            if event["type"] == "error":
+                thread.join()
+                raise event["error"]
+            
+            yield event
+            if event["type"] == "result":
+                break
+        
+        thread.join()
 
 # Instância global do workflow
 research_workflow = MultiAgentResearchWorkflow()
\ No newline at end of file
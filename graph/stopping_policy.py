@@ -0,0 +1,130 @@
+import time
+from typing import Dict, List, Any, Optional
+from config import Config
+from tools.source_index import SourceIndex
+from utils.helpers import source_key
+from utils.session import current_session
+
+# Motivo de parada quando o prazo da execução encerra a coleta (o relatório sai parcial)
+DEADLINE_STOP_REASON = "prazo da fase de pesquisa atingido"
+
+def _source_terms(source: Dict) -> set:
+    return set(SourceIndex.tokenize(f"{source.get('title', '')} {source.get('content', '')}"))
+
+def measure_round(previous_sources: List[Dict], new_sources: List[Dict]) -> Dict[str, int]:
+    """Novidade de uma rodada: fontes (chave canônica) e termos de conteúdo ainda não vistos"""
+    seen_keys = {source_key(source) for source in previous_sources}
+    seen_terms = set()
+    for source in previous_sources:
+        seen_terms.update(_source_terms(source))
+    
+    novel_keys = set()
+    novel_terms = set()
+    for source in new_sources:
+        key = source_key(source)
+        if key in seen_keys or key in novel_keys:
+            continue
+        novel_keys.add(key)
+        novel_terms.update(_source_terms(source) - seen_terms)
+    
+    return {
+        "new_sources": len(novel_keys),
+        "total_sources": len(seen_keys) + len(novel_keys),
+        "new_terms": len(novel_terms),
+        "total_terms": len(seen_terms) + len(novel_terms)
+    }
+
+def marginal_gain(round_stats: Dict[str, Any]) -> float:
+    """Média entre a fração de fontes novas e a fração de termos novos no total acumulado"""
+    source_gain = round_stats["new_sources"] / round_stats["total_sources"] if round_stats.get("total_sources") else 0.0
+    content_gain = round_stats["new_terms"] / round_stats["total_terms"] if round_stats.get("total_terms") else 0.0
+    return (source_gain + content_gain) / 2
+
+class StoppingPolicy:
+    """
+    Decide quando encerrar as rodadas de subagentes.
+    
+    Novas políticas estendem esta classe e são registradas em STOPPING_POLICIES.
+    A base encerra no limite de iterações, quando não há lacunas a preencher
+    ou quando o prazo da execução encerrou a fase de pesquisa.
+    """
+    
+    def should_stop(self, state: Dict[str, Any], gaps: List[str]) -> Optional[str]:
+        """Motivo para encerrar as rodadas (None para continuar)"""
+        if state["current_iteration"] >= state["max_iterations"]:
+            return "limite de iterações atingido"
+        if not gaps:
+            return "todos os aspectos do plano estão cobertos"
+        if current_session().deadline_passed(research=True):
+            return DEADLINE_STOP_REASON
+        return None
+
+class HeuristicStoppingPolicy(StoppingPolicy):
+    """Limites fixos: número de resultados e rodada sem fontes novas"""
+    
+    def should_stop(self, state: Dict[str, Any], gaps: List[str]) -> Optional[str]:
+        reason = super().should_stop(state, gaps)
+        if reason:
+            return reason
+        
+        if len(state["subagent_results"]) >= Config.MAX_SUBAGENTS * 2:
+            return "limite de resultados atingido"
+        
+        rounds = state.get("round_stats") or []
+        if rounds and rounds[-1]["new_sources"] == 0:
+            return "a última rodada não trouxe fontes novas"
+        return None
+
+class MarginalGainStoppingPolicy(StoppingPolicy):
+    """
+    Encerra quando o ganho marginal da última rodada (fontes e termos novos)
+    fica abaixo de min_gain, ou quando mais uma rodada do mesmo custo
+    estouraria o orçamento de tokens ou de tempo da execução (0 = sem limite).
+    """
+    
+    def __init__(self, min_gain: float = None, token_budget: int = None, time_budget_seconds: float = None):
+        self.min_gain = Config.STOP_MIN_MARGINAL_GAIN if min_gain is None else min_gain
+        self.token_budget = Config.RUN_TOKEN_BUDGET if token_budget is None else token_budget
+        self.time_budget_seconds = Config.RUN_TIME_BUDGET_SECONDS if time_budget_seconds is None else time_budget_seconds
+    
+    def should_stop(self, state: Dict[str, Any], gaps: List[str]) -> Optional[str]:
+        rounds = state.get("round_stats") or []
+        last_round = rounds[-1] if rounds else {}
+        
+        reason = super().should_stop(state, gaps) or self._check_budgets(last_round)
+        if reason:
+            return reason
+        
+        if last_round:
+            gain = marginal_gain(last_round)
+            if gain < self.min_gain:
+                return f"ganho marginal da última rodada ({gain:.2f}) abaixo de {self.min_gain:.2f}"
+        return None
+    
+    def _check_budgets(self, last_round: Dict[str, Any]) -> Optional[str]:
+        """Estima o custo da próxima rodada pelo custo da última"""
+        session = current_session()
+        
+        if self.token_budget > 0:
+            used = session.get_counters().get("llm_tokens", 0)
+            if used + last_round.get("tokens", 0) > self.token_budget:
+                return f"orçamento de tokens ({used}/{self.token_budget})"
+        
+        if self.time_budget_seconds > 0:
+            elapsed = time.time() - session.created_at
+            if elapsed + last_round.get("seconds", 0.0) > self.time_budget_seconds:
+                return f"orçamento de tempo ({elapsed:.0f}s/{self.time_budget_seconds:.0f}s)"
+        
+        return None
+
+STOPPING_POLICIES = {
+    "marginal_gain": MarginalGainStoppingPolicy,
+    "heuristic": HeuristicStoppingPolicy
+}
+
+def create_stopping_policy(name: str = None) -> StoppingPolicy:
+    """Instancia a política configurada (STOPPING_POLICY)"""
+    name = (name or Config.STOPPING_POLICY).lower()
+    if name not in STOPPING_POLICIES:
+        raise ValueError(f"Política de parada desconhecida: {name} (opções: {', '.join(STOPPING_POLICIES)})")
+    return STOPPING_POLICIES[name]()
@@ -12,6 +12,8 @@ from datetime import datetime
 from typing import Dict, List, Any
 import openai
 from dotenv import load_dotenv
+from utils.context_packer import context_packer, compact_json, groups_from_results
+from utils.token_counter import count_tokens
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -202,7 +204,7 @@ class SimpleMultiAgentSystem:
                 print(f"   🔍 Executando {agent_id}: {role}")
                 
                 agent = self.create_agent(agent_id, role)
-                result = agent.execute_task(task, str(self.memory["plan"]))
+                result = agent.execute_task(task, compact_json(self.memory["plan"]))
                 
                 all_results.append(result)
                 all_sources.extend(result.get("sources", []))
@@ -217,16 +219,10 @@ class SimpleMultiAgentSystem:
             # 3. Síntese
             print("\n🧠 Fase 3: Síntese dos Resultados")
             
-            synthesis_context = f"""
-            Query original: {query}
-            
-            Plano de pesquisa: {json.dumps(self.memory['plan'], indent=2)}
-            
-            Resultados dos agentes:
-            """
-            
-            for result in all_results:
-                synthesis_context += f"\n{result['agent_id']}: {json.dumps(result['result'], indent=2)}\n"
+            # Achados ranqueados, deduplicados e limitados ao orçamento de tokens
+            synthesis_header = f"Query original: {query}\n\nPlano de pesquisa: {compact_json(self.memory['plan'])}\n\nResultados dos agentes:\n"
+            packed = context_packer.pack(query, groups_from_results(all_results, label="Agente"), reserved_tokens=count_tokens(synthesis_header))
+            synthesis_context = synthesis_header + packed["text"]
             
             synthesis_task = f"Sintetize todos os resultados em um relatório final sobre: {query}"
             synthesis_agent = self.create_agent("synthesizer", "Sintetizador de Resultados")
@@ -341,9 +337,10 @@ def main():
         print("\n🎯 MENU")
         print("1. 🔍 Executar Pesquisa")
         print("2. 🎮 Demonstração")
-        print("3. 🚪 Sair")
+        print("3. ⚡ Pesquisa com Workflow Completo (streaming)")
+        print("4. 🚪 Sair")
         
-        choice = input("\nEscolha (1-3): ").strip()
+        choice = input("\nEscolha (1-4): ").strip()
         
         if choice == "1":
             query = input("\n📝 Digite sua pesquisa: ").strip()
@@ -377,6 +374,29 @@ def main():
             print(f"📚 Fontes: {result['metadata'].get('num_sources', 0)}")
         
         elif choice == "3":
+            query = input("\n📝 Digite sua pesquisa: ").strip()
+            if query:
+                # Importação tardia: o workflow LangGraph só é carregado quando usado
+                from graph.research_workflow import research_workflow
+                from utils.helpers import write_research_stream
+                
+                save = input("💾 Salvar relatório? (s/N): ").strip().lower()
+                filename = f"research_{int(time.time())}.txt" if save in ['s', 'sim', 'y', 'yes'] else None
+                
+                print("\n" + "="*60)
+                print("📄 RELATÓRIO (em tempo real)")
+                print("="*60)
+                result = write_research_stream(research_workflow.stream_research(query), filename=filename)
+                
+                print("\n" + "="*60)
+                print("📄 RELATÓRIO FINAL COM CITAÇÕES")
+                print("="*60)
+                print(result.get("final_report", ""))
+                
+                if filename:
+                    print(f"✅ Salvo em: {filename}")
+        
+        elif choice == "4":
             print("\n👋 Obrigado por usar o Sistema Multi-Agente!")
             break
         
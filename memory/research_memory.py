@@ -1,13 +1,20 @@
 import json
+import threading
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from langchain_core.tools import tool
 from config import Config
+from utils.helpers import source_key
+from utils.near_duplicates import source_quality
+from utils.token_counter import count_tokens
+from utils.session import SessionLocal
 
 class ResearchMemory:
     """Sistema de memória para pesquisa multi-agente"""
     
     def __init__(self):
+        # Subagentes concorrentes escrevem na mesma memória
+        self._lock = threading.RLock()
         self.memory = {
             "research_plan": None,
             "query": None,
@@ -20,19 +27,33 @@ class ResearchMemory:
                 "last_updated": None
             }
         }
+        
+        # Tamanho (em tokens) de cada entrada, calculado uma única vez na inserção
+        self._token_sizes = {
+            "plan": 0,
+            "subagent_results": [],
+            "sources": [],
+            "context": {}
+        }
+        
+        # Índice de fontes: chave canônica -> posição em memory["sources"]
+        self._source_index = {}
     
     def save_research_plan(self, plan: str, query: str) -> bool:
         """Salva o plano de pesquisa na memória"""
         try:
-            self.memory["research_plan"] = plan
-            self.memory["query"] = query
-            self.memory["metadata"]["created_at"] = datetime.now().isoformat()
-            self.memory["metadata"]["last_updated"] = datetime.now().isoformat()
-            
-            # Estima contagem de tokens (aproximada)
-            self._update_token_count()
-            
-            return True
+            with self._lock:
+                self.memory["research_plan"] = plan
+                self.memory["query"] = query
+                self.memory["metadata"]["created_at"] = datetime.now().isoformat()
+                self.memory["metadata"]["last_updated"] = datetime.now().isoformat()
+                
+                # Substitui o tamanho do plano anterior pelo do novo
+                plan_tokens = self._estimate_tokens(plan) + self._estimate_tokens(query)
+                self._adjust_token_count(plan_tokens - self._token_sizes["plan"])
+                self._token_sizes["plan"] = plan_tokens
+                
+                return True
         except Exception as e:
             print(f"Erro ao salvar plano: {e}")
             return False
@@ -40,17 +61,21 @@ class ResearchMemory:
     def add_subagent_result(self, agent_id: str, result: Dict) -> bool:
         """Adiciona resultado de um subagente"""
         try:
-            result_entry = {
-                "agent_id": agent_id,
-                "result": result,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            self.memory["subagent_results"].append(result_entry)
-            self.memory["metadata"]["last_updated"] = datetime.now().isoformat()
-            self._update_token_count()
-            
-            return True
+            with self._lock:
+                result_entry = {
+                    "agent_id": agent_id,
+                    "result": result,
+                    "timestamp": datetime.now().isoformat()
+                }
+                
+                entry_tokens = self._estimate_tokens(result_entry)
+                
+                self.memory["subagent_results"].append(result_entry)
+                self._token_sizes["subagent_results"].append(entry_tokens)
+                self.memory["metadata"]["last_updated"] = datetime.now().isoformat()
+                self._adjust_token_count(entry_tokens)
+                
+                return True
         except Exception as e:
             print(f"Erro ao adicionar resultado do subagente: {e}")
             return False
@@ -58,12 +83,25 @@ class ResearchMemory:
     def add_sources(self, sources: List[Dict]) -> bool:
         """Adiciona fontes à memória"""
         try:
-            for source in sources:
-                if source not in self.memory["sources"]:
-                    self.memory["sources"].append(source)
-            
-            self._update_token_count()
-            return True
+            with self._lock:
+                for source in sources:
+                    key = source_key(source)
+                    position = self._source_index.get(key)
+                    
+                    if position is None:
+                        source_tokens = self._estimate_tokens(source)
+                        self._source_index[key] = len(self.memory["sources"])
+                        self.memory["sources"].append(source)
+                        self._token_sizes["sources"].append(source_tokens)
+                        self._adjust_token_count(source_tokens)
+                    
+                    elif source_quality(source) > source_quality(self.memory["sources"][position]):
+                        # Duplicata mais relevante substitui a existente (mesmo critério de merge_sources no estado)
+                        source_tokens = self._estimate_tokens(source)
+                        self._adjust_token_count(source_tokens - self._token_sizes["sources"][position])
+                        self.memory["sources"][position] = source
+                        self._token_sizes["sources"][position] = source_tokens
+                return True
         except Exception as e:
             print(f"Erro ao adicionar fontes: {e}")
             return False
@@ -71,11 +109,16 @@ class ResearchMemory:
     def update_context(self, key: str, value: Any) -> bool:
         """Atualiza contexto específico"""
         try:
-            self.memory["context"][key] = value
-            self.memory["metadata"]["last_updated"] = datetime.now().isoformat()
-            self._update_token_count()
-            
-            return True
+            with self._lock:
+                value_tokens = self._estimate_tokens(key) + self._estimate_tokens(value)
+                previous_tokens = self._token_sizes["context"].get(key, 0)
+                
+                self.memory["context"][key] = value
+                self._token_sizes["context"][key] = value_tokens
+                self.memory["metadata"]["last_updated"] = datetime.now().isoformat()
+                self._adjust_token_count(value_tokens - previous_tokens)
+                
+                return True
         except Exception as e:
             print(f"Erro ao atualizar contexto: {e}")
             return False
@@ -121,32 +164,73 @@ class ResearchMemory:
     def clear_old_data(self) -> bool:
         """Remove dados antigos se necessário"""
         try:
-            if self.is_memory_full():
-                # Remove resultados mais antigos de subagentes
-                if len(self.memory["subagent_results"]) > 5:
-                    self.memory["subagent_results"] = self.memory["subagent_results"][-5:]
+            with self._lock:
+                if self.is_memory_full():
+                    # Remove resultados mais antigos de subagentes
+                    if len(self.memory["subagent_results"]) > 5:
+                        evicted = self._token_sizes["subagent_results"][:-5]
+                        self.memory["subagent_results"] = self.memory["subagent_results"][-5:]
+                        self._token_sizes["subagent_results"] = self._token_sizes["subagent_results"][-5:]
+                        self._adjust_token_count(-sum(evicted))
+                    
+                    # Remove fontes duplicadas ou menos relevantes
+                    if len(self.memory["sources"]) > 20:
+                        evicted = self._token_sizes["sources"][:-20]
+                        self.memory["sources"] = self.memory["sources"][-20:]
+                        self._token_sizes["sources"] = self._token_sizes["sources"][-20:]
+                        self._adjust_token_count(-sum(evicted))
+                        self._rebuild_source_index()
+                    
+                    return True
                 
-                # Remove fontes duplicadas ou menos relevantes
-                if len(self.memory["sources"]) > 20:
-                    self.memory["sources"] = self.memory["sources"][-20:]
-                
-                self._update_token_count()
-                return True
-            
-            return False
+                return False
         except Exception as e:
             print(f"Erro ao limpar dados antigos: {e}")
             return False
     
-    def _update_token_count(self):
-        """Atualiza contagem aproximada de tokens"""
+    def has_source(self, source: Dict) -> bool:
+        """Verifica em O(1) se a fonte (ou uma duplicata dela) já está na memória"""
+        return source_key(source) in self._source_index
+    
+    def _rebuild_source_index(self):
+        """Reconstrói o índice de fontes a partir da lista atual"""
+        self._source_index = {
+            source_key(source): position
+            for position, source in enumerate(self.memory.get("sources", []))
+        }
+    
+    def _estimate_tokens(self, value: Any) -> int:
+        """Conta tokens de uma única entrada serializada (contagens memorizadas por conteúdo)"""
+        if value is None:
+            # Plano e query ainda não definidos não ocupam espaço (como no estado inicial)
+            return 0
         try:
-            memory_str = json.dumps(self.memory, ensure_ascii=False)
-            # Estimativa aproximada: 1 token ≈ 4 caracteres
-            self.memory["metadata"]["token_count"] = len(memory_str) // 4
+            return count_tokens(json.dumps(value, ensure_ascii=False))
         except Exception:
-            # Se der erro, define um valor padrão
-            self.memory["metadata"]["token_count"] = 1000
+            return count_tokens(str(value))
+    
+    def _adjust_token_count(self, delta: int):
+        """Aplica a variação de tokens de uma inserção ou remoção"""
+        metadata = self.memory["metadata"]
+        metadata["token_count"] = max(metadata["token_count"] + delta, 0)
+    
+    def _update_token_count(self):
+        """Recalcula todos os tamanhos do zero (usado apenas ao importar memória)"""
+        self._token_sizes = {
+            "plan": self._estimate_tokens(self.memory.get("research_plan")) + self._estimate_tokens(self.memory.get("query")),
+            "subagent_results": [self._estimate_tokens(entry) for entry in self.memory.get("subagent_results", [])],
+            "sources": [self._estimate_tokens(source) for source in self.memory.get("sources", [])],
+            "context": {
+                key: self._estimate_tokens(key) + self._estimate_tokens(value)
+                for key, value in self.memory.get("context", {}).items()
+            }
+        }
+        self.memory["metadata"]["token_count"] = (
+            self._token_sizes["plan"] +
+            sum(self._token_sizes["subagent_results"]) +
+            sum(self._token_sizes["sources"]) +
+            sum(self._token_sizes["context"].values())
+        )
     
     def export_memory(self) -> str:
         """Exporta memória como JSON"""
@@ -159,14 +243,18 @@ class ResearchMemory:
         """Importa memória de JSON"""
         try:
             imported_memory = json.loads(memory_json)
-            self.memory = imported_memory
+            with self._lock:
+                self.memory = imported_memory
+                self.memory.setdefault("metadata", {}).setdefault("token_count", 0)
+                self._update_token_count()
+                self._rebuild_source_index()
             return True
         except Exception as e:
             print(f"Erro ao importar memória: {e}")
             return False
 
-# Instância global da memória
-research_memory = ResearchMemory()
+# Memória da execução atual: cada research_session tem a sua (ver utils.session)
+research_memory = SessionLocal("research_memory", ResearchMemory)
 
 @tool
 def save_plan(plan: str, query: str) -> bool:
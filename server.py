@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Serviço HTTP local para pesquisas multi-agente.
+
+Mantém modelos, clientes e o grafo LangGraph compilado carregados entre
+requisições. As pesquisas entram em uma fila limitada atendida por um número
+fixo de workers; com a fila cheia, novas requisições recebem 429.
+
+Endpoints:
+    POST /research            {"query": "...", "deadline_s": 30} -> 202 {"job_id": ...}
+    GET  /jobs/<id>           status do job (e resultado quando concluído)
+    GET  /jobs/<id>/stream    trechos do relatório via Server-Sent Events
+    GET  /health              estado da fila e dos workers
+"""
+
+import json
+import time
+import uuid
+import queue
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Any, Optional
+
+from config import Config
+
+class ResearchJob:
+    """Job de pesquisa com status, resultado e trechos parciais do relatório"""
+    
+    def __init__(self, query: str, deadline_s: Optional[float] = None):
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.deadline_s = deadline_s
+        self.status = "queued"
+        self.created_at = datetime.now().isoformat()
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.chunks: List[str] = []
+        self._condition = threading.Condition()
+    
+    def add_chunk(self, chunk: str):
+        """Registra um trecho parcial e acorda os consumidores do stream"""
+        with self._condition:
+            self.chunks.append(chunk)
+            self._condition.notify_all()
+    
+    def set_status(self, status: str, result: Dict = None, error: str = None):
+        """Atualiza o status do job e acorda os consumidores do stream"""
+        with self._condition:
+            self.status = status
+            if status == "running":
+                self.started_at = datetime.now().isoformat()
+            if status in ("completed", "failed"):
+                self.finished_at = datetime.now().isoformat()
+                self.result = result
+                self.error = error
+            self._condition.notify_all()
+    
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+    
+    def wait_for_update(self, seen_chunks: int, timeout: float) -> None:
+        """Bloqueia até haver novos trechos, o job terminar ou o timeout expirar"""
+        with self._condition:
+            if len(self.chunks) == seen_chunks and not self.done:
+                self._condition.wait(timeout)
+    
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "query": self.query,
+            "status": self.status,
+            "deadline_s": self.deadline_s,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "num_chunks": len(self.chunks)
+        }
+        if self.error:
+            data["error"] = self.error
+        if include_result and self.result is not None:
+            data["result"] = self.result
+        return data
+
+class ResearchService:
+    """Fila de jobs com workers fixos e controle de admissão"""
+    
+    def __init__(self, workers: int = None, queue_size: int = None, max_jobs_retained: int = None):
+        self.num_workers = max(1, workers or Config.SERVICE_WORKERS)
+        self.queue = queue.Queue(maxsize=max(1, queue_size or Config.SERVICE_QUEUE_SIZE))
+        self.max_jobs_retained = max_jobs_retained or Config.SERVICE_MAX_JOBS_RETAINED
+        
+        self.jobs: "OrderedDict[str, ResearchJob]" = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        
+        # Carrega o workflow (grafo compilado e clientes LLM) uma única vez
+        from graph.research_workflow import research_workflow
+        self.workflow = research_workflow
+    
+    def start(self):
+        """Inicia os workers"""
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"research-worker-{i + 1}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+    
+    def submit(self, query: str, deadline_s: Optional[float] = None) -> Optional[ResearchJob]:
+        """Enfileira uma pesquisa; retorna None se a fila estiver cheia"""
+        job = ResearchJob(query, deadline_s)
+        
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            return None
+        
+        with self._jobs_lock:
+            self.jobs[job.id] = job
+            self._prune_jobs()
+        
+        return job
+    
+    def get_job(self, job_id: str) -> Optional[ResearchJob]:
+        with self._jobs_lock:
+            return self.jobs.get(job_id)
+    
+    def get_health(self) -> Dict[str, Any]:
+        with self._jobs_lock:
+            running = sum(1 for job in self.jobs.values() if job.status == "running")
+        
+        # Fila e espera no governor de taxa (LLM e pesquisa)
+        from utils.rate_limiter import get_rate_limiter
+        from utils.token_counter import token_counter
+        rate_limiter = get_rate_limiter()
+        
+        return {
+            "status": "ok",
+            "workers": self.num_workers,
+            "running": running,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "jobs_retained": len(self.jobs),
+            "rate_limits": rate_limiter.get_stats() if rate_limiter is not None else {"enabled": False},
+            # Contagem aproximada (sem arquivo BPE) afeta orçamentos de contexto
+            "tokenizer": token_counter.get_stats()
+        }
+    
+    def _worker_loop(self):
+        """Consome jobs da fila indefinidamente"""
+        while True:
+            job = self.queue.get()
+            try:
+                self._run_job(job)
+            finally:
+                self.queue.task_done()
+    
+    def _run_job(self, job: ResearchJob):
+        """Executa um job isolando falhas"""
+        # O tempo na fila conta para o prazo do job
+        deadline_s = None
+        if job.deadline_s is not None:
+            deadline_s = job.deadline_s - (time.monotonic() - job.enqueued_at)
+            if deadline_s <= 0:
+                # Prazo gasto na fila: falha na hora em vez de rodar (e chamar o LLM) sem tempo algum
+                job.set_status("failed", error=f"Prazo de {job.deadline_s:g}s esgotado na fila")
+                return
+        
+        job.set_status("running")
+        
+        try:
+            result = self.workflow.run_research(job.query, on_report_chunk=job.add_chunk, deadline_s=deadline_s)
+            status = "completed" if result.get("success") else "failed"
+            job.set_status(status, result=result, error=result.get("error"))
+        except Exception as e:
+            job.set_status("failed", error=str(e))
+    
+    def _prune_jobs(self):
+        """Descarta os jobs concluídos mais antigos acima do limite de retenção"""
+        excess = len(self.jobs) - self.max_jobs_retained
+        if excess <= 0:
+            return
+        
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.done][:excess]:
+            del self.jobs[job_id]
+
+class ResearchRequestHandler(BaseHTTPRequestHandler):
+    """Handler HTTP do serviço de pesquisa"""
+    
+    service: ResearchService = None
+    
+    def do_POST(self):
+        if self.path.rstrip("/") != "/research":
+            return self._send_json(404, {"error": "Endpoint não encontrado"})
+        
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            query = str(body.get("query", "")).strip()
+            deadline_s = body.get("deadline_s")
+            deadline_s = float(deadline_s) if deadline_s is not None else None
+        except (ValueError, TypeError, AttributeError):
+            return self._send_json(400, {"error": "JSON inválido"})
+        
+        if not query:
+            return self._send_json(400, {"error": "Campo 'query' é obrigatório"})
+        if deadline_s is not None and deadline_s <= 0:
+            return self._send_json(400, {"error": "Campo 'deadline_s' deve ser positivo"})
+        
+        job = self.service.submit(query, deadline_s)
+        if job is None:
+            return self._send_json(429, {"error": "Fila cheia, tente novamente mais tarde"}, {"Retry-After": "5"})
+        
+        return self._send_json(202, job.to_dict(include_result=False), {"Location": f"/jobs/{job.id}"})
+    
+    def do_GET(self):
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        
+        if parts == ["health"]:
+            return self._send_json(200, self.service.get_health())
+        
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.service.get_job(parts[1])
+            if job is None:
+                return self._send_json(404, {"error": "Job não encontrado"})
+            
+            if len(parts) == 2:
+                return self._send_json(200, job.to_dict())
+            if parts[2] == "stream":
+                return self._stream_job(job)
+        
+        return self._send_json(404, {"error": "Endpoint não encontrado"})
+    
+    def _stream_job(self, job: ResearchJob):
+        """Envia os trechos do relatório como Server-Sent Events até o job terminar"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        
+        sent = 0
+        try:
+            while True:
+                job.wait_for_update(sent, timeout=Config.SERVICE_STREAM_HEARTBEAT_SECONDS)
+                done = job.done
+                chunks = job.chunks[sent:]
+                
+                for chunk in chunks:
+                    self._write_event("chunk", {"content": chunk})
+                sent += len(chunks)
+                
+                if done and sent == len(job.chunks):
+                    self._write_event("result", job.to_dict())
+                    break
+                
+                if not chunks:
+                    # Heartbeat mantém a conexão viva enquanto o job está na fila
+                    self.wfile.write(b": heartbeat\n\n")
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def _write_event(self, event: str, data: Dict[str, Any]):
+        payload = json.dumps(data, ensure_ascii=False)
+        self.wfile.write(f"event: {event}\ndata: {payload}\n\n".encode("utf-8"))
+        self.wfile.flush()
+    
+    def _send_json(self, status: int, data: Dict[str, Any], headers: Dict[str, str] = None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        print(f"[{time.strftime('%H:%M:%S')}] 🌐 {self.address_string()} {format % args}")
+
+def create_server(host: str = None, port: int = None, workers: int = None, queue_size: int = None) -> ThreadingHTTPServer:
+    """Cria o servidor HTTP com o serviço de pesquisa já aquecido"""
+    service = ResearchService(workers=workers, queue_size=queue_size)
+    service.start()
+    
+    handler = type("BoundResearchRequestHandler", (ResearchRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host or Config.SERVICE_HOST, port or Config.SERVICE_PORT), handler)
+    server.daemon_threads = True
+    return server
+
+def main(argv: Optional[List[str]] = None):
+    """Ponto de entrada da linha de comando"""
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de pesquisa multi-agente")
+    parser.add_argument("--host", default=None, help="Endereço de escuta")
+    parser.add_argument("--port", type=int, default=None, help="Porta de escuta")
+    parser.add_argument("--workers", type=int, default=None, help="Número de pesquisas simultâneas")
+    parser.add_argument("--queue-size", type=int, default=None, help="Capacidade da fila de jobs")
+    args = parser.parse_args(argv)
+    
+    Config.validate()
+    
+    server = create_server(args.host, args.port, args.workers, args.queue_size)
+    host, port = server.server_address[:2]
+    print(f"🚀 Serviço de pesquisa em http://{host}:{port}")
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Encerrando serviço...")
+    finally:
+        server.server_close()
+    
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,56 @@
+import os
+import sys
+import argparse
+import importlib
+import pytest
+
+# Os módulos do projeto criam clientes ChatOpenAI na importação (sem chamadas de rede)
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+# Caches persistentes desligados: os testes que precisam deles usam tmp_path
+os.environ["SEARCH_CACHE_ENABLED"] = "false"
+os.environ["LLM_CACHE_BACKEND"] = "none"
+os.environ["CHECKPOINT_ENABLED"] = "false"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+@pytest.fixture(autouse=True)
+def isolated_paths(monkeypatch, tmp_path):
+    """Nenhum teste grava em .cache/ ou traces/ do repositório"""
+    monkeypatch.setattr(Config, "SEARCH_CACHE_PATH", str(tmp_path / "search_cache.sqlite3"))
+    monkeypatch.setattr(Config, "LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite3"))
+    monkeypatch.setattr(Config, "CHECKPOINT_PATH", str(tmp_path / "checkpoints.sqlite3"))
+    monkeypatch.setattr(Config, "TRACE_DIR", str(tmp_path / "traces"))
+
+@pytest.fixture
+def fake_workflow(monkeypatch):
+    """Workflow completo com LLM e pesquisa simulados (fakes do benchmark, sem latência)"""
+    from benchmarks import bench_workflow
+    from utils.llm_cache import get_llm_cache, set_llm_cache
+    from utils.rate_limiter import get_rate_limiter, set_rate_limiter
+    
+    lead_module = importlib.import_module("agents.lead_researcher")
+    citation_module = importlib.import_module("agents.citation_agent")
+    web_search_module = importlib.import_module("tools.web_search")
+    llm_clients_module = importlib.import_module("utils.llm_clients")
+    
+    # Registra os valores originais para o monkeypatch restaurá-los depois de install_fakes
+    for target, name in ((Config, "OPENAI_API_KEY"), (Config, "SEARCH_CACHE_ENABLED"),
+                         (lead_module.lead_researcher, "llm"), (citation_module.citation_agent, "llm"),
+                         (llm_clients_module, "ChatOpenAI"), (web_search_module, "web_search_tool")):
+        monkeypatch.setattr(target, name, getattr(target, name))
+    
+    llm_cache, rate_limiter = get_llm_cache(), get_rate_limiter()
+    fakes = bench_workflow.install_fakes(argparse.Namespace(
+        llm_latency="fixed:0", search_latency="fixed:0", seed=1, report_chars=2000,
+        summary_chars=600, subagents=2, results_per_query=3, result_chars=400
+    ))
+    
+    from graph.research_workflow import MultiAgentResearchWorkflow
+    yield MultiAgentResearchWorkflow, lead_module.lead_researcher, fakes["search_tool"]
+    
+    set_llm_cache(llm_cache)
+    set_rate_limiter(rate_limiter)
+    llm_clients_module.reset_chat_models()
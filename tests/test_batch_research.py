@@ -0,0 +1,83 @@
+import json
+import pytest
+import batch_research
+from batch_research import BatchResearchRunner, make_query_id
+
+@pytest.fixture
+def fake_research(monkeypatch):
+    """Substitui o workflow: registra as queries executadas e falha nas que contêm "falha\""""
+    from graph.research_workflow import research_workflow
+    calls = []
+    
+    def run_research(query, run_id=None):
+        calls.append(query)
+        if "falha" in query:
+            return {"success": False, "error": "erro simulado"}
+        return {"success": True, "final_report": f"relatório: {query}", "sources": [], "metadata": {}}
+    
+    monkeypatch.setattr(research_workflow, "run_research", run_research)
+    return calls
+
+def write_lines(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+def read_records(path):
+    records = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records
+
+def test_text_ids_do_not_depend_on_line_position(tmp_path):
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    write_lines(first, ["energia solar", "energia eólica"])
+    write_lines(second, ["# comentário", "nova query", "Energia  Eólica", "energia solar"])
+    
+    ids_first = {item["query"].lower(): item["id"] for item in BatchResearchRunner(str(first), "").load_queries()}
+    ids_second = {" ".join(item["query"].lower().split()): item["id"] for item in BatchResearchRunner(str(second), "").load_queries()}
+    
+    assert ids_first["energia solar"] == ids_second["energia solar"] == make_query_id("energia solar")
+    assert ids_first["energia eólica"] == ids_second["energia eólica"]
+
+def test_duplicate_queries_are_skipped_and_conflicting_ids_rejected(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    write_lines(path, ["energia solar", "ENERGIA SOLAR", json.dumps({"id": "x", "query": "a"}), json.dumps({"id": "x", "query": "a"})])
+    assert [item["query"] for item in BatchResearchRunner(str(path), "").load_queries()] == ["energia solar", "a"]
+    
+    write_lines(path, [json.dumps({"id": "x", "query": "a"}), json.dumps({"id": "x", "query": "b"})])
+    with pytest.raises(ValueError):
+        BatchResearchRunner(str(path), "").load_queries()
+
+def test_resume_skips_completed_queries_after_edits(tmp_path, fake_research):
+    queries = tmp_path / "queries.txt"
+    output = tmp_path / "out.jsonl"
+    write_lines(queries, ["energia solar", "energia eólica", "query com falha"])
+    
+    summary = BatchResearchRunner(str(queries), str(output), parallelism=1).run()
+    assert (summary["succeeded"], summary["failed"]) == (2, 1)
+    
+    # Linha nova no início e um registro truncado por uma interrupção
+    write_lines(queries, ["hidrogênio verde", "energia solar", "energia eólica", "query com falha"])
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"id": "trunc')
+    fake_research.clear()
+    
+    summary = BatchResearchRunner(str(queries), str(output), parallelism=1).run()
+    assert fake_research == ["hidrogênio verde"]
+    assert summary["skipped"] == 3
+    
+    fake_research.clear()
+    BatchResearchRunner(str(queries), str(output), parallelism=1, retry_failed=True).run()
+    assert fake_research == ["query com falha"]
+    
+    records = read_records(output)
+    assert {record["id"] for record in records} == {make_query_id(query) for query in ["hidrogênio verde", "energia solar", "energia eólica", "query com falha"]}
+
+def test_main_rejects_conflicting_ids(tmp_path, capsys):
+    path = tmp_path / "queries.jsonl"
+    write_lines(path, [json.dumps({"id": "x", "query": "a"}), json.dumps({"id": "x", "query": "b"})])
+    assert batch_research.main([str(path), "-o", str(tmp_path / "out.jsonl")]) == 2
+    assert not (tmp_path / "out.jsonl").exists()
@@ -0,0 +1,34 @@
+from collections import defaultdict
+from benchmarks.bench_workflow import run_once
+from utils.session import current_session
+
+class RecordingWorkflow:
+    """Workflow falso: o grafo só registra a sessão ativa em cada nó"""
+    
+    def __init__(self):
+        self.sessions = []
+        self.graph = self
+    
+    def create_initial_state(self, query):
+        return {"query": query}
+    
+    def stream(self, state, stream_mode):
+        for node in ("plan_research", "finalize_report"):
+            self.sessions.append(current_session())
+            yield {node: {}}
+
+def test_run_once_uses_a_fresh_session_per_run():
+    workflow = RecordingWorkflow()
+    timings = defaultdict(list)
+    outside = current_session()
+    
+    run_once(workflow, "primeira", timings)
+    run_once(workflow, "segunda", timings)
+    
+    # Os nós de uma rodada compartilham a sessão; rodadas diferentes não
+    assert workflow.sessions[0] is workflow.sessions[1]
+    assert workflow.sessions[0] is not workflow.sessions[2]
+    assert outside not in workflow.sessions
+    assert workflow.sessions[0].query == "primeira"
+    assert current_session() is outside
+    assert len(timings["plan_research"]) == 2
@@ -0,0 +1,79 @@
+import operator
+from typing import Annotated, List, TypedDict
+import pytest
+from langgraph.graph import StateGraph, END
+from config import Config
+from graph.checkpoint_store import SQLiteCheckpointStore, APPEND, SAME
+
+class CounterState(TypedDict):
+    items: Annotated[List[int], operator.add]
+    label: str
+
+def build_graph(store: SQLiteCheckpointStore):
+    graph = StateGraph(CounterState)
+    graph.add_node("first", lambda state: {"items": [1, 2]})
+    graph.add_node("second", lambda state: {"items": [3]})
+    graph.set_entry_point("first")
+    graph.add_edge("first", "second")
+    graph.add_edge("second", END)
+    return graph.compile(checkpointer=store)
+
+def test_checkpoints_round_trip_in_new_store(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    config = {"configurable": {"thread_id": "run-1"}}
+    
+    store = SQLiteCheckpointStore(path)
+    build_graph(store).invoke({"items": [0], "label": "x"}, config)
+    
+    # Outro processo: o estado é reconstruído só a partir do banco
+    reopened = SQLiteCheckpointStore(path)
+    state = build_graph(reopened).get_state(config)
+    assert state.values == {"items": [0, 1, 2, 3], "label": "x"}
+    assert not state.next
+    
+    history = list(reopened.list(config))
+    assert len(history) == len(list(store.list(config)))
+    assert reopened.get_tuple({"configurable": {"thread_id": "unknown"}}) is None
+
+def test_list_channels_are_stored_incrementally(tmp_path):
+    store = SQLiteCheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    build_graph(store).invoke({"items": [0], "label": "x"}, {"configurable": {"thread_id": "run-1"}})
+    
+    kinds = {kind for (kind,) in store._conn.execute("SELECT kind FROM channel_values WHERE channel = 'items'")}
+    assert APPEND in kinds or SAME in kinds
+    assert store._conn.execute("SELECT COUNT(*) FROM pending_writes").fetchone() == (0,)
+
+def test_delete_thread(tmp_path):
+    store = SQLiteCheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    config = {"configurable": {"thread_id": "run-1"}}
+    build_graph(store).invoke({"items": [], "label": "x"}, config)
+    
+    store.delete_thread("run-1")
+    assert store.get_tuple(config) is None
+    assert store.get_stats("run-1")["checkpoints"] == 0
+
+def test_workflow_resumes_from_checkpoint(fake_workflow, monkeypatch):
+    workflow_class, lead_researcher, search_tool = fake_workflow
+    monkeypatch.setattr(Config, "CHECKPOINT_ENABLED", True)
+    synthesize = lead_researcher.synthesize_results
+    
+    def crash(*args, **kwargs):
+        raise KeyboardInterrupt("falha simulada")
+    
+    monkeypatch.setattr(lead_researcher, "synthesize_results", crash)
+    with pytest.raises(KeyboardInterrupt):
+        workflow_class().run_research("energia renovável", run_id="run-1")
+    searches = search_tool.calls
+    assert searches > 0
+    
+    # A retomada não repete as pesquisas já salvas no checkpoint
+    monkeypatch.setattr(lead_researcher, "synthesize_results", synthesize)
+    result = workflow_class().run_research("energia renovável", run_id="run-1")
+    assert result["success"]
+    assert result["final_report"]
+    assert search_tool.calls == searches
+    
+    # Execução concluída: chamar de novo devolve o mesmo relatório
+    again = workflow_class().run_research("energia renovável", run_id="run-1")
+    assert again["final_report"] == result["final_report"]
+    assert search_tool.calls == searches
@@ -0,0 +1,21 @@
+from agents.citation_agent import CitationAgent
+
+def locate(text, mappings):
+    return CitationAgent()._locate_statements(text, mappings)
+
+def test_locate_statements_cites_first_occurrence_once():
+    text = "Solar grows. Wind grows. Solar grows."
+    assert locate(text, {"Solar grows.": 1, "Wind grows.": 2}) == [(0, 12, 1), (13, 24, 2)]
+
+def test_locate_statements_prefers_longest_statement():
+    text = "Wind power is cheap today."
+    assert locate(text, {"Wind power": 1, "Wind power is cheap": 2}) == [(0, 19, 2)]
+
+def test_locate_statements_ignores_missing_and_empty():
+    assert locate("abc", {"": 1, "xyz": 2}) == []
+    assert locate("abc", {}) == []
+
+def test_add_inline_citations_inserts_markers_after_statements():
+    text = "Solar grows. Wind grows. Solar grows."
+    cited = CitationAgent()._add_inline_citations(text, {"Solar grows.": 1, "Wind grows.": 2})
+    assert cited == "Solar grows. [1] Wind grows. [2] Solar grows."
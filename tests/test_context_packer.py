@@ -0,0 +1,90 @@
+import pytest
+from utils import token_counter as token_counter_module
+from utils.context_packer import ContextPacker, extract_snippets, groups_from_results, split_snippets
+from utils.token_counter import TokenCounter, count_tokens
+
+@pytest.fixture(autouse=True)
+def heuristic_tokens(monkeypatch):
+    """Contagens determinísticas (1 token ≈ 4 caracteres), com ou sem arquivo BPE local"""
+    monkeypatch.setattr(token_counter_module, "token_counter", TokenCounter(backend="heuristic"))
+
+def filler(topic: str, words: int = 30) -> str:
+    return " ".join(f"{topic}{i}" for i in range(words))
+
+def test_output_fits_budget_and_prefers_relevant_snippets():
+    groups = [
+        ("Agente 1", ["baterias de estado sólido aumentam a densidade de energia", filler("ruido")]),
+        ("Agente 2", [filler("outro"), "custo de baterias de estado sólido ainda é alto"])
+    ]
+    packer = ContextPacker(max_tokens=60, max_snippet_tokens=100, dedup_threshold=1.0)
+    
+    packed = packer.pack("baterias de estado sólido", groups)
+    
+    assert packed["tokens"] <= 60
+    assert "densidade de energia" in packed["text"]
+    assert "custo de baterias" in packed["text"]
+    assert "ruido0" not in packed["text"]
+    assert packed["snippets_used"] == 2
+    assert packed["snippets_total"] == 4
+
+def test_reserved_tokens_shrink_the_budget():
+    # Cada trecho custa ~18 tokens: cabe um em 30, nenhum em 30 - 15
+    groups = [("A", [filler("texto", 10), filler("mais", 10)])]
+    packer = ContextPacker(max_tokens=30, max_snippet_tokens=100, dedup_threshold=1.0)
+    
+    assert packer.pack("texto", groups)["snippets_used"] == 1
+    assert packer.pack("texto", groups, reserved_tokens=15)["snippets_used"] == 0
+
+def test_each_agent_gets_its_best_snippet_before_global_ranking():
+    groups = [
+        ("Agente 1", ["fusão nuclear avança", "fusão nuclear tokamak recorde", "fusão nuclear investimento"]),
+        ("Agente 2", ["energia solar barata"])
+    ]
+    packer = ContextPacker(max_tokens=30, max_snippet_tokens=100, dedup_threshold=1.0)
+    
+    packed = packer.pack("fusão nuclear", groups)
+    
+    assert "energia solar barata" in packed["text"]
+    assert packed["text"].index("Agente 1:") < packed["text"].index("Agente 2:")
+
+def test_long_snippets_are_capped():
+    packer = ContextPacker(max_tokens=1000, max_snippet_tokens=10, dedup_threshold=1.0)
+    
+    packed = packer.pack("palavra", [("", ["palavra " * 100])])
+    snippet = packed["text"].removeprefix("- ")
+    
+    assert snippet.endswith("...")
+    assert count_tokens(snippet) <= 10
+
+def test_exact_and_near_duplicates_are_dropped_across_agents():
+    text = "o modelo atinge 90% de acurácia no benchmark público"
+    groups = [
+        ("Agente 1", [text]),
+        ("Agente 2", [text.upper(), "o modelo atinge 90% de acurácia no benchmark público novo"])
+    ]
+    packer = ContextPacker(max_tokens=1000, max_snippet_tokens=100, dedup_threshold=0.8)
+    
+    packed = packer.pack("acurácia", groups)
+    
+    assert packed["duplicates"] == 2
+    assert packed["snippets_used"] == 1
+    assert "Agente 2" not in packed["text"]
+
+def test_threshold_one_keeps_near_duplicates():
+    groups = [("A", ["o modelo atinge 90% de acurácia", "o modelo atinge 90% de acurácia hoje"])]
+    packer = ContextPacker(max_tokens=1000, max_snippet_tokens=100, dedup_threshold=1.0)
+    
+    assert packer.pack("modelo", groups)["duplicates"] == 0
+
+def test_snippet_extraction_from_agent_results():
+    assert split_snippets("Primeiro.\n\n- item um\n- item dois") == ["Primeiro.", "item um", "item dois"]
+    
+    result = {"task": "pesquisar", "result": {"summary": "Resumo curto.", "raw_results": ["enorme"]}}
+    assert extract_snippets(result) == ["Resumo curto."]
+    
+    # Sem resumo: JSON compacto sem campos volumosos
+    fallback = extract_snippets({"status": "ok", "sources": ["x"]})
+    assert fallback == ['{"status":"ok"}']
+    
+    groups = groups_from_results([result], label="Agente")
+    assert groups == [("Agente 1 (pesquisar)", ["Resumo curto."])]
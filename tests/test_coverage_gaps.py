@@ -0,0 +1,112 @@
+import pytest
+from config import Config
+from agents.lead_researcher import lead_researcher
+from agents.search_subagent import SearchSubagent
+from graph.research_workflow import MultiAgentResearchWorkflow
+
+def source(url: str, content: str) -> dict:
+    return {"url": url, "title": "", "content": content, "relevance_score": 0.5}
+
+PLAN = {"research_aspects": ["custo das baterias", "reciclagem de lítio", "de a"]}
+
+@pytest.fixture
+def coverage(monkeypatch):
+    monkeypatch.setattr(Config, "COVERAGE_MIN_SOURCES", 2)
+    monkeypatch.setattr(Config, "COVERAGE_TERM_OVERLAP", 0.5)
+
+def test_aspects_need_enough_sources_with_their_terms(coverage):
+    sources = [
+        source("https://a.com", "o custo das baterias caiu em 2023"),
+        source("https://b.com", "baterias com custo menor"),
+        source("https://c.com", "reciclagem de lítio ainda é rara")
+    ]
+    
+    # "de a" só tem palavras curtas e não conta como aspecto
+    assert lead_researcher.find_coverage_gaps(PLAN, sources) == ["reciclagem de lítio"]
+    assert lead_researcher.find_coverage_gaps(PLAN, sources + [source("https://d.com", "lítio: reciclagem industrial")]) == []
+
+def test_plan_without_aspects_has_no_gaps(coverage):
+    assert lead_researcher.find_coverage_gaps({}, []) == []
+    assert lead_researcher.find_coverage_gaps(PLAN, []) == ["custo das baterias", "reciclagem de lítio"]
+
+def test_gap_tasks_are_capped_and_focused(monkeypatch):
+    monkeypatch.setattr(Config, "MAX_SUBAGENTS", 2)
+    
+    tasks = lead_researcher.plan_gap_tasks("baterias", ["custo", "reciclagem", "segurança"], iteration=1)
+    
+    assert tasks == [
+        {"id": "gap_1_1", "task": "baterias: custo", "focus": "custo"},
+        {"id": "gap_1_2", "task": "baterias: reciclagem", "focus": "reciclagem"}
+    ]
+
+@pytest.fixture
+def workflow(monkeypatch):
+    """Workflow com a execução dos subagentes substituída por um registro das tarefas"""
+    workflow = MultiAgentResearchWorkflow()
+    workflow.runs = []
+    
+    def run_subagents(tasks, exclusions=None):
+        workflow.runs.append((tasks, exclusions))
+        outcomes = [{
+            "agent_id": task["id"],
+            "sources": [source(f"https://novo.com/{task['id']}", task["focus"])],
+            "issued_queries": [task["task"]],
+            "seen_urls": [f"https://novo.com/{task['id']}"],
+            "status": "completed"
+        } for task in tasks]
+        return outcomes, 0
+    
+    monkeypatch.setattr(workflow, "_run_subagents_concurrently", run_subagents)
+    return workflow
+
+def later_round(workflow, gaps):
+    state = workflow.create_initial_state("baterias")
+    state.update({
+        "current_iteration": 1,
+        "coverage_gaps": gaps,
+        "issued_queries": ["baterias"],
+        "seen_urls": ["https://a.com/"]
+    })
+    return state
+
+def test_later_rounds_run_only_gap_tasks_with_previous_work_excluded(workflow):
+    delta = workflow.execute_subagents(later_round(workflow, ["reciclagem de lítio"]))
+    
+    tasks, exclusions = workflow.runs[0]
+    assert [task["focus"] for task in tasks] == ["reciclagem de lítio"]
+    assert exclusions == {"exclude_queries": ["baterias"], "exclude_urls": ["https://a.com/"]}
+    assert delta["issued_queries"] == ["baterias: reciclagem de lítio"]
+    assert delta["current_iteration"] == 2
+    assert delta["round_stats"][0]["new_sources"] == 1
+
+def test_round_without_gaps_starts_no_subagent(workflow):
+    delta = workflow.execute_subagents(later_round(workflow, []))
+    
+    assert workflow.runs == []
+    assert delta["current_iteration"] == 2
+    assert delta["round_stats"][0]["new_sources"] == 0
+
+class RecordingLLM:
+    def __init__(self):
+        self.calls = 0
+    
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        raise AssertionError("nenhuma chamada de LLM esperada")
+
+def test_subagent_drops_seen_urls_and_skips_summary_when_nothing_is_new(monkeypatch):
+    subagent = SearchSubagent("gap_1_1", "baterias: custo", "custo",
+                              exclude_queries=["baterias"], exclude_urls=["https://a.com/"])
+    subagent.llm = RecordingLLM()
+    searched = []
+    
+    monkeypatch.setattr(subagent, "_plan_search_strategy", lambda: {"queries": ["Baterias", "custo de baterias"]})
+    monkeypatch.setattr(subagent, "_perform_search", lambda query: searched.append(query) or [source("https://www.a.com", "custo")])
+    
+    result = subagent.execute_search()
+    
+    assert searched == ["custo de baterias"]
+    assert result["issued_queries"] == ["custo de baterias"]
+    assert result["seen_urls"] == ["https://a.com/"]
+    assert result["sources"] == []
+    assert subagent.llm.calls == 0
@@ -0,0 +1,73 @@
+import time
+import pytest
+from config import Config
+from benchmarks.fakes import LatencyDistribution
+from graph.stopping_policy import DEADLINE_STOP_REASON, MarginalGainStoppingPolicy
+from utils.llm_cache import _request_options, invoke_llm
+from utils.session import DeadlineExceeded, current_session, research_session
+
+def test_session_deadline_and_research_cut():
+    with research_session() as session:
+        assert session.time_left() is None
+        assert not session.deadline_passed()
+        
+        session.set_deadline(10.0, research_share=0.5)
+        assert 9 < session.time_left() <= 10
+        assert 4 < session.time_left(research=True) <= 5
+        
+        session.set_deadline(0.0)
+        assert session.deadline_passed()
+        assert session.deadline_passed(research=True)
+    
+    # A sessão padrão não herda o prazo
+    assert current_session().time_left() is None
+
+def test_request_timeout_is_capped_by_the_deadline():
+    with research_session() as session:
+        assert _request_options() == {}
+        
+        session.set_deadline(5.0)
+        assert 4 < _request_options()["timeout"] <= 5
+        
+        session.set_deadline(0.0)
+        with pytest.raises(DeadlineExceeded):
+            _request_options()
+
+class NeverCalledLLM:
+    model_name = "fake"
+    temperature = 0.0
+    
+    def invoke(self, messages, **kwargs):
+        raise AssertionError("o LLM não deveria ser chamado depois do prazo")
+
+def test_llm_is_not_called_after_the_deadline():
+    with research_session() as session:
+        session.set_deadline(0.0)
+        with pytest.raises(DeadlineExceeded):
+            invoke_llm(NeverCalledLLM(), [], call_site="teste", use_cache=False)
+
+def test_deadline_stops_research():
+    policy = MarginalGainStoppingPolicy(min_gain=0.0, token_budget=0, time_budget_seconds=0)
+    state = {"current_iteration": 1, "max_iterations": 3, "subagent_results": [], "round_stats": []}
+    
+    with research_session() as session:
+        assert policy.should_stop(state, ["gap"]) is None
+        session.set_deadline(0.0)
+        time.sleep(0.01)
+        assert policy.should_stop(state, ["gap"]) == DEADLINE_STOP_REASON
+
+def test_slow_searches_yield_a_partial_report_on_time(fake_workflow, monkeypatch):
+    workflow_class, _, search_tool = fake_workflow
+    monkeypatch.setattr(Config, "DEADLINE_RESEARCH_SHARE", 0.5)
+    monkeypatch.setattr(search_tool, "latency", LatencyDistribution("fixed:1.0"))
+    
+    start = time.monotonic()
+    result = workflow_class().run_research("energia renovável", deadline_s=0.6)
+    elapsed = time.monotonic() - start
+    
+    assert result["success"]
+    assert result["final_report"]
+    assert result["metadata"]["partial"] is True
+    assert result["metadata"]["deadline_s"] == 0.6
+    # Sem esperar pelas pesquisas de 1 s que ficaram pendentes
+    assert elapsed < 1.0
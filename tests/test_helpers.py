@@ -0,0 +1,17 @@
+from utils.helpers import canonicalize_url, source_key
+
+def test_canonicalize_url_normalizes_equivalent_urls():
+    assert canonicalize_url("HTTPS://WWW.Example.com:443/a/b/?utm_source=x&b=2&a=1#frag") == "https://example.com/a/b?a=1&b=2"
+    assert canonicalize_url("https://example.com") == "https://example.com/"
+    assert canonicalize_url("https://example.com/?fbclid=abc") == "https://example.com/"
+
+def test_canonicalize_url_keeps_meaningful_parts():
+    assert canonicalize_url("http://example.com:8080/") == "http://example.com:8080/"
+    assert canonicalize_url("https://example.com/a?page=2") != canonicalize_url("https://example.com/a?page=3")
+    assert canonicalize_url("") == ""
+
+def test_source_key_falls_back_to_content():
+    first = {"title": "T", "content": "Same   text"}
+    second = {"title": "t", "content": "same text"}
+    assert source_key(first) == source_key(second)
+    assert source_key({"url": "https://www.a.com/x/"}) == source_key({"url": "https://a.com/x"})
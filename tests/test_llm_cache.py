@@ -0,0 +1,117 @@
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+from config import Config
+from utils.llm_cache import (
+    InMemoryLLMCache, LLMCache, SQLiteLLMCache, get_llm_cache, invoke_llm,
+    make_cache_key, set_llm_cache, stream_llm
+)
+
+class CountingLLM:
+    """Modelo de chat mínimo que conta as chamadas reais"""
+    
+    model_name = "fake-model"
+    temperature = 0.1
+    
+    def __init__(self, reply: str = "resposta"):
+        self.reply = reply
+        self.calls = 0
+    
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        return AIMessage(content=self.reply)
+    
+    def stream(self, messages, **kwargs):
+        self.calls += 1
+        for word in self.reply.split(" "):
+            yield AIMessageChunk(content=word + " ")
+
+MESSAGES = [SystemMessage(content="sistema"), HumanMessage(content="pergunta")]
+
+@pytest.fixture
+def shared_cache():
+    previous = get_llm_cache()
+    cache = InMemoryLLMCache(max_entries=10)
+    set_llm_cache(cache)
+    yield cache
+    set_llm_cache(previous)
+
+def test_cache_key_depends_on_model_temperature_and_messages():
+    key = make_cache_key("m", 0.1, MESSAGES)
+    assert key == make_cache_key("m", 0.1, list(MESSAGES))
+    assert key != make_cache_key("m", 0.2, MESSAGES)
+    assert key != make_cache_key("other", 0.1, MESSAGES)
+    assert key != make_cache_key("m", 0.1, [HumanMessage(content="sistema"), HumanMessage(content="pergunta")])
+
+def test_in_memory_cache_evicts_least_recently_used():
+    cache = InMemoryLLMCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.get_stats()["hits"] == 2
+
+def test_sqlite_cache_ttl_lru_and_persistence(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("utils.llm_cache.time.time", lambda: now[0])
+    path = str(tmp_path / "llm.sqlite3")
+    
+    cache = SQLiteLLMCache(path=path, max_entries=2, ttl_seconds=60)
+    cache.set("a", "1")
+    now[0] += 1
+    cache.set("b", "2")
+    now[0] += 1
+    cache.get("a")
+    now[0] += 1
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.size() == 2
+    
+    assert SQLiteLLMCache(path=path, ttl_seconds=60).get("a") == "1"
+    
+    now[0] += 120
+    assert cache.get("c") is None
+
+def test_llm_cache_is_abstract():
+    class Incomplete(LLMCache):
+        def get(self, key):
+            return None
+    
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_invoke_llm_reuses_cached_response(shared_cache):
+    llm = CountingLLM()
+    first = invoke_llm(llm, MESSAGES, call_site="test")
+    second = invoke_llm(llm, MESSAGES, call_site="test")
+    
+    assert first.content == second.content == "resposta"
+    assert second.response_metadata["cache_hit"]
+    assert llm.calls == 1
+    
+    invoke_llm(llm, MESSAGES, call_site="test", use_cache=False)
+    assert llm.calls == 2
+
+def test_bypassed_call_sites_skip_cache(shared_cache, monkeypatch):
+    monkeypatch.setattr(Config, "LLM_CACHE_BYPASS", ["fresh"])
+    llm = CountingLLM()
+    invoke_llm(llm, MESSAGES, call_site="fresh")
+    invoke_llm(llm, MESSAGES, call_site="fresh")
+    
+    assert llm.calls == 2
+    assert shared_cache.size() == 0
+
+def test_stream_llm_caches_only_complete_streams(shared_cache):
+    llm = CountingLLM("a b c")
+    
+    stream = stream_llm(llm, MESSAGES, call_site="stream")
+    next(stream)
+    stream.close()
+    assert shared_cache.size() == 0
+    
+    assert "".join(stream_llm(llm, MESSAGES, call_site="stream")) == "a b c "
+    assert "".join(stream_llm(llm, MESSAGES, call_site="stream")) == "a b c "
+    assert llm.calls == 2
@@ -0,0 +1,52 @@
+from utils.near_duplicates import MinHasher, cluster_sources, deduplicate_sources
+
+BODY = (
+    "the quick brown fox jumps over the lazy dog near the river bank "
+    "at dawn while birds sing loudly in tall green trees"
+)
+
+def test_cluster_sources_groups_exact_and_near_duplicates():
+    sources = [
+        {"url": "https://a.com/x?utm_medium=1", "content": "alpha"},
+        {"url": "http://b.com", "content": BODY},
+        {"url": "https://www.a.com/x/", "content": "beta"},
+        {"url": "http://c.com", "content": BODY + " today"},
+        {"url": "http://d.com", "content": "quantum error correction codes for superconducting qubit hardware and control electronics"}
+    ]
+    
+    assert cluster_sources(sources, threshold=0.7, min_words=5) == [[0, 2], [1, 3], [4]]
+    
+    # threshold >= 1 desliga a comparação aproximada: só URL e conteúdo idênticos agrupam
+    assert cluster_sources(sources, threshold=1.0) == [[0, 2], [1], [3], [4]]
+
+def test_cluster_sources_empty():
+    assert cluster_sources([]) == []
+
+def test_short_texts_are_never_near_duplicates():
+    sources = [
+        {"url": "http://a.com", "content": "curto demais"},
+        {"url": "http://b.com", "content": "curto demais mesmo"}
+    ]
+    assert cluster_sources(sources, threshold=0.1, min_words=5) == [[0], [1]]
+
+def test_minhash_similarity_tracks_overlap():
+    hasher = MinHasher(num_perm=128, bands=32)
+    base = hasher.signature(BODY)
+    
+    assert hasher.signature("a b") is None
+    assert hasher.similarity(base, hasher.signature(BODY)) == 1.0
+    assert hasher.similarity(base, hasher.signature(BODY + " today")) > 0.7
+    assert hasher.similarity(base, hasher.signature("completely different words about other topics entirely here")) < 0.2
+
+def test_deduplicate_keeps_best_source_in_first_position():
+    sources = [
+        {"url": "http://b.com", "content": BODY, "relevance_score": 0.2},
+        {"url": "http://x.com", "content": "unrelated"},
+        {"url": "http://c.com", "content": BODY + " today", "relevance_score": 0.9}
+    ]
+    
+    deduplicated = deduplicate_sources(sources, threshold=0.7)
+    
+    assert [source["url"] for source in deduplicated] == ["http://c.com", "http://x.com"]
+    assert deduplicated[0]["duplicate_count"] == 1
+    assert "duplicate_count" not in sources[2]
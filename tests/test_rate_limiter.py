@@ -0,0 +1,110 @@
+import time
+import asyncio
+import threading
+import pytest
+from utils.rate_limiter import (
+    LLM_PROVIDER, AcquireCancelled, AcquireHandle, RateLimitGovernor,
+    arate_limited, get_rate_limiter, set_rate_limiter
+)
+
+def single_slot_governor() -> RateLimitGovernor:
+    """Um pedido em andamento por vez e nenhum limite por minuto"""
+    return RateLimitGovernor(overrides={LLM_PROVIDER: {"rpm": 0, "tpm": 0, "max_in_flight": 1}})
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condição não satisfeita a tempo"
+        time.sleep(0.005)
+
+def stats(governor: RateLimitGovernor):
+    return governor.get_stats()[LLM_PROVIDER]
+
+@pytest.fixture
+def shared_governor():
+    previous = get_rate_limiter()
+    governor = single_slot_governor()
+    set_rate_limiter(governor)
+    yield governor
+    set_rate_limiter(previous)
+
+def test_limit_releases_slot():
+    governor = single_slot_governor()
+    with governor.limit(LLM_PROVIDER):
+        assert stats(governor)["in_flight"] == 1
+    assert stats(governor)["in_flight"] == 0
+    assert stats(governor)["requests"] == 1
+
+def test_cancelled_waiter_leaves_queue():
+    governor = single_slot_governor()
+    lease = governor.acquire(LLM_PROVIDER)
+    handle = AcquireHandle()
+    errors = []
+    
+    def waiter():
+        try:
+            governor.acquire(LLM_PROVIDER, handle=handle)
+        except AcquireCancelled as e:
+            errors.append(e)
+    
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    wait_for(lambda: stats(governor)["queue_depth"] == 1)
+    
+    governor.cancel(handle)
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+    assert len(errors) == 1
+    assert stats(governor)["queue_depth"] == 0
+    
+    lease.release()
+    assert stats(governor)["in_flight"] == 0
+    governor.acquire(LLM_PROVIDER).release()
+
+def test_cancel_after_acquire_returns_slot():
+    governor = single_slot_governor()
+    handle = AcquireHandle()
+    lease = governor.acquire(LLM_PROVIDER, handle=handle)
+    assert handle.lease is lease
+    
+    governor.cancel(handle)
+    assert stats(governor)["in_flight"] == 0
+    
+    # Liberar de novo não desconta uma vaga que não foi reservada
+    lease.release()
+    assert stats(governor)["in_flight"] == 0
+
+def test_cancelled_async_waiter_does_not_leak_slot(shared_governor):
+    async def scenario():
+        holder_entered = asyncio.Event()
+        release_holder = asyncio.Event()
+        
+        async def holder():
+            async with arate_limited(LLM_PROVIDER):
+                holder_entered.set()
+                await release_holder.wait()
+        
+        async def waiter():
+            async with arate_limited(LLM_PROVIDER):
+                pass
+        
+        holder_task = asyncio.create_task(holder())
+        await holder_entered.wait()
+        
+        waiter_task = asyncio.create_task(waiter())
+        while stats(shared_governor)["queue_depth"] == 0:
+            await asyncio.sleep(0.005)
+        
+        waiter_task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter_task
+        
+        release_holder.set()
+        await holder_task
+    
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+    
+    # Sem o cancelamento, a thread abandonada reservaria a vaga liberada e nunca a devolveria
+    wait_for(lambda: stats(shared_governor)["queue_depth"] == 0)
+    assert stats(shared_governor)["in_flight"] == 0
+    shared_governor.acquire(LLM_PROVIDER).release()
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from tools.relevance_scorer import select_top_k, BatchRelevanceScorer
+
+def full_sort(scores: np.ndarray, k: int) -> np.ndarray:
+    """Referência: ordenação estável completa por score decrescente"""
+    return np.argsort(-scores, kind="stable")[:k]
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("k", [0, 1, 3, 10, 50, 60])
+def test_select_top_k_matches_full_sort(seed, k):
+    generator = np.random.default_rng(seed)
+    # Poucos valores distintos: muitos empates, inclusive na fronteira do top-k
+    scores = generator.integers(0, 5, size=50).astype(float) / 4
+    assert select_top_k(scores, k).tolist() == full_sort(scores, k).tolist()
+
+def test_select_top_k_empty():
+    assert select_top_k(np.empty(0), 5).size == 0
+
+def test_score_matches_dense_matrix_product():
+    results = [
+        {"title": "python agents", "content": "search agents with python and python tools", "score": 0.8},
+        {"title": "unrelated", "content": "nothing to see here", "score": 0.2},
+        {"content": "web search for data", "score": 0.5}
+    ]
+    
+    for weighting in ("binary", "tfidf"):
+        scorer = BatchRelevanceScorer("python agents search", "web data", weighting=weighting)
+        rows, columns, counts = scorer.term_matrix(results)
+        
+        dense = np.zeros((len(results), len(scorer.vocabulary)))
+        dense[rows, columns] = scorer._term_weights(columns, counts, len(results))
+        base = np.array([result["score"] for result in results])
+        expected = np.minimum(
+            scorer.TASK_WEIGHT * (dense @ scorer.task_vector)
+            + scorer.FOCUS_WEIGHT * (dense @ scorer.focus_vector)
+            + scorer.BASE_WEIGHT * base,
+            1.0
+        )
+        
+        assert np.allclose(scorer.score(results), expected)
+
+def test_rank_orders_by_relevance():
+    results = [
+        {"content": "nothing", "score": 0.5},
+        {"content": "python agents", "score": 0.5}
+    ]
+    ranking = BatchRelevanceScorer("python agents", "", weighting="binary").rank(results, 2)
+    assert [index for index, _ in ranking] == [1, 0]
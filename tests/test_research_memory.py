@@ -0,0 +1,67 @@
+import pytest
+from config import Config
+from memory.research_memory import ResearchMemory
+
+def recounted(memory: ResearchMemory) -> int:
+    """Contagem feita do zero, para comparar com a incremental"""
+    incremental = memory.memory["metadata"]["token_count"]
+    memory._update_token_count()
+    full = memory.memory["metadata"]["token_count"]
+    memory.memory["metadata"]["token_count"] = incremental
+    return full
+
+def make_source(i: int, score: float = 0.5) -> dict:
+    return {"title": f"Fonte {i}", "url": f"https://example.com/{i}", "content": f"conteúdo da fonte {i} " * 5, "score": score}
+
+def test_incremental_token_count_matches_full_recount():
+    memory = ResearchMemory()
+    memory.save_research_plan("plano inicial", "query")
+    memory.add_subagent_result("agent-1", {"summary": "resumo " * 20})
+    memory.add_sources([make_source(i) for i in range(5)])
+    memory.update_context("chave", {"valor": [1, 2, 3]})
+    assert memory.memory["metadata"]["token_count"] == recounted(memory)
+    
+    # Substituições: plano novo, contexto reescrito e duplicata melhor de uma fonte
+    memory.save_research_plan("plano revisado e bem mais longo que o primeiro", "query")
+    memory.update_context("chave", "texto")
+    memory.add_sources([{**make_source(2, score=0.9), "content": "versão mais completa " * 10}])
+    assert memory.memory["metadata"]["token_count"] == recounted(memory)
+    assert memory.memory["metadata"]["token_count"] > 0
+
+def test_clear_old_data_discounts_evicted_entries(monkeypatch):
+    monkeypatch.setattr(Config, "MEMORY_LIMIT_TOKENS", 10)
+    memory = ResearchMemory()
+    for i in range(8):
+        memory.add_subagent_result(f"agent-{i}", {"summary": f"resumo {i}"})
+    memory.add_sources([make_source(i) for i in range(25)])
+    
+    assert memory.clear_old_data()
+    assert len(memory.get_subagent_results()) == 5
+    assert len(memory.get_sources()) == 20
+    assert memory.memory["metadata"]["token_count"] == recounted(memory)
+    
+    # O índice de fontes acompanha as posições depois do corte
+    assert not memory.has_source(make_source(0))
+    assert memory.has_source(make_source(24))
+
+def test_import_recounts_tokens():
+    memory = ResearchMemory()
+    memory.add_sources([make_source(1)])
+    exported = memory.export_memory()
+    
+    restored = ResearchMemory()
+    assert restored.import_memory(exported)
+    assert restored.memory["metadata"]["token_count"] == memory.memory["metadata"]["token_count"]
+
+def test_duplicate_sources_keep_the_same_winner_as_the_workflow_state():
+    from graph.research_workflow import merge_sources
+    
+    original = {"url": "https://example.com/a", "title": "original", "score": 0.9, "relevance_score": 0.4}
+    duplicate = {"url": "https://www.example.com/a/", "title": "duplicata", "score": 0.5, "relevance_score": 0.8}
+    
+    memory = ResearchMemory()
+    memory.add_sources([original, duplicate])
+    
+    assert [source["title"] for source in memory.get_sources()] == ["duplicata"]
+    assert memory.get_sources() == merge_sources([original], [duplicate])
+    assert memory.memory["metadata"]["token_count"] == recounted(memory)
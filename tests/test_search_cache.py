@@ -0,0 +1,68 @@
+import pytest
+from config import Config
+from tools.search_cache import SearchCache
+from tools.web_search import WebSearchTool
+
+RESULTS = [{"title": "T", "url": "https://example.com", "content": "c", "score": 0.9}]
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Relógio controlado pelo teste (time.time do módulo do cache)"""
+    now = [1000.0]
+    monkeypatch.setattr("tools.search_cache.time.time", lambda: now[0])
+    return now
+
+def make_cache(tmp_path, **kwargs) -> SearchCache:
+    return SearchCache(path=str(tmp_path / "cache.sqlite3"), **kwargs)
+
+def test_hit_uses_normalized_query(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("Energia  Solar", "tavily", 5, RESULTS)
+    
+    assert cache.get("energia solar", "tavily", 5) == RESULTS
+    assert cache.get("energia solar", "duckduckgo", 5) is None
+    assert cache.get("energia solar", "tavily", 10) is None
+    assert cache.get_stats()["hits"] == 1
+
+def test_expired_entries_are_misses(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    cache.set("q", "tavily", 5, RESULTS)
+    
+    clock[0] += 59
+    assert cache.get("q", "tavily", 5) == RESULTS
+    
+    clock[0] += 2
+    assert cache.get("q", "tavily", 5) is None
+    assert cache.get_stats()["size"] == 0
+
+def test_lru_evicts_least_recently_used(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl_seconds=0, max_entries=2)
+    cache.set("a", "tavily", 5, RESULTS)
+    clock[0] += 1
+    cache.set("b", "tavily", 5, RESULTS)
+    clock[0] += 1
+    cache.get("a", "tavily", 5)
+    clock[0] += 1
+    cache.set("c", "tavily", 5, RESULTS)
+    
+    assert cache.get("b", "tavily", 5) is None
+    assert cache.get("a", "tavily", 5) == RESULTS
+    assert cache.get("c", "tavily", 5) == RESULTS
+    assert cache.get_stats()["evictions"] == 1
+
+def test_entries_survive_reopening(tmp_path):
+    make_cache(tmp_path).set("q", "tavily", 5, RESULTS)
+    assert make_cache(tmp_path).get("q", "tavily", 5) == RESULTS
+
+def test_web_search_tool_opens_cache_lazily(tmp_path, monkeypatch):
+    path = tmp_path / "lazy.sqlite3"
+    monkeypatch.setattr(Config, "SEARCH_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "SEARCH_CACHE_PATH", str(path))
+    
+    tool = WebSearchTool()
+    assert not path.exists()
+    assert tool.get_cache_stats()["enabled"]
+    assert path.exists()
+    
+    tool.cache = None
+    assert tool.get_cache_stats() == {"enabled": False}
@@ -0,0 +1,32 @@
+import time
+from agents.search_subagent import SearchSubagent
+
+def make_subagent(**kwargs) -> SearchSubagent:
+    return SearchSubagent("agent-1", "energia solar", "general", **kwargs)
+
+def test_parallel_queries_are_recorded_in_plan_order(monkeypatch):
+    subagent = make_subagent()
+    queries = [f"query {i}" for i in range(6)]
+    
+    def slow_search(query):
+        # As últimas queries terminam primeiro
+        time.sleep(0.01 * (len(queries) - int(query.split()[-1])))
+        return [{"title": query, "url": f"https://example.com/{query}", "content": "curto", "score": 0.1}]
+    
+    monkeypatch.setattr(subagent, "_perform_search", slow_search)
+    results = subagent._search_parallel(queries)
+    
+    assert subagent.issued_queries == queries
+    assert [result["title"] for result in results] == queries
+
+def test_sequential_search_stops_when_results_suffice(monkeypatch):
+    subagent = make_subagent()
+    rich_result = [{"title": "t", "url": "https://example.com", "content": "x" * 200, "score": 0.9}] * 3
+    monkeypatch.setattr(subagent, "_perform_search", lambda query: rich_result)
+    
+    subagent._search_sequential(["a", "b", "c"])
+    assert subagent.issued_queries == ["a"]
+
+def test_new_queries_skip_previous_rounds():
+    subagent = make_subagent(exclude_queries=["Energia  Solar"])
+    assert subagent._new_queries(["energia solar", "painéis", "PAINÉIS", ""]) == ["painéis"]
@@ -0,0 +1,82 @@
+import json
+import time
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+import pytest
+from server import ResearchRequestHandler, ResearchService
+
+@pytest.fixture
+def service(monkeypatch):
+    """Serviço sem workers iniciados (a fila só esvazia quando o teste quiser)"""
+    service = ResearchService(workers=1, queue_size=1)
+    calls = []
+    
+    def run_research(query, on_report_chunk=None, deadline_s=None):
+        calls.append({"query": query, "deadline_s": deadline_s})
+        on_report_chunk("trecho")
+        return {"success": True, "final_report": "relatório"}
+    
+    monkeypatch.setattr(service.workflow, "run_research", run_research)
+    service.calls = calls
+    return service
+
+@pytest.fixture
+def base_url(service):
+    handler = type("TestHandler", (ResearchRequestHandler,), {"service": service, "log_message": lambda *args: None})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, dict(response.headers), json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read())
+
+def test_full_queue_returns_429_with_retry_after(base_url):
+    status, headers, body = post(f"{base_url}/research", {"query": "primeira"})
+    assert status == 202
+    assert headers["Location"] == f"/jobs/{body['job_id']}"
+    
+    status, headers, body = post(f"{base_url}/research", {"query": "segunda"})
+    assert status == 429
+    assert int(headers["Retry-After"]) > 0
+    assert "error" in body
+
+def test_invalid_requests_return_400(base_url):
+    assert post(f"{base_url}/research", {"query": ""})[0] == 400
+    assert post(f"{base_url}/research", {"query": "q", "deadline_s": 0})[0] == 400
+    assert post(f"{base_url}/research", {"query": "q", "deadline_s": "abc"})[0] == 400
+
+def test_job_runs_with_remaining_deadline(service):
+    job = service.submit("query", deadline_s=10)
+    job.enqueued_at -= 3
+    service._run_job(service.queue.get_nowait())
+    
+    assert job.status == "completed"
+    assert job.chunks == ["trecho"]
+    assert 6 < service.calls[0]["deadline_s"] <= 7
+
+def test_job_that_spent_its_deadline_in_queue_fails_immediately(service):
+    job = service.submit("query", deadline_s=1)
+    job.enqueued_at -= 2
+    service._run_job(service.queue.get_nowait())
+    
+    assert job.status == "failed"
+    assert "fila" in job.error
+    assert job.started_at is None
+    assert service.calls == []
+
+def test_health_reports_queue(service):
+    service.submit("query")
+    health = service.get_health()
+    assert health["queue_depth"] == 1
+    assert health["queue_capacity"] == 1
+    assert health["workers"] == 1
@@ -0,0 +1,30 @@
+from tools.source_index import SourceIndex
+
+SOURCES = [
+    {"title": "Solar power", "content": "solar panels convert sunlight into electricity", "relevance_score": 0.5},
+    {"title": "Wind power", "content": "wind turbines convert wind into electricity", "relevance_score": 0.5},
+    {"title": "Wind farms", "content": "offshore wind turbines produce electricity", "relevance_score": 0.9}
+]
+
+def test_best_match_picks_highest_bm25():
+    index = SourceIndex(SOURCES)
+    assert index.best_match("solar panels convert sunlight") == 0
+    assert index.best_match("offshore wind farms") == 2
+
+def test_best_match_without_overlap():
+    index = SourceIndex(SOURCES)
+    assert index.best_match("quantum computing") is None
+    assert index.best_match("") is None
+    assert SourceIndex([]).best_match("solar") is None
+
+def test_best_match_ties_prefer_quality_then_first_source():
+    duplicated = [
+        {"content": "same text", "relevance_score": 0.4},
+        {"content": "same text", "relevance_score": 0.8},
+        {"content": "same text", "relevance_score": 0.8}
+    ]
+    assert SourceIndex(duplicated).best_match("same text") == 1
+
+def test_idf_favours_rare_terms():
+    index = SourceIndex(SOURCES)
+    assert index.idf("solar") > index.idf("electricity")
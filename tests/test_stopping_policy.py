@@ -0,0 +1,77 @@
+import pytest
+from config import Config
+from graph.stopping_policy import (
+    HeuristicStoppingPolicy, MarginalGainStoppingPolicy,
+    create_stopping_policy, marginal_gain, measure_round
+)
+from utils.session import research_session
+
+def make_state(iteration=1, max_iterations=3, results=None, round_stats=None):
+    return {
+        "current_iteration": iteration,
+        "max_iterations": max_iterations,
+        "subagent_results": results or [],
+        "round_stats": round_stats or []
+    }
+
+def round_stats(new_sources, total_sources, new_terms, total_terms, tokens=0, seconds=0.0):
+    return {
+        "iteration": 1, "new_sources": new_sources, "total_sources": total_sources,
+        "new_terms": new_terms, "total_terms": total_terms, "tokens": tokens, "seconds": seconds
+    }
+
+def test_measure_round_counts_only_novel_sources_and_terms():
+    previous = [{"url": "https://a.com", "title": "solar", "content": "solar panels"}]
+    new = [
+        {"url": "https://www.a.com/", "title": "solar", "content": "repeated source"},
+        {"url": "https://b.com", "title": "wind", "content": "solar turbines"},
+        {"url": "https://b.com", "title": "wind", "content": "duplicate in round"}
+    ]
+    
+    stats = measure_round(previous, new)
+    assert stats == {"new_sources": 1, "total_sources": 2, "new_terms": 2, "total_terms": 4}
+    assert marginal_gain(stats) == pytest.approx((1 / 2 + 2 / 4) / 2)
+
+def test_marginal_gain_without_totals():
+    assert marginal_gain({"new_sources": 0, "total_sources": 0, "new_terms": 0, "total_terms": 0}) == 0.0
+
+def test_base_policy_limits():
+    policy = MarginalGainStoppingPolicy(min_gain=0.1, token_budget=0, time_budget_seconds=0)
+    with research_session():
+        assert policy.should_stop(make_state(iteration=3), ["gap"]) == "limite de iterações atingido"
+        assert policy.should_stop(make_state(), []) == "todos os aspectos do plano estão cobertos"
+        assert policy.should_stop(make_state(), ["gap"]) is None
+
+def test_marginal_gain_policy_threshold():
+    policy = MarginalGainStoppingPolicy(min_gain=0.2, token_budget=0, time_budget_seconds=0)
+    with research_session():
+        productive = make_state(round_stats=[round_stats(5, 10, 40, 100)])
+        assert policy.should_stop(productive, ["gap"]) is None
+        
+        stale = make_state(round_stats=[round_stats(1, 20, 5, 200)])
+        assert policy.should_stop(stale, ["gap"]).startswith("ganho marginal da última rodada")
+
+def test_marginal_gain_policy_budgets():
+    with research_session() as session:
+        session.increment("llm_tokens", 900)
+        last_round = [round_stats(5, 10, 40, 100, tokens=200, seconds=1.0)]
+        
+        token_policy = MarginalGainStoppingPolicy(min_gain=0.0, token_budget=1000, time_budget_seconds=0)
+        assert token_policy.should_stop(make_state(round_stats=last_round), ["gap"]).startswith("orçamento de tokens")
+        
+        time_policy = MarginalGainStoppingPolicy(min_gain=0.0, token_budget=0, time_budget_seconds=0.5)
+        assert time_policy.should_stop(make_state(round_stats=last_round), ["gap"]).startswith("orçamento de tempo")
+
+def test_heuristic_policy(monkeypatch):
+    monkeypatch.setattr(Config, "MAX_SUBAGENTS", 2)
+    policy = HeuristicStoppingPolicy()
+    with research_session():
+        assert policy.should_stop(make_state(results=[{}] * 4), ["gap"]) == "limite de resultados atingido"
+        assert policy.should_stop(make_state(round_stats=[round_stats(0, 5, 3, 50)]), ["gap"]) == "a última rodada não trouxe fontes novas"
+        assert policy.should_stop(make_state(round_stats=[round_stats(1, 5, 3, 50)]), ["gap"]) is None
+
+def test_create_stopping_policy():
+    assert isinstance(create_stopping_policy("heuristic"), HeuristicStoppingPolicy)
+    assert isinstance(create_stopping_policy("Marginal_Gain"), MarginalGainStoppingPolicy)
+    with pytest.raises(ValueError):
+        create_stopping_policy("unknown")
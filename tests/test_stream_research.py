@@ -0,0 +1,35 @@
+import pytest
+from graph.research_workflow import research_workflow
+from utils.helpers import write_research_stream
+
+def test_stream_emits_chunks_then_result(monkeypatch):
+    def run_research(query, on_report_chunk=None, run_id=None, deadline_s=None):
+        for chunk in ("# Relatório", " parcial"):
+            on_report_chunk(chunk)
+        return {"success": True, "final_report": "# Relatório parcial [1]"}
+    
+    monkeypatch.setattr(research_workflow, "run_research", run_research)
+    events = list(research_workflow.stream_research("query"))
+    
+    assert [event["type"] for event in events] == ["report_chunk", "report_chunk", "result"]
+    assert events[-1]["result"]["final_report"] == "# Relatório parcial [1]"
+
+def test_stream_reraises_worker_errors(monkeypatch):
+    def run_research(query, on_report_chunk=None, run_id=None, deadline_s=None):
+        on_report_chunk("início")
+        raise RuntimeError("falha na exportação do trace")
+    
+    monkeypatch.setattr(research_workflow, "run_research", run_research)
+    events = research_workflow.stream_research("query")
+    
+    assert next(events)["type"] == "report_chunk"
+    with pytest.raises(RuntimeError, match="exportação"):
+        next(events)
+
+def test_stream_reraises_keyboard_interrupt(monkeypatch, tmp_path):
+    def run_research(query, on_report_chunk=None, run_id=None, deadline_s=None):
+        raise KeyboardInterrupt()
+    
+    monkeypatch.setattr(research_workflow, "run_research", run_research)
+    with pytest.raises(KeyboardInterrupt):
+        write_research_stream(research_workflow.stream_research("query"), stream=None, filename=str(tmp_path / "r.txt"))
@@ -0,0 +1,130 @@
+import base64
+import hashlib
+import pytest
+from tiktoken_ext import openai_public
+from config import Config
+from utils import token_counter as token_counter_module
+from utils.token_counter import TokenCounter, download_bpe_files
+
+TINY_URL = "https://example.invalid/encodings/tiny.tiktoken"
+
+def tiny_bpe() -> bytes:
+    """Ranks BPE mínimos: só os 256 bytes (1 token por byte)"""
+    return b"\n".join(base64.b64encode(bytes([i])) + b" " + str(i).encode() for i in range(256)) + b"\n"
+
+@pytest.fixture
+def tiny_encoding(tmp_path, monkeypatch):
+    """Registra um encoding 'tiny' no formato dos construtores de tiktoken_ext.openai_public"""
+    contents = tiny_bpe()
+    expected_hash = hashlib.sha256(contents).hexdigest()
+    
+    def tiny():
+        return {
+            "name": "tiny",
+            "pat_str": r"""\S+|\s+""",
+            "mergeable_ranks": openai_public.load_tiktoken_bpe(TINY_URL, expected_hash=expected_hash),
+            "special_tokens": {}
+        }
+    
+    monkeypatch.setitem(openai_public.ENCODING_CONSTRUCTORS, "tiny", tiny)
+    monkeypatch.setattr(Config, "TOKENIZER_BPE_DIR", str(tmp_path))
+    return tmp_path / "tiny.tiktoken", contents
+
+def test_missing_bpe_file_falls_back_and_reports_reason(tiny_encoding):
+    counter = TokenCounter(backend="tiktoken", encoding_name="tiny")
+    
+    assert counter.count("abcdefgh") == 2
+    stats = counter.get_stats()
+    assert stats["exact"] is False
+    assert stats["backend"] == "heuristic"
+    assert "tiny.tiktoken" in stats["fallback_reason"]
+    assert "--download" in stats["fallback_reason"]
+
+def test_local_bpe_file_gives_exact_counts(tiny_encoding):
+    path, contents = tiny_encoding
+    path.write_bytes(contents)
+    counter = TokenCounter(backend="tiktoken", encoding_name="tiny")
+    
+    assert counter.count("abc de") == 6
+    stats = counter.get_stats()
+    assert stats["exact"] is True
+    assert stats["encoding"] == "tiny"
+    assert stats["fallback_reason"] is None
+
+def test_bpe_file_with_wrong_hash_is_rejected(tiny_encoding):
+    path, contents = tiny_encoding
+    path.write_bytes(contents + b"AA== 256\n")
+    counter = TokenCounter(backend="tiktoken", encoding_name="tiny")
+    
+    assert not counter.is_exact
+    assert "ValueError" in counter.fallback_reason
+
+def test_download_writes_verified_file(tiny_encoding, monkeypatch):
+    path, contents = tiny_encoding
+    fetched = []
+    
+    def read_file(blobpath):
+        # Só URLs contam como download; o arquivo local é lido normalmente
+        if "://" not in blobpath:
+            return path.read_bytes()
+        fetched.append(blobpath)
+        return contents
+    
+    monkeypatch.setattr("tiktoken.load.read_file", read_file)
+    
+    assert download_bpe_files(["tiny"]) == [str(path)]
+    assert fetched == [TINY_URL]
+    assert path.read_bytes() == contents
+    
+    # Já provisionado: não baixa de novo
+    download_bpe_files(["tiny"])
+    assert len(fetched) == 1
+    assert TokenCounter(backend="tiktoken", encoding_name="tiny").is_exact
+
+def test_download_rejects_corrupted_file(tiny_encoding, monkeypatch):
+    path, _ = tiny_encoding
+    monkeypatch.setattr("tiktoken.load.read_file", lambda url: b"corrompido")
+    
+    with pytest.raises(ValueError):
+        download_bpe_files(["tiny"])
+    assert not path.exists()
+
+def test_counts_are_memoized(tiny_encoding):
+    path, contents = tiny_encoding
+    path.write_bytes(contents)
+    counter = TokenCounter(backend="tiktoken", encoding_name="tiny", max_entries=2)
+    
+    counter.count("um")
+    counter.count("um")
+    counter.count("dois")
+    counter.count("três")
+    
+    stats = counter.get_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+    assert stats["cached_counts"] == 2
+
+def test_heuristic_backend_reports_configuration():
+    counter = TokenCounter(backend="heuristic")
+    
+    assert counter.count("x" * 40) == 10
+    assert counter.get_stats()["fallback_reason"] == "TOKEN_COUNTER_BACKEND=heuristic"
+
+def test_truncate_respects_token_limit(tiny_encoding):
+    path, contents = tiny_encoding
+    path.write_bytes(contents)
+    counter = TokenCounter(backend="tiktoken", encoding_name="tiny")
+    text = "palavra " * 50
+    
+    truncated = counter.truncate(text, 40)
+    assert truncated.endswith("...")
+    assert counter.count(truncated) <= 40
+    assert counter.truncate("curto", 40) == "curto"
+
+def test_heuristic_truncate_keeps_whole_words():
+    counter = TokenCounter(backend="heuristic")
+    truncated = counter.truncate("palavra " * 50, 10)
+    
+    assert truncated == ("palavra " * 5).rstrip() + "..."
+
+def test_global_counter_exists():
+    assert isinstance(token_counter_module.token_counter, TokenCounter)
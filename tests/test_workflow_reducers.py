@@ -0,0 +1,39 @@
+from graph.research_workflow import merge_by_key, merge_sources, merge_subagent_results, merge_unique
+
+def test_merge_by_key_appends_new_and_replaces_preferred():
+    reducer = merge_by_key(lambda item: item["id"], prefer=lambda new, old: new["v"] > old["v"])
+    current = [{"id": 1, "v": 1}, {"id": 2, "v": 5}]
+    update = [{"id": 2, "v": 3}, {"id": 1, "v": 2}, {"id": 3, "v": 0}]
+    
+    assert reducer(current, update) == [{"id": 1, "v": 2}, {"id": 2, "v": 5}, {"id": 3, "v": 0}]
+    assert current == [{"id": 1, "v": 1}, {"id": 2, "v": 5}]
+    assert reducer(current, []) is current
+
+def test_merge_sources_is_idempotent():
+    current = [
+        {"url": "https://a.com/x", "title": "A", "relevance_score": 0.4},
+        {"url": "https://b.com", "title": "B", "relevance_score": 0.7}
+    ]
+    update = [
+        {"url": "https://www.a.com/x/?utm_source=feed", "title": "A2", "relevance_score": 0.9},
+        {"url": "https://b.com/", "title": "B2", "relevance_score": 0.1},
+        {"url": "https://c.com", "title": "C", "relevance_score": 0.5}
+    ]
+    
+    merged = merge_sources(current, update)
+    assert [source["title"] for source in merged] == ["A2", "B", "C"]
+    assert merge_sources(merged, update) == merged
+    assert merge_sources(merged, merged) == merged
+
+def test_merge_subagent_results_replaces_reruns():
+    current = [{"agent_id": "a", "iteration": 1, "summary": "old"}]
+    update = [{"agent_id": "a", "iteration": 1, "summary": "new"}, {"agent_id": "a", "iteration": 2, "summary": "next"}]
+    
+    merged = merge_subagent_results(current, update)
+    assert [result["summary"] for result in merged] == ["new", "next"]
+    assert merge_subagent_results(merged, update) == merged
+
+def test_merge_unique_keeps_first_occurrence_order():
+    merged = merge_unique(["q1", "q2"], ["q2", "q3", "q1"])
+    assert merged == ["q1", "q2", "q3"]
+    assert merge_unique(merged, ["q3"]) == merged
@@ -1,6 +1,8 @@
 import re
 from typing import List, Dict, Tuple
 from langchain_core.tools import tool
+from tools.source_index import SourceIndex
+from utils.session import SessionLocal
 
 class CitationProcessor:
     """Processador de citações para relatórios de pesquisa"""
@@ -28,10 +30,13 @@ class CitationProcessor:
         sentences = re.split(r'(?<=[.!?])\s+', text)
         cited_sentences = []
         
+        # Indexa as fontes uma única vez para todas as sentenças
+        source_index = SourceIndex(sources)
+        
         for sentence in sentences:
             if self._needs_citation(sentence):
                 # Encontra a melhor fonte para esta sentença
-                best_source_idx = self._find_best_source(sentence, sources)
+                best_source_idx = self._find_best_source(sentence, source_index)
                 if best_source_idx:
                     sentence = f"{sentence} [{best_source_idx}]"
             
@@ -52,33 +57,10 @@ class CitationProcessor:
         sentence_lower = sentence.lower()
         return any(keyword in sentence_lower for keyword in citation_keywords)
     
-    def _find_best_source(self, sentence: str, sources: List[Dict]) -> int:
-        """Encontra a melhor fonte para uma sentença específica"""
-        best_score = 0
-        best_idx = None
-        
-        for i, source in enumerate(sources, 1):
-            score = self._calculate_relevance_score(sentence, source)
-            if score > best_score:
-                best_score = score
-                best_idx = i
-        
-        return best_idx if best_score > 0.3 else None
-    
-    def _calculate_relevance_score(self, sentence: str, source: Dict) -> float:
-        """Calcula score de relevância entre sentença e fonte"""
-        sentence_words = set(sentence.lower().split())
-        source_content = source.get("content", "").lower()
-        source_title = source.get("title", "").lower()
-        
-        # Conta palavras em comum
-        source_words = set((source_content + " " + source_title).split())
-        common_words = sentence_words.intersection(source_words)
-        
-        if not sentence_words:
-            return 0
-        
-        return len(common_words) / len(sentence_words)
+    def _find_best_source(self, sentence: str, source_index: SourceIndex) -> int:
+        """Encontra a melhor fonte para uma sentença específica (1-indexed)"""
+        best_idx = source_index.best_match(sentence, min_score=0.3, quality_weight=0.0)
+        return best_idx + 1 if best_idx is not None else None
     
     def _generate_bibliography(self) -> str:
         """Gera bibliografia formatada"""
@@ -97,8 +79,8 @@ class CitationProcessor:
         
         return bibliography
 
-# Instância global do processador
-citation_processor = CitationProcessor()
+# Processador da execução atual: cada research_session tem o seu (ver utils.session)
+citation_processor = SessionLocal("citation_processor", CitationProcessor)
 
 @tool
 def add_citations_to_report(report_text: str, sources: List[Dict]) -> str:
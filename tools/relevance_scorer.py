@@ -0,0 +1,106 @@
+import numpy as np
+from typing import List, Dict, Tuple
+from config import Config
+
+def select_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Índices dos k maiores scores em ordem decrescente (empates mantêm a ordem original)"""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.intp)
+    
+    if k < scores.size:
+        # Seleção parcial O(n) e ordenação apenas dos k escolhidos
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        # Empates na fronteira: inclui todos os índices com o score de corte para manter a estabilidade
+        cutoff = scores[candidates].min()
+        candidates = np.union1d(candidates[scores[candidates] > cutoff], np.flatnonzero(scores == cutoff))
+    else:
+        candidates = np.arange(scores.size)
+    
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+class BatchRelevanceScorer:
+    """
+    Pontua um lote de resultados de uma vez contra a tarefa e o foco do subagente.
+    
+    Mesma fórmula do cálculo item a item (0.4 x termos da tarefa + 0.3 x termos
+    do foco + 0.3 x score base, limitado a 1.0). No modo "tfidf", cada termo
+    presente vale (1 + log tf) x idf / idf máximo, calculado sobre o lote; com
+    tf = 1 e idf uniforme o resultado coincide com o modo "binary".
+    """
+    
+    TASK_WEIGHT = 0.4
+    FOCUS_WEIGHT = 0.3
+    BASE_WEIGHT = 0.3
+    
+    def __init__(self, task: str, focus: str, weighting: str = None):
+        self.weighting = (weighting or Config.RELEVANCE_WEIGHTING).lower()
+        
+        # Tarefa e foco são tokenizados uma única vez por subagente
+        task_terms = set(task.lower().split())
+        focus_terms = set(focus.lower().split())
+        self.vocabulary = {term: column for column, term in enumerate(sorted(task_terms | focus_terms))}
+        
+        self.task_vector = np.zeros(len(self.vocabulary))
+        self.focus_vector = np.zeros(len(self.vocabulary))
+        for term in task_terms:
+            self.task_vector[self.vocabulary[term]] = 1.0
+        for term in focus_terms:
+            self.focus_vector[self.vocabulary[term]] = 1.0
+    
+    def term_matrix(self, results: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Matriz termo-documento esparsa (COO) restrita ao vocabulário de tarefa e foco"""
+        rows, columns, counts = [], [], []
+        vocabulary = self.vocabulary
+        
+        for row, result in enumerate(results):
+            term_counts = {}
+            tokens = result.get("content", "").lower().split() + result.get("title", "").lower().split()
+            for token in tokens:
+                column = vocabulary.get(token)
+                if column is not None:
+                    term_counts[column] = term_counts.get(column, 0) + 1
+            
+            for column, count in term_counts.items():
+                rows.append(row)
+                columns.append(column)
+                counts.append(count)
+        
+        return np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp), np.array(counts, dtype=float)
+    
+    def score(self, results: List[Dict]) -> np.ndarray:
+        """Scores de relevância de todos os resultados (mesma ordem da entrada)"""
+        num_results = len(results)
+        if not num_results:
+            return np.empty(0)
+        
+        base = np.array([result.get("score", 0.5) for result in results], dtype=float)
+        
+        if not self.vocabulary:
+            return np.minimum(self.BASE_WEIGHT * base, 1.0)
+        
+        rows, columns, counts = self.term_matrix(results)
+        weights = self._term_weights(columns, counts, num_results)
+        
+        # Produto matriz-vetor direto sobre as triplas COO, sem montar a matriz densa
+        task_matches = np.bincount(rows, weights=weights * self.task_vector[columns], minlength=num_results)
+        focus_matches = np.bincount(rows, weights=weights * self.focus_vector[columns], minlength=num_results)
+        
+        relevance = self.TASK_WEIGHT * task_matches + self.FOCUS_WEIGHT * focus_matches + self.BASE_WEIGHT * base
+        return np.minimum(relevance, 1.0)
+    
+    def rank(self, results: List[Dict], k: int) -> List[Tuple[int, float]]:
+        """Top-k (índice, score) em ordem decrescente de relevância"""
+        scores = self.score(results)
+        return [(int(index), float(scores[index])) for index in select_top_k(scores, k)]
+    
+    def _term_weights(self, columns: np.ndarray, counts: np.ndarray, num_results: int) -> np.ndarray:
+        """Peso de cada entrada não nula da matriz conforme o modo de ponderação"""
+        if self.weighting != "tfidf" or counts.size == 0:
+            return np.ones_like(counts)
+        
+        document_frequency = np.bincount(columns, minlength=len(self.vocabulary))
+        idf = np.log((1 + num_results) / (1 + document_frequency)) + 1
+        idf_max = idf[document_frequency > 0].max()
+        
+        return (1 + np.log(counts)) * idf[columns] / idf_max
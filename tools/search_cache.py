@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import List, Dict, Optional
+from config import Config
+
+class SearchCache:
+    """Cache persistente (SQLite) de resultados de pesquisa com TTL e limite LRU"""
+    
+    def __init__(self, path: str = None, ttl_seconds: int = None, max_entries: int = None):
+        self.path = path or Config.SEARCH_CACHE_PATH
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else Config.SEARCH_CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else Config.SEARCH_CACHE_MAX_ENTRIES
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        # Uma única conexão compartilhada entre threads, serializada pelo lock
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Abre o banco e cria a tabela se necessário"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError:
+            pass
+        
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                num_results INTEGER NOT NULL,
+                results TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_access ON search_cache(last_access)")
+        conn.commit()
+        return conn
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Normaliza a query (caixa e espaços) para aumentar a taxa de acerto"""
+        return " ".join(query.lower().split())
+    
+    def make_key(self, query: str, provider: str, num_results: int) -> str:
+        """Gera a chave do cache a partir de query normalizada, provedor e número de resultados"""
+        raw = json.dumps([self.normalize_query(query), provider, int(num_results)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    
+    def get(self, query: str, provider: str, num_results: int) -> Optional[List[Dict]]:
+        """Retorna resultados em cache ou None se ausentes/expirados"""
+        key = self.make_key(query, provider, num_results)
+        now = time.time()
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, created_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None:
+                self.misses += 1
+                return None
+            
+            results, created_at = row
+            
+            if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                # Expirado: remove e conta como miss
+                self._conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            
+            self._conn.execute("UPDATE search_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        
+        return json.loads(results)
+    
+    def set(self, query: str, provider: str, num_results: int, results: List[Dict]) -> None:
+        """Armazena resultados e aplica o limite de tamanho (LRU)"""
+        key = self.make_key(query, provider, num_results)
+        now = time.time()
+        payload = json.dumps(results, ensure_ascii=False)
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache "
+                "(key, query, provider, num_results, results, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, self.normalize_query(query), provider, int(num_results), payload, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+    
+    def _evict(self) -> None:
+        """Remove entradas expiradas e as menos usadas recentemente acima do limite"""
+        if self.ttl_seconds > 0:
+            cursor = self._conn.execute(
+                "DELETE FROM search_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+        
+        if self.max_entries <= 0:
+            return
+        
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM search_cache WHERE key IN "
+                "(SELECT key FROM search_cache ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            )
+            self.evictions += excess
+    
+    def clear(self) -> None:
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            self._conn.execute("DELETE FROM search_cache")
+            self._conn.commit()
+    
+    def get_stats(self) -> Dict:
+        """Retorna contadores de acertos, falhas e tamanho do cache"""
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()
+        
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds
+        }
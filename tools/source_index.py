@@ -0,0 +1,85 @@
+import math
+from collections import defaultdict
+from typing import List, Dict, Optional, Tuple
+
+class SourceIndex:
+    """Índice invertido com pontuação BM25 sobre o corpus de fontes"""
+    
+    def __init__(self, sources: List[Dict], k1: float = 1.5, b: float = 0.75):
+        self.sources = sources
+        self.k1 = k1
+        self.b = b
+        
+        # Cada fonte é tokenizada uma única vez
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        self.quality: List[float] = []
+        
+        for doc_id, source in enumerate(sources):
+            tokens = self.tokenize(source.get("content", "") + " " + source.get("title", ""))
+            self.doc_lengths.append(len(tokens))
+            self.quality.append(source.get("relevance_score", source.get("score", 0.5)))
+            
+            term_counts = defaultdict(int)
+            for token in tokens:
+                term_counts[token] += 1
+            for term, count in term_counts.items():
+                self.postings[term].append((doc_id, count))
+        
+        self.num_docs = len(sources)
+        self.avg_doc_length = (sum(self.doc_lengths) / self.num_docs) if self.num_docs else 0.0
+        self._idf_cache: Dict[str, float] = {}
+    
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Tokenização simples (mesma regra usada no cálculo de sobreposição)"""
+        return text.lower().split()
+    
+    def idf(self, term: str) -> float:
+        """IDF do BM25 (variante sempre positiva)"""
+        if term not in self._idf_cache:
+            df = len(self.postings.get(term, ()))
+            self._idf_cache[term] = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+        return self._idf_cache[term]
+    
+    def score_statement(self, statement: str) -> Dict[int, Tuple[float, int]]:
+        """Percorre apenas as listas de postings dos termos da declaração"""
+        terms = set(self.tokenize(statement))
+        scores: Dict[int, Tuple[float, int]] = {}
+        
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            
+            idf = self.idf(term)
+            for doc_id, tf in postings:
+                length_norm = 1 - self.b + self.b * (self.doc_lengths[doc_id] / self.avg_doc_length if self.avg_doc_length else 0)
+                term_score = idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+                
+                bm25, matches = scores.get(doc_id, (0.0, 0))
+                scores[doc_id] = (bm25 + term_score, matches + 1)
+        
+        return scores
+    
+    def best_match(self, statement: str, min_score: float = 0.3, quality_weight: float = 0.2) -> Optional[int]:
+        """
+        Retorna o índice da fonte mais relevante para a declaração.
+        
+        Só são candidatas as fontes cuja sobreposição de termos (mais o bônus
+        de qualidade) supera min_score; entre elas vence o maior BM25.
+        """
+        num_terms = len(set(self.tokenize(statement)))
+        if not num_terms:
+            return None
+        
+        candidates = [
+            (bm25, self.quality[doc_id], -doc_id)
+            for doc_id, (bm25, matches) in self.score_statement(statement).items()
+            if min(matches / num_terms + self.quality[doc_id] * quality_weight, 1.0) > min_score
+        ]
+        if not candidates:
+            return None
+        
+        # Maior BM25 vence; empates favorecem a fonte de maior qualidade e depois a primeira
+        return -max(candidates)[2]
@@ -1,10 +1,21 @@
+import asyncio
+import weakref
+import threading
+import httpx
 import requests
 from typing import List, Dict, Optional
 from langchain_core.tools import tool
 from langchain_community.tools.tavily_search import TavilySearchResults
 from config import Config
+from tools.search_cache import SearchCache
+from utils.tracing import span
+from utils.rate_limiter import rate_limited, arate_limited
 import json
 
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+
+COMPANY_KEYWORDS = ["company", "startup", "corporation", "inc", "ltd", "llc"]
+
 class WebSearchTool:
     """Ferramenta de pesquisa web com fallback para múltiplas APIs"""
     
@@ -17,24 +28,166 @@ class WebSearchTool:
                 include_answer=True,
                 include_raw_content=True
             )
+        
+        # Clientes reutilizados entre chamadas
+        self._duckduckgo_search = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        
+        # O cache SQLite só é aberto na primeira pesquisa (importar o módulo não cria arquivos)
+        self._cache: Optional[SearchCache] = None
+        self._cache_initialized = False
+        self._cache_lock = threading.Lock()
+    
+    @property
+    def cache(self) -> Optional[SearchCache]:
+        """Cache de pesquisa (None com SEARCH_CACHE_ENABLED=false ou se não puder ser aberto)"""
+        if not self._cache_initialized:
+            with self._cache_lock:
+                if not self._cache_initialized:
+                    if Config.SEARCH_CACHE_ENABLED:
+                        try:
+                            self._cache = SearchCache()
+                        except Exception as e:
+                            print(f"Cache de pesquisa desativado: {e}")
+                    self._cache_initialized = True
+        return self._cache
+    
+    @cache.setter
+    def cache(self, cache: Optional[SearchCache]):
+        with self._cache_lock:
+            self._cache = cache
+            self._cache_initialized = True
     
     def search_web(self, query: str, num_results: int = None) -> List[Dict]:
         """Executa pesquisa web com fallback para múltiplas fontes"""
         if num_results is None:
             num_results = Config.MAX_SEARCH_RESULTS
-            
-        try:
-            # Tenta usar Tavily primeiro (melhor qualidade)
-            if self.tavily_search:
-                results = self.tavily_search.run(query)
-                return self._format_tavily_results(results)
-            else:
-                # Fallback para DuckDuckGo (gratuito)
-                return self._search_duckduckgo(query, num_results)
+        
+        provider = self._get_provider()
+        
+        with span("search_web", "search", query=query, provider=provider, num_results=num_results) as search_span:
+            # Consulta o cache antes de chamar o provedor
+            cached = self._get_cached(query, provider, num_results)
+            if cached is not None:
+                search_span.set(cache_hit=True, **_result_attributes(cached))
+                return cached
                 
-        except Exception as e:
-            print(f"Erro na pesquisa web: {e}")
-            return self._search_duckduckgo(query, num_results)
+            try:
+                # Tenta usar Tavily primeiro (melhor qualidade)
+                if self.tavily_search:
+                    with rate_limited("tavily"):
+                        results = self.tavily_search.run(query)
+                    results = self._format_tavily_results(results)
+                else:
+                    # Fallback para DuckDuckGo (gratuito)
+                    results = self._search_duckduckgo(query, num_results)
+                    
+            except Exception as e:
+                print(f"Erro na pesquisa web: {e}")
+                results = self._search_duckduckgo(query, num_results)
+                search_span.set(cache_hit=False, fallback=True, **_result_attributes(results))
+                return results
+            
+            search_span.set(cache_hit=False, **_result_attributes(results))
+            self._store_cached(query, provider, num_results, results)
+            return results
+    
+    async def asearch_web(self, query: str, num_results: int = None) -> List[Dict]:
+        """Versão assíncrona de search_web usando o pool de conexões compartilhado"""
+        if num_results is None:
+            num_results = Config.MAX_SEARCH_RESULTS
+        
+        provider = self._get_provider()
+        
+        with span("asearch_web", "search", query=query, provider=provider, num_results=num_results) as search_span:
+            cached = self._get_cached(query, provider, num_results)
+            if cached is not None:
+                search_span.set(cache_hit=True, **_result_attributes(cached))
+                return cached
+            
+            try:
+                if self.tavily_search:
+                    results = await self._asearch_tavily(query)
+                else:
+                    results = await self._asearch_duckduckgo(query, num_results)
+                    
+            except Exception as e:
+                print(f"Erro na pesquisa web: {e}")
+                results = await self._asearch_duckduckgo(query, num_results)
+                search_span.set(cache_hit=False, fallback=True, **_result_attributes(results))
+                return results
+            
+            search_span.set(cache_hit=False, **_result_attributes(results))
+            self._store_cached(query, provider, num_results, results)
+            return results
+    
+    def _get_provider(self) -> str:
+        """Provedor primário usado nas pesquisas"""
+        return "tavily" if self.tavily_search else "duckduckgo"
+    
+    def _get_cached(self, query: str, provider: str, num_results: int) -> Optional[List[Dict]]:
+        """Consulta o cache de pesquisa, se habilitado"""
+        if not self.cache:
+            return None
+        return self.cache.get(query, provider, num_results)
+    
+    def _store_cached(self, query: str, provider: str, num_results: int, results: List[Dict]):
+        """Armazena no cache apenas respostas reais (não vazias e não o marcador de erro)"""
+        if self.cache and any(result.get("url") for result in results):
+            self.cache.set(query, provider, num_results, results)
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Retorna o cliente HTTP keep-alive do event loop atual"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=Config.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY_SECONDS
+                ),
+                timeout=Config.HTTP_TIMEOUT_SECONDS
+            )
+            self._async_clients[loop] = client
+        
+        return client
+    
+    async def aclose(self):
+        """Fecha o cliente HTTP do event loop atual"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+    
+    async def _asearch_tavily(self, query: str) -> List[Dict]:
+        """Pesquisa na API REST do Tavily reaproveitando conexões"""
+        client = self._get_async_client()
+        async with arate_limited("tavily"):
+            response = await client.post(
+                TAVILY_SEARCH_URL,
+                json={
+                    "api_key": Config.TAVILY_API_KEY,
+                    "query": query,
+                    "max_results": Config.MAX_SEARCH_RESULTS,
+                    "search_depth": "advanced",
+                    "include_answer": True,
+                    "include_raw_content": True
+                }
+            )
+        response.raise_for_status()
+        return self._format_tavily_results(response.json().get("results", []))
+    
+    async def _asearch_duckduckgo(self, query: str, num_results: int) -> List[Dict]:
+        """DuckDuckGo não tem cliente assíncrono; executa em thread com o cliente reutilizado"""
+        return await asyncio.to_thread(self._search_duckduckgo, query, num_results)
+    
+    def get_cache_stats(self) -> Dict:
+        """Retorna estatísticas do cache de pesquisa"""
+        if not self.cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.get_stats()}
     
     def _format_tavily_results(self, results: List[Dict]) -> List[Dict]:
         """Formata resultados do Tavily"""
@@ -48,12 +201,19 @@ class WebSearchTool:
             })
         return formatted
     
+    def _get_duckduckgo(self):
+        """Cria o cliente DuckDuckGo uma única vez"""
+        if self._duckduckgo_search is None:
+            from langchain_community.tools import DuckDuckGoSearchRun
+            self._duckduckgo_search = DuckDuckGoSearchRun()
+        return self._duckduckgo_search
+    
     def _search_duckduckgo(self, query: str, num_results: int) -> List[Dict]:
         """Pesquisa usando DuckDuckGo (fallback gratuito)"""
         try:
-            from langchain_community.tools import DuckDuckGoSearchRun
-            search = DuckDuckGoSearchRun()
-            result = search.run(query)
+            search = self._get_duckduckgo()
+            with rate_limited("duckduckgo"):
+                result = search.run(query)
             
             # Parse do resultado do DuckDuckGo
             results = []
@@ -105,18 +265,59 @@ def search_companies(query: str, industry: str = "", year: str = "2025") -> List
     Returns:
         Lista de empresas encontradas
     """
-    # Constrói query otimizada para empresas
+    search_query = _build_company_query(query, industry, year)
+    results = web_search_tool.search_web(search_query, Config.MAX_SEARCH_RESULTS)
+    return _filter_company_results(results)
+
+async def asearch_web(query: str, num_results: int = 5) -> List[Dict]:
+    """
+    Versão assíncrona de search_web (conexões HTTP compartilhadas).
+    
+    Args:
+        query: Termo de pesquisa
+        num_results: Número máximo de resultados (padrão: 5)
+    
+    Returns:
+        Lista de dicionários com title, url, content e score
+    """
+    return await web_search_tool.asearch_web(query, num_results)
+
+async def asearch_companies(query: str, industry: str = "", year: str = "2025") -> List[Dict]:
+    """
+    Versão assíncrona de search_companies (conexões HTTP compartilhadas).
+    
+    Args:
+        query: Termo de pesquisa sobre empresas
+        industry: Setor/indústria específica
+        year: Ano de referência
+        
+    Returns:
+        Lista de empresas encontradas
+    """
+    search_query = _build_company_query(query, industry, year)
+    results = await web_search_tool.asearch_web(search_query, Config.MAX_SEARCH_RESULTS)
+    return _filter_company_results(results)
+
+def _result_attributes(results: List[Dict]) -> Dict:
+    """Atributos do span de pesquisa: quantidade e tamanho do payload"""
+    return {
+        "results": len(results),
+        "payload_chars": sum(len(result.get("content", "")) + len(result.get("title", "")) for result in results)
+    }
+
+def _build_company_query(query: str, industry: str, year: str) -> str:
+    """Constrói query otimizada para empresas"""
     search_query = f"{query} companies {industry} {year} list"
     if "AI" in query or "artificial intelligence" in query.lower():
         search_query += " artificial intelligence startups"
-    
-    results = web_search_tool.search_web(search_query, Config.MAX_SEARCH_RESULTS)
-    
-    # Filtra e processa resultados para empresas
+    return search_query
+
+def _filter_company_results(results: List[Dict]) -> List[Dict]:
+    """Filtra e processa resultados para empresas"""
     company_results = []
     for result in results:
         content = result.get("content", "")
-        if any(keyword in content.lower() for keyword in ["company", "startup", "corporation", "inc", "ltd", "llc"]):
+        if any(keyword in content.lower() for keyword in COMPANY_KEYWORDS):
             company_results.append(result)
     
     return company_results[:10]  # Limita a 10 empresas por pesquisa
\ No newline at end of file
@@ -0,0 +1,189 @@
+import re
+import json
+from typing import Dict, List, Any, Tuple, Optional
+from config import Config
+from tools.source_index import SourceIndex
+from utils.helpers import clean_text
+from utils.token_counter import count_tokens, truncate_tokens
+
+# Campos volumosos que nunca entram no prompt de síntese
+_HEAVY_KEYS = ("raw_results", "processed_results", "sources", "search_strategy")
+
+def compact_json(value: Any) -> str:
+    """Serializa sem indentação nem espaços após separadores"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+def compact_json_text(text: Optional[str]) -> str:
+    """Recompacta um texto JSON (ex.: plano salvo com indent=2); outros textos só têm espaços colapsados"""
+    if not text:
+        return ""
+    try:
+        return compact_json(json.loads(text))
+    except (TypeError, ValueError):
+        return clean_text(str(text))
+
+def split_snippets(text: str) -> List[str]:
+    """Quebra um texto em trechos (parágrafos e itens de lista), sem espaços redundantes"""
+    parts = re.split(r"\n\s*\n|\n\s*(?:[-*•]|\d+[.)])\s+", text or "")
+    return [snippet for snippet in (clean_text(part).strip(" -*•") for part in parts) if snippet]
+
+def extract_snippets(result: Dict[str, Any]) -> List[str]:
+    """Extrai os achados textuais de um resultado de agente (summary, findings ou result aninhado)"""
+    snippets = []
+    
+    findings = result.get("findings")
+    if isinstance(findings, list):
+        snippets.extend(clean_text(str(finding)) for finding in findings if finding)
+    
+    summary = result.get("summary")
+    if isinstance(summary, str):
+        snippets.extend(split_snippets(summary))
+    
+    nested = result.get("result")
+    if isinstance(nested, dict):
+        snippets.extend(extract_snippets(nested))
+    
+    if not snippets:
+        # Sem resumo: usa o próprio resultado compactado, sem os campos volumosos
+        light = {key: value for key, value in result.items() if key not in _HEAVY_KEYS}
+        snippets.append(compact_json(light))
+    
+    return snippets
+
+class ContextPacker:
+    """
+    Empacota achados de vários agentes em um orçamento de tokens.
+    
+    Os trechos são pontuados por BM25 contra a query, deduplicados (igualdade
+    normalizada ou sobreposição de termos acima do limiar) e selecionados
+    gulosamente até o orçamento. Cada agente tem seu melhor trecho garantido
+    antes do ranking global, e a saída mantém a ordem original por agente.
+    """
+    
+    def __init__(self, max_tokens: int = None, max_snippet_tokens: int = None, dedup_threshold: float = None):
+        self.max_tokens = max_tokens or Config.SYNTHESIS_CONTEXT_TOKENS
+        self.max_snippet_tokens = max_snippet_tokens or Config.CONTEXT_SNIPPET_MAX_TOKENS
+        self.dedup_threshold = dedup_threshold if dedup_threshold is not None else Config.CONTEXT_DEDUP_THRESHOLD
+    
+    def pack(self, query: str, groups: List[Tuple[str, List[str]]], reserved_tokens: int = 0) -> Dict[str, Any]:
+        """
+        Seleciona e formata trechos dentro do orçamento.
+        
+        Args:
+            query: Query usada para ranquear os trechos
+            groups: Lista de (rótulo do agente, trechos)
+            reserved_tokens: Tokens já ocupados por outras partes do prompt
+        
+        Returns:
+            Dicionário com text, tokens, snippets_used, snippets_total e duplicates
+        """
+        budget = max(0, self.max_tokens - reserved_tokens)
+        candidates, duplicates = self._collect_candidates(groups)
+        
+        scores = SourceIndex([{"content": candidate["text"]} for candidate in candidates]).score_statement(query)
+        for i, candidate in enumerate(candidates):
+            candidate["score"] = scores.get(i, (0.0, 0))[0]
+        
+        # Ranking: maior BM25 primeiro; empates mantêm a ordem original
+        ranked = sorted(range(len(candidates)), key=lambda i: (-candidates[i]["score"], i))
+        
+        # Primeiro o melhor trecho de cada agente, depois o ranking global
+        best_per_group = {}
+        for i in ranked:
+            best_per_group.setdefault(candidates[i]["group"], i)
+        leaders = set(best_per_group.values())
+        order = list(best_per_group.values()) + [i for i in ranked if i not in leaders]
+        
+        selected = set()
+        opened_groups = set()
+        used = 0
+        
+        for i in order:
+            candidate = candidates[i]
+            cost = candidate["tokens"]
+            label = groups[candidate["group"]][0]
+            if label and candidate["group"] not in opened_groups:
+                cost += count_tokens(label) + 1
+            
+            if used + cost > budget:
+                continue
+            
+            selected.add(i)
+            opened_groups.add(candidate["group"])
+            used += cost
+        
+        return {
+            "text": self._format(groups, candidates, selected),
+            "tokens": used,
+            "snippets_used": len(selected),
+            "snippets_total": len(candidates) + duplicates,
+            "duplicates": duplicates
+        }
+    
+    def _collect_candidates(self, groups: List[Tuple[str, List[str]]]) -> Tuple[List[Dict[str, Any]], int]:
+        """Normaliza, limita o tamanho e remove trechos repetidos entre todos os agentes"""
+        candidates = []
+        seen_texts = set()
+        seen_terms: List[set] = []
+        duplicates = 0
+        
+        for group_index, (_, snippets) in enumerate(groups):
+            for snippet in snippets:
+                text = truncate_tokens(clean_text(snippet).strip(), self.max_snippet_tokens)
+                normalized = text.lower()
+                if not text:
+                    continue
+                
+                terms = set(SourceIndex.tokenize(normalized))
+                if normalized in seen_texts or self._is_near_duplicate(terms, seen_terms):
+                    duplicates += 1
+                    continue
+                
+                seen_texts.add(normalized)
+                seen_terms.append(terms)
+                candidates.append({
+                    "group": group_index,
+                    "text": text,
+                    "tokens": count_tokens(text) + 1
+                })
+        
+        return candidates, duplicates
+    
+    def _is_near_duplicate(self, terms: set, seen_terms: List[set]) -> bool:
+        """Sobreposição de termos (Jaccard) com algum trecho já aceito"""
+        if not terms or self.dedup_threshold >= 1:
+            return False
+        for other in seen_terms:
+            union = len(terms | other)
+            if union and len(terms & other) / union >= self.dedup_threshold:
+                return True
+        return False
+    
+    def _format(self, groups: List[Tuple[str, List[str]]], candidates: List[Dict[str, Any]], selected: set) -> str:
+        """Formata os trechos escolhidos agrupados por agente, na ordem original"""
+        lines = []
+        current_group = None
+        
+        for i, candidate in enumerate(candidates):
+            if i not in selected:
+                continue
+            if candidate["group"] != current_group:
+                current_group = candidate["group"]
+                label = groups[current_group][0]
+                if label:
+                    lines.append(f"{label}:")
+            lines.append(f"- {candidate['text']}")
+        
+        return "\n".join(lines)
+
+def groups_from_results(results: List[Dict[str, Any]], label: str = "Subagente") -> List[Tuple[str, List[str]]]:
+    """Converte resultados de subagentes em grupos (rótulo, trechos) para o ContextPacker"""
+    groups = []
+    for i, result in enumerate(results, 1):
+        task = result.get("task")
+        title = f"{label} {i} ({clean_text(task)})" if task else f"{label} {i}"
+        groups.append((title, extract_snippets(result)))
+    return groups
+
+# Instância global com os limites configurados
+context_packer = ContextPacker()
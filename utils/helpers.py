@@ -1,19 +1,24 @@
+import sys
 import json
 import time
-from typing import Dict, List, Any, Optional
+import hashlib
+from typing import Dict, List, Any, Optional, Iterable, TextIO
 from datetime import datetime
+from utils.token_counter import count_tokens
 
 def format_elapsed_time(start_time: float) -> str:
-    """Formata tempo decorrido de forma legível"""
-    elapsed = time.time() - start_time
-    
-    if elapsed < 60:
-        return f"{elapsed:.1f} segundos"
-    elif elapsed < 3600:
-        minutes = elapsed / 60
+    """Formata tempo decorrido desde start_time de forma legível"""
+    return format_duration(time.time() - start_time)
+
+def format_duration(seconds: float) -> str:
+    """Formata uma duração em segundos de forma legível"""
+    if seconds < 60:
+        return f"{seconds:.1f} segundos"
+    elif seconds < 3600:
+        minutes = seconds / 60
         return f"{minutes:.1f} minutos"
     else:
-        hours = elapsed / 3600
+        hours = seconds / 3600
         return f"{hours:.1f} horas"
 
 def print_research_status(step: str, details: str = ""):
@@ -45,6 +50,52 @@ def extract_domain_from_url(url: str) -> str:
     except:
         return url
 
+# Parâmetros de rastreamento removidos na canonicalização (além de qualquer utm_*)
+TRACKING_PARAMS = {
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "_hsenc", "_hsmi", "ref_src", "ref_url", "cmpid", "spm"
+}
+
+def canonicalize_url(url: str) -> str:
+    """Normaliza URL para comparação (esquema/host em minúsculas, sem fragmento, porta padrão, barra final ou parâmetros de rastreamento)"""
+    if not url:
+        return ""
+    
+    try:
+        from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        
+        port = parts.port
+        if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+            host = f"{host}:{port}"
+        
+        path = parts.path.rstrip("/") or "/"
+        query = urlencode(sorted(
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+        ))
+        
+        return urlunsplit((scheme, host, path, query, ""))
+    except ValueError:
+        return url.strip()
+
+def source_fingerprint(source: Dict) -> str:
+    """Impressão digital do conteúdo de uma fonte (para fontes sem URL)"""
+    title = " ".join(source.get("title", "").lower().split())
+    content = " ".join(source.get("content", "").lower().split())
+    return hashlib.sha1(f"{title}\n{content}".encode("utf-8")).hexdigest()
+
+def source_key(source: Dict) -> str:
+    """Chave de deduplicação: URL canônica ou, na falta dela, impressão digital do conteúdo"""
+    url = canonicalize_url(source.get("url", ""))
+    if url:
+        return f"url:{url}"
+    return f"content:{source_fingerprint(source)}"
+
 def clean_text(text: str) -> str:
     """Limpa texto removendo caracteres especiais desnecessários"""
     import re
@@ -61,8 +112,8 @@ def clean_text(text: str) -> str:
     return text.strip()
 
 def count_tokens_approximate(text: str) -> int:
-    """Conta tokens de forma aproximada (1 token ≈ 4 caracteres)"""
-    return len(text) // 4
+    """Conta tokens com o tokenizer do modelo (heurística de 4 caracteres se indisponível)"""
+    return count_tokens(text)
 
 def format_company_list(companies: List[Dict]) -> str:
     """Formata lista de empresas de forma legível"""
@@ -121,30 +172,10 @@ def validate_search_results(results: List[Dict]) -> List[Dict]:
     return valid_results
 
 def merge_duplicate_sources(sources: List[Dict]) -> List[Dict]:
-    """Remove fontes duplicadas mantendo a melhor qualidade"""
-    seen_urls = {}
-    merged_sources = []
+    """Remove fontes duplicadas (mesma URL canônica ou conteúdo quase idêntico) mantendo a melhor qualidade"""
+    from utils.near_duplicates import deduplicate_sources
     
-    for source in sources:
-        url = source.get('url', '')
-        
-        if not url:
-            merged_sources.append(source)
-            continue
-        
-        if url in seen_urls:
-            # Mantém a fonte com melhor score
-            existing_idx = seen_urls[url]
-            existing_score = merged_sources[existing_idx].get('score', 0)
-            current_score = source.get('score', 0)
-            
-            if current_score > existing_score:
-                merged_sources[existing_idx] = source
-        else:
-            seen_urls[url] = len(merged_sources)
-            merged_sources.append(source)
-    
-    return merged_sources
+    return deduplicate_sources(sources, score=lambda source: source.get('score', 0))
 
 def generate_research_summary(results: Dict[str, Any]) -> str:
     """Gera resumo executivo da pesquisa"""
@@ -191,6 +222,39 @@ def save_research_to_file(results: Dict[str, Any], filename: Optional[str] = Non
         print(f"Erro ao salvar arquivo: {e}")
         return ""
 
+def write_research_stream(events: Iterable[Dict[str, Any]], stream: Optional[TextIO] = sys.stdout, filename: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Consome os eventos de stream_research escrevendo o relatório incrementalmente.
+    
+    Os trechos da síntese são escritos no console e no arquivo à medida que chegam;
+    ao final, o arquivo é reescrito com o relatório citado completo.
+    """
+    result = {}
+    draft = open(filename, 'w', encoding='utf-8') if filename else None
+    
+    try:
+        for event in events:
+            if event["type"] == "report_chunk":
+                if stream:
+                    stream.write(event["content"])
+                    stream.flush()
+                if draft:
+                    draft.write(event["content"])
+                    draft.flush()
+            elif event["type"] == "result":
+                result = event["result"]
+    finally:
+        if draft:
+            draft.close()
+    
+    if stream:
+        stream.write("\n")
+    
+    if filename and result:
+        save_research_to_file(result, filename)
+    
+    return result
+
 def print_progress_bar(current: int, total: int, width: int = 50):
     """Imprime barra de progresso"""
     if total == 0:
@@ -243,11 +307,11 @@ class ResearchTimer:
         previous_step = None
         for step_name, step_data in self.steps.items():
             duration = self.get_step_duration(step_name, previous_step)
-            print(f"{step_name}: {format_elapsed_time(time.time() - duration)}")
+            print(f"{step_name}: {format_duration(duration)}")
             previous_step = step_name
         
         print("-" * 40)
-        print(f"Total: {format_elapsed_time(self.get_total_elapsed())}")
+        print(f"Total: {format_duration(self.get_total_elapsed())}")
 
 def create_progress_callback():
     """Cria callback de progresso para usar com agentes"""
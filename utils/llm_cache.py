@@ -0,0 +1,352 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from langchain_core.messages import AIMessage, BaseMessage
+from config import Config
+from utils.helpers import count_tokens_approximate
+from utils.tracing import span
+from utils.session import current_session, DeadlineExceeded
+from utils.rate_limiter import rate_limited, LLM_PROVIDER
+
+def make_cache_key(model: str, temperature: float, messages: List[BaseMessage]) -> str:
+    """Gera hash estável de modelo, temperatura e mensagens serializadas"""
+    serialized = [
+        {"type": getattr(message, "type", type(message).__name__), "content": message.content}
+        for message in messages
+    ]
+    raw = json.dumps([model, temperature, serialized], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class LLMCache(ABC):
+    """Interface base para backends do cache de respostas do LLM"""
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Resposta armazenada para a chave (None se ausente ou expirada)"""
+    
+    @abstractmethod
+    def set(self, key: str, content: str) -> None:
+        """Armazena a resposta para a chave"""
+    
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+    
+    @abstractmethod
+    def size(self) -> int:
+        """Número de entradas armazenadas"""
+    
+    def get_stats(self) -> Dict:
+        """Retorna contadores de acertos, falhas e tamanho"""
+        total = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": self.size()
+        }
+
+class InMemoryLLMCache(LLMCache):
+    """Cache em memória com despejo LRU"""
+    
+    def __init__(self, max_entries: int = None):
+        super().__init__()
+        self.max_entries = max_entries if max_entries is not None else Config.LLM_CACHE_MAX_ENTRIES
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+    
+    def set(self, key: str, content: str) -> None:
+        with self._lock:
+            self._entries[key] = content
+            self._entries.move_to_end(key)
+            while self.max_entries > 0 and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def size(self) -> int:
+        return len(self._entries)
+
+class SQLiteLLMCache(LLMCache):
+    """Cache persistente em SQLite com TTL e despejo LRU"""
+    
+    def __init__(self, path: str = None, max_entries: int = None, ttl_seconds: int = None):
+        super().__init__()
+        self.path = path or Config.LLM_CACHE_PATH
+        self.max_entries = max_entries if max_entries is not None else Config.LLM_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else Config.LLM_CACHE_TTL_SECONDS
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError:
+            pass
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+        self._conn.commit()
+    
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None:
+                self.misses += 1
+                return None
+            
+            content, created_at = row
+            if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return content
+    
+    def set(self, key: str, content: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, content, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, content, now, now)
+            )
+            
+            if self.max_entries > 0:
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+                excess = count - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM llm_cache WHERE key IN "
+                        "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                        (excess,)
+                    )
+                    self.evictions += excess
+            
+            self._conn.commit()
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+    
+    def size(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        return count
+
+def create_llm_cache(backend: str = None) -> Optional[LLMCache]:
+    """Cria o backend configurado ("sqlite", "memory" ou "none")"""
+    backend = (backend or Config.LLM_CACHE_BACKEND).lower()
+    
+    if backend == "sqlite":
+        return SQLiteLLMCache()
+    if backend == "memory":
+        return InMemoryLLMCache()
+    return None
+
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_initialized = False
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Retorna o cache compartilhado por todos os agentes (criado sob demanda)"""
+    global _llm_cache, _llm_cache_initialized
+    
+    if not _llm_cache_initialized:
+        with _llm_cache_lock:
+            if not _llm_cache_initialized:
+                try:
+                    _llm_cache = create_llm_cache()
+                except Exception as e:
+                    print(f"Cache de LLM desativado: {e}")
+                    _llm_cache = None
+                _llm_cache_initialized = True
+    
+    return _llm_cache
+
+def set_llm_cache(cache: Optional[LLMCache]) -> None:
+    """Substitui o cache compartilhado (None desativa)"""
+    global _llm_cache, _llm_cache_initialized
+    
+    with _llm_cache_lock:
+        _llm_cache = cache
+        _llm_cache_initialized = True
+
+def invoke_llm(llm: Any, messages: List[BaseMessage], call_site: str = "", use_cache: bool = True) -> AIMessage:
+    """
+    Invoca o LLM passando pelo cache de respostas.
+    
+    Args:
+        llm: Modelo de chat (ex.: ChatOpenAI)
+        messages: Mensagens do prompt
+        call_site: Nome do ponto de chamada (usado em LLM_CACHE_BYPASS)
+        use_cache: False ignora o cache nesta chamada
+    
+    Returns:
+        Resposta do modelo (AIMessage)
+    """
+    prompt_attributes = _prompt_attributes(llm, messages, call_site)
+    
+    with span(call_site or "llm", "llm", **prompt_attributes) as llm_span:
+        cache, key = _resolve_cache(llm, messages, call_site, use_cache)
+        
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            llm_span.set(cache_hit=True, **_completion_attributes(cached))
+            return AIMessage(content=cached, response_metadata={"cache_hit": True})
+        
+        # Aguarda a vez no governor de taxa (RPM/TPM por modelo) antes de chamar a API
+        with rate_limited(LLM_PROVIDER, prompt_attributes["model"], prompt_attributes["prompt_tokens"]) as lease:
+            llm_span.set(**_lease_attributes(lease))
+            response = llm.invoke(messages, **_request_options())
+        
+        completion_attributes = _completion_attributes(response.content, response)
+        llm_span.set(cache_hit=False, **completion_attributes)
+        tokens_used = _record_usage(prompt_attributes, completion_attributes)
+        if lease is not None:
+            lease.settle(tokens_used)
+        if cache is not None and isinstance(response.content, str):
+            cache.set(key, response.content)
+        
+        return response
+
+def stream_llm(llm: Any, messages: List[BaseMessage], call_site: str = "", use_cache: bool = True) -> Iterator[str]:
+    """
+    Invoca o LLM em modo streaming, emitindo trechos de texto à medida que chegam.
+    
+    Uma resposta em cache é emitida de uma vez; uma resposta nova é armazenada
+    no cache somente se o streaming terminar sem erro.
+    """
+    prompt_attributes = _prompt_attributes(llm, messages, call_site)
+    
+    with span(call_site or "llm", "llm", streaming=True, **prompt_attributes) as llm_span:
+        cache, key = _resolve_cache(llm, messages, call_site, use_cache)
+        
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                llm_span.set(cache_hit=True, **_completion_attributes(cached))
+                yield cached
+                return
+        
+        parts = []
+        # A vaga no governor fica ocupada até o fim do streaming
+        with rate_limited(LLM_PROVIDER, prompt_attributes["model"], prompt_attributes["prompt_tokens"]) as lease:
+            llm_span.set(**_lease_attributes(lease))
+            for chunk in llm.stream(messages, **_request_options()):
+                content = chunk.content
+                if content:
+                    if not parts:
+                        llm_span.set(time_to_first_chunk_ms=llm_span.duration * 1000)
+                    parts.append(content)
+                    yield content
+        
+        completion_attributes = _completion_attributes("".join(parts))
+        llm_span.set(cache_hit=False, chunks=len(parts), **completion_attributes)
+        tokens_used = _record_usage(prompt_attributes, completion_attributes)
+        if lease is not None:
+            lease.settle(tokens_used)
+        if cache is not None:
+            cache.set(key, "".join(parts))
+
+def _resolve_cache(llm: Any, messages: List[BaseMessage], call_site: str, use_cache: bool) -> Tuple[Optional[LLMCache], Optional[str]]:
+    """Retorna o cache aplicável a esta chamada e a chave correspondente"""
+    cache = get_llm_cache() if use_cache and call_site not in Config.LLM_CACHE_BYPASS else None
+    if cache is None:
+        return None, None
+    
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", "")
+    temperature = getattr(llm, "temperature", None)
+    return cache, make_cache_key(model, temperature, messages)
+
+def _prompt_attributes(llm: Any, messages: List[BaseMessage], call_site: str) -> Dict[str, Any]:
+    """Atributos do span de LLM referentes ao prompt"""
+    prompt = "".join(message.content for message in messages if isinstance(message.content, str))
+    return {
+        "call_site": call_site,
+        "model": getattr(llm, "model_name", None) or getattr(llm, "model", ""),
+        "prompt_chars": len(prompt),
+        "prompt_tokens": count_tokens_approximate(prompt)
+    }
+
+def _request_options() -> Dict[str, Any]:
+    """Timeout da requisição limitado ao prazo da execução (DeadlineExceeded se já esgotado)"""
+    remaining = current_session().time_left()
+    if remaining is None:
+        return {}
+    if remaining <= 0:
+        raise DeadlineExceeded("prazo da execução esgotado antes da chamada ao LLM")
+    return {"timeout": remaining}
+
+def _lease_attributes(lease: Any) -> Dict[str, Any]:
+    """Atributos do span referentes à espera no governor de taxa"""
+    if lease is None:
+        return {}
+    return {"queue_wait_ms": round(lease.wait_seconds * 1000, 2)}
+
+def _record_usage(prompt_attributes: Dict[str, Any], completion_attributes: Dict[str, Any]) -> int:
+    """Soma uma chamada paga (não vinda do cache) aos contadores da sessão e devolve os tokens consumidos"""
+    prompt_tokens = completion_attributes.get("prompt_tokens") or prompt_attributes["prompt_tokens"]
+    completion_tokens = completion_attributes.get("completion_tokens") or 0
+    
+    session = current_session()
+    session.increment("llm_calls")
+    session.increment("llm_tokens", prompt_tokens + completion_tokens)
+    return prompt_tokens + completion_tokens
+
+def _completion_attributes(content: Any, response: Any = None) -> Dict[str, Any]:
+    """Atributos do span de LLM referentes à resposta (usa o uso reportado pela API quando existe)"""
+    text = content if isinstance(content, str) else str(content)
+    attributes = {
+        "completion_chars": len(text),
+        "completion_tokens": count_tokens_approximate(text)
+    }
+    
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        attributes["prompt_tokens"] = usage.get("input_tokens")
+        attributes["completion_tokens"] = usage.get("output_tokens")
+    
+    return attributes
\ No newline at end of file
@@ -0,0 +1,26 @@
+import threading
+from typing import Dict, Tuple
+from langchain_openai import ChatOpenAI
+from config import Config
+
+_chat_models: Dict[Tuple[str, float], ChatOpenAI] = {}
+_chat_models_lock = threading.Lock()
+
+def get_chat_model(model: str = None, temperature: float = None) -> ChatOpenAI:
+    """Cliente de chat compartilhado por modelo e temperatura (um único pool de conexões HTTP)"""
+    key = (model or Config.MODEL_NAME, Config.TEMPERATURE if temperature is None else temperature)
+    
+    with _chat_models_lock:
+        chat_model = _chat_models.get(key)
+        if chat_model is None:
+            chat_model = _chat_models[key] = ChatOpenAI(
+                model=key[0],
+                temperature=key[1],
+                api_key=Config.OPENAI_API_KEY
+            )
+    return chat_model
+
+def reset_chat_models() -> None:
+    """Descarta os clientes criados (os próximos usam a configuração atual)"""
+    with _chat_models_lock:
+        _chat_models.clear()
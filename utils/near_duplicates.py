@@ -0,0 +1,165 @@
+import re
+import random
+import hashlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Callable
+from config import Config
+from utils.helpers import canonicalize_url, source_fingerprint
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+def source_quality(source: Dict) -> float:
+    """Score usado para escolher o representante de um grupo de duplicatas"""
+    return source.get("relevance_score", source.get("score", 0)) or 0
+
+class MinHasher:
+    """
+    Assinaturas MinHash sobre shingles de palavras, com LSH por bandas.
+    
+    Cada permutação é simulada por XOR do hash do shingle com uma máscara
+    aleatória fixa, o que mantém o custo linear no número de shingles.
+    """
+    
+    def __init__(self, num_perm: int = None, bands: int = None, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm or Config.NEAR_DUPLICATE_NUM_PERM
+        self.bands = max(1, min(bands or Config.NEAR_DUPLICATE_BANDS, self.num_perm))
+        self.rows = self.num_perm // self.bands
+        self.shingle_size = shingle_size
+        
+        generator = random.Random(seed)
+        self._masks = [generator.getrandbits(64) for _ in range(self.num_perm)]
+    
+    def shingles(self, text: str) -> set:
+        """Conjunto de hashes dos n-gramas de palavras do texto normalizado"""
+        words = _WORD_RE.findall(text.lower())
+        if len(words) < self.shingle_size:
+            return set()
+        
+        return {
+            int.from_bytes(hashlib.blake2b(" ".join(words[i:i + self.shingle_size]).encode("utf-8"), digest_size=8).digest(), "little")
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+    
+    def signature(self, text: str) -> Optional[List[int]]:
+        """Assinatura MinHash (None para textos curtos demais)"""
+        hashes = self.shingles(text)
+        if not hashes:
+            return None
+        return [min(value ^ mask for value in hashes) for mask in self._masks]
+    
+    def band_keys(self, signature: List[int]) -> List[tuple]:
+        """Chaves LSH: documentos que compartilham alguma banda são candidatos"""
+        return [
+            (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+    
+    @staticmethod
+    def similarity(first: List[int], second: List[int]) -> float:
+        """Estimativa de Jaccard: fração de posições iguais nas assinaturas"""
+        return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+    
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+    
+    def union(self, first: int, second: int):
+        root_first, root_second = self.find(first), self.find(second)
+        if root_first != root_second:
+            # A raiz é sempre o menor índice (primeira ocorrência)
+            self.parent[max(root_first, root_second)] = min(root_first, root_second)
+
+def cluster_sources(sources: List[Dict], threshold: float = None, min_words: int = None,
+                    hasher: MinHasher = None) -> List[List[int]]:
+    """
+    Agrupa fontes duplicadas: mesma URL canônica, mesmo conteúdo ou conteúdo
+    quase idêntico (Jaccard estimado >= threshold).
+    
+    Returns:
+        Lista de grupos (índices em sources), na ordem da primeira ocorrência
+    """
+    threshold = Config.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    min_words = Config.NEAR_DUPLICATE_MIN_WORDS if min_words is None else min_words
+    hasher = hasher or _default_hasher()
+    
+    groups = _UnionFind(len(sources))
+    exact_keys: Dict[str, int] = {}
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    signatures: Dict[int, List[int]] = {}
+    
+    for index, source in enumerate(sources):
+        # Duplicatas exatas: URL canônica e impressão digital do conteúdo
+        keys = [f"content:{source_fingerprint(source)}"] if source.get("content", "").strip() else []
+        url = canonicalize_url(source.get("url", ""))
+        if url:
+            keys.append(f"url:{url}")
+        
+        for key in keys:
+            if key in exact_keys:
+                groups.union(exact_keys[key], index)
+            else:
+                exact_keys[key] = index
+        
+        if threshold >= 1:
+            continue
+        
+        text = f"{source.get('title', '')} {source.get('content', '')}"
+        if len(_WORD_RE.findall(text)) < min_words:
+            continue
+        
+        signature = hasher.signature(text)
+        if signature is None:
+            continue
+        signatures[index] = signature
+        
+        # Só compara com documentos que colidem em alguma banda (custo ~linear)
+        candidates = set()
+        for band_key in hasher.band_keys(signature):
+            candidates.update(buckets[band_key])
+            buckets[band_key].append(index)
+        
+        for candidate in candidates:
+            if groups.find(candidate) != groups.find(index) and hasher.similarity(signature, signatures[candidate]) >= threshold:
+                groups.union(candidate, index)
+    
+    clusters: Dict[int, List[int]] = {}
+    for index in range(len(sources)):
+        clusters.setdefault(groups.find(index), []).append(index)
+    
+    return list(clusters.values())
+
+def deduplicate_sources(sources: List[Dict], threshold: float = None,
+                        score: Callable[[Dict], float] = source_quality) -> List[Dict]:
+    """
+    Remove duplicatas (exatas e quase idênticas) mantendo, de cada grupo, a
+    fonte de maior score. A ordem segue a primeira ocorrência de cada grupo.
+    """
+    if len(sources) < 2:
+        return list(sources)
+    
+    deduplicated = []
+    for cluster in cluster_sources(sources, threshold):
+        # max() mantém a primeira ocorrência em caso de empate
+        best = max(cluster, key=lambda index: score(sources[index]))
+        representative = sources[best]
+        
+        if len(cluster) > 1:
+            representative = {**representative, "duplicate_count": len(cluster) - 1}
+        deduplicated.append(representative)
+    
+    return deduplicated
+
+_hasher: Optional[MinHasher] = None
+
+def _default_hasher() -> MinHasher:
+    """MinHasher compartilhado (as máscaras são fixas, então reutilizá-lo é seguro)"""
+    global _hasher
+    if _hasher is None:
+        _hasher = MinHasher()
+    return _hasher
@@ -0,0 +1,311 @@
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Any, Optional, Iterator, AsyncIterator
+from config import Config
+from utils.session import current_session, DeadlineExceeded
+
+# Provedor das chamadas de LLM (todos os agentes usam ChatOpenAI)
+LLM_PROVIDER = "openai"
+
+class TokenBucket:
+    """Balde de fichas com capacidade para um minuto de consumo, reposto continuamente"""
+    
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.refill_per_second = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    def wait_time(self, amount: float, now: float) -> float:
+        """Segundos até haver amount fichas (0 = disponível agora)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+        
+        # Pedidos maiores que o balde inteiro esperam só até ele encher
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+    
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+    
+    def adjust(self, amount: float):
+        """Devolve (positivo) ou cobra (negativo) fichas; saldo negativo atrasa os próximos pedidos"""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class _Limiter:
+    """Baldes, fila de espera e métricas de um par provedor/modelo"""
+    
+    def __init__(self, key: str, rpm: int, tpm: int):
+        self.key = key
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.queue = deque()
+        
+        self.acquired = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.max_queue_depth = 0
+
+class RateLimitLease:
+    """Reserva de uma requisição: ocupa uma vaga de execução simultânea até release()"""
+    
+    def __init__(self, governor: "RateLimitGovernor", limiter: _Limiter, provider: str, tokens: int, wait_seconds: float):
+        self.provider = provider
+        self.tokens = tokens
+        self.wait_seconds = wait_seconds
+        self._governor = governor
+        self._limiter = limiter
+        self._released = False
+    
+    def settle(self, actual_tokens: int):
+        """Acerta o balde de tokens com o consumo real (a reserva usa a estimativa do prompt)"""
+        self._governor._settle(self, actual_tokens)
+    
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._governor._release(self)
+
+class AcquireCancelled(Exception):
+    """A espera na fila foi abandonada pelo chamador (AcquireHandle cancelado)"""
+
+class AcquireHandle:
+    """
+    Permite desistir de um acquire que roda em outra thread.
+    
+    Cancelamento e reserva acontecem sob o mesmo lock do governor: ou a espera
+    termina com AcquireCancelled, ou a vaga já reservada é devolvida por cancel().
+    """
+    
+    def __init__(self):
+        self.cancelled = False
+        self.lease: Optional["RateLimitLease"] = None
+
+class RateLimitGovernor:
+    """
+    Limites de taxa do processo para chamadas de LLM e de pesquisa.
+    
+    Cada par provedor/modelo tem baldes de requisições (RPM) e de tokens (TPM)
+    e cada provedor um teto de requisições em andamento. Chamadas acima do
+    limite esperam em uma fila FIFO em vez de receberem 429; a espera nunca
+    passa do prazo da execução (DeadlineExceeded).
+    """
+    
+    def __init__(self, overrides: Optional[Dict[str, Dict[str, int]]] = None):
+        self.overrides = _parse_overrides(Config.RATE_LIMIT_OVERRIDES) if overrides is None else overrides
+        
+        self._condition = threading.Condition()
+        self._limiters: Dict[str, _Limiter] = {}
+        self._in_flight: Dict[str, int] = {}
+    
+    def limits_for(self, provider: str, model: str = "") -> Dict[str, int]:
+        """Limites do par: padrão do provedor, sobrescrito por RATE_LIMIT_OVERRIDES ("provedor" e "provedor:modelo")"""
+        if provider == LLM_PROVIDER:
+            limits = {"rpm": Config.OPENAI_RPM, "tpm": Config.OPENAI_TPM, "max_in_flight": Config.OPENAI_MAX_IN_FLIGHT}
+        else:
+            limits = {"rpm": Config.SEARCH_RPM, "tpm": 0, "max_in_flight": Config.SEARCH_MAX_IN_FLIGHT}
+        
+        limits.update(self.overrides.get(provider, {}))
+        if model:
+            limits.update(self.overrides.get(f"{provider}:{model}", {}))
+        return limits
+    
+    def acquire(self, provider: str, model: str = "", tokens: int = 0, handle: Optional[AcquireHandle] = None) -> RateLimitLease:
+        """Espera a vez na fila do par provedor/modelo e reserva uma requisição e tokens estimados"""
+        deadline = current_session().deadline
+        start = time.monotonic()
+        
+        with self._condition:
+            limiter = self._get_limiter(provider, model)
+            ticket = object()
+            limiter.queue.append(ticket)
+            limiter.max_queue_depth = max(limiter.max_queue_depth, len(limiter.queue))
+            
+            try:
+                while True:
+                    if handle is not None and handle.cancelled:
+                        raise AcquireCancelled(f"espera na fila de {limiter.key} cancelada")
+                    
+                    now = time.monotonic()
+                    wait = self._wait_time(limiter, provider, ticket, tokens, now)
+                    if wait == 0:
+                        break
+                    
+                    if deadline is not None:
+                        if now >= deadline:
+                            raise DeadlineExceeded(f"prazo da execução esgotado na fila de {limiter.key}")
+                        wait = deadline - now if wait is None else min(wait, deadline - now)
+                    
+                    # None: espera a vez na fila ou uma vaga de execução (notify)
+                    self._condition.wait(wait)
+                
+                if limiter.requests is not None:
+                    limiter.requests.take(1)
+                if limiter.tokens is not None:
+                    limiter.tokens.take(tokens)
+                self._in_flight[provider] = self._in_flight.get(provider, 0) + 1
+            finally:
+                limiter.queue.remove(ticket)
+                self._condition.notify_all()
+            
+            waited = time.monotonic() - start
+            limiter.acquired += 1
+            limiter.wait_seconds += waited
+            limiter.max_wait_seconds = max(limiter.max_wait_seconds, waited)
+            if waited > 0.001:
+                limiter.waited += 1
+            
+            lease = RateLimitLease(self, limiter, provider, tokens, waited)
+            if handle is not None:
+                handle.lease = lease
+        
+        if waited > 0.001:
+            current_session().increment("rate_limit_wait_ms", int(waited * 1000))
+        
+        return lease
+    
+    def cancel(self, handle: AcquireHandle):
+        """Desiste de um acquire: tira a espera da fila ou devolve a vaga já reservada"""
+        with self._condition:
+            handle.cancelled = True
+            lease = handle.lease
+            self._condition.notify_all()
+        
+        if lease is not None:
+            lease.release()
+    
+    @contextmanager
+    def limit(self, provider: str, model: str = "", tokens: int = 0) -> Iterator[RateLimitLease]:
+        """Executa o bloco com uma requisição reservada (liberada ao sair)"""
+        lease = self.acquire(provider, model, tokens)
+        try:
+            yield lease
+        finally:
+            lease.release()
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Métricas por par provedor/modelo: fila, espera e requisições em andamento"""
+        with self._condition:
+            stats = {}
+            for key, limiter in self._limiters.items():
+                provider = key.split(":", 1)[0]
+                stats[key] = {
+                    "requests": limiter.acquired,
+                    "waited": limiter.waited,
+                    "queue_depth": len(limiter.queue),
+                    "max_queue_depth": limiter.max_queue_depth,
+                    "avg_wait_ms": round(limiter.wait_seconds / limiter.acquired * 1000, 2) if limiter.acquired else 0.0,
+                    "max_wait_ms": round(limiter.max_wait_seconds * 1000, 2),
+                    "in_flight": self._in_flight.get(provider, 0)
+                }
+            return stats
+    
+    def _get_limiter(self, provider: str, model: str) -> _Limiter:
+        key = f"{provider}:{model}" if model else provider
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limits = self.limits_for(provider, model)
+            limiter = self._limiters[key] = _Limiter(key, limits["rpm"], limits["tpm"])
+        return limiter
+    
+    def _wait_time(self, limiter: _Limiter, provider: str, ticket: object, tokens: int, now: float) -> Optional[float]:
+        """0 para seguir, segundos até os baldes encherem, ou None para esperar a vez/uma vaga"""
+        if limiter.queue[0] is not ticket:
+            return None
+        
+        max_in_flight = self.limits_for(provider)["max_in_flight"]
+        if max_in_flight > 0 and self._in_flight.get(provider, 0) >= max_in_flight:
+            return None
+        
+        waits = [0.0]
+        if limiter.requests is not None:
+            waits.append(limiter.requests.wait_time(1, now))
+        if limiter.tokens is not None:
+            waits.append(limiter.tokens.wait_time(tokens, now))
+        return max(waits)
+    
+    def _settle(self, lease: RateLimitLease, actual_tokens: int):
+        with self._condition:
+            if lease._limiter.tokens is not None:
+                lease._limiter.tokens.adjust(lease.tokens - actual_tokens)
+            lease.tokens = actual_tokens
+            self._condition.notify_all()
+    
+    def _release(self, lease: RateLimitLease):
+        with self._condition:
+            self._in_flight[lease.provider] -= 1
+            self._condition.notify_all()
+
+def _parse_overrides(raw: str) -> Dict[str, Dict[str, int]]:
+    """Lê RATE_LIMIT_OVERRIDES (JSON); um valor inválido é ignorado com aviso"""
+    if not raw:
+        return {}
+    try:
+        overrides = json.loads(raw)
+        return {key: {name: int(value) for name, value in limits.items()} for key, limits in overrides.items()}
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"⚠️ RATE_LIMIT_OVERRIDES inválido, usando limites padrão: {e}")
+        return {}
+
+_rate_limiter: Optional[RateLimitGovernor] = None
+_rate_limiter_initialized = False
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> Optional[RateLimitGovernor]:
+    """Retorna o governor compartilhado pelo processo (None com RATE_LIMIT_ENABLED=false)"""
+    global _rate_limiter, _rate_limiter_initialized
+    
+    if not _rate_limiter_initialized:
+        with _rate_limiter_lock:
+            if not _rate_limiter_initialized:
+                _rate_limiter = RateLimitGovernor() if Config.RATE_LIMIT_ENABLED else None
+                _rate_limiter_initialized = True
+    
+    return _rate_limiter
+
+def set_rate_limiter(governor: Optional[RateLimitGovernor]) -> None:
+    """Substitui o governor compartilhado (None desativa os limites)"""
+    global _rate_limiter, _rate_limiter_initialized
+    
+    with _rate_limiter_lock:
+        _rate_limiter = governor
+        _rate_limiter_initialized = True
+
+@contextmanager
+def rate_limited(provider: str, model: str = "", tokens: int = 0) -> Iterator[Optional[RateLimitLease]]:
+    """Executa o bloco dentro dos limites do governor compartilhado (sem governor, não limita)"""
+    governor = get_rate_limiter()
+    if governor is None:
+        yield None
+        return
+    
+    with governor.limit(provider, model, tokens) as lease:
+        yield lease
+
+@asynccontextmanager
+async def arate_limited(provider: str, model: str = "", tokens: int = 0) -> AsyncIterator[Optional[RateLimitLease]]:
+    """Versão assíncrona de rate_limited (a espera na fila roda fora do event loop)"""
+    governor = get_rate_limiter()
+    if governor is None:
+        yield None
+        return
+    
+    handle = AcquireHandle()
+    try:
+        lease = await asyncio.to_thread(governor.acquire, provider, model, tokens, handle)
+    except asyncio.CancelledError:
+        # A thread segue na fila mesmo com a tarefa cancelada: sem isso a vaga ficaria presa
+        governor.cancel(handle)
+        raise
+    
+    try:
+        yield lease
+    finally:
+        lease.release()
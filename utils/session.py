@@ -0,0 +1,118 @@
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, Iterator
+
+class DeadlineExceeded(TimeoutError):
+    """Prazo da execução (run_research(deadline_s=...)) esgotado"""
+
+class ResearchSession:
+    """
+    Contexto de uma execução de pesquisa.
+    
+    Guarda os recursos com estado de uma execução (memória, processador de
+    citações) e seus contadores. Recursos pesados e thread-safe (clientes HTTP
+    e de LLM, caches) continuam compartilhados pelo processo.
+    """
+    
+    def __init__(self, run_id: Optional[str] = None, query: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.query = query
+        self.created_at = time.time()
+        
+        # Prazos em time.monotonic(): fim da execução e corte da fase de pesquisa (None = sem prazo)
+        self.deadline: Optional[float] = None
+        self.research_deadline: Optional[float] = None
+        
+        self._lock = threading.Lock()
+        self._resources: Dict[str, Any] = {}
+        self._counters: Dict[str, int] = {}
+    
+    def get_resource(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Recurso da sessão, criado na primeira vez que é usado"""
+        resource = self._resources.get(name)
+        if resource is None:
+            with self._lock:
+                resource = self._resources.get(name)
+                if resource is None:
+                    resource = self._resources[name] = factory()
+        return resource
+    
+    def increment(self, counter: str, amount: int = 1) -> int:
+        """Incrementa um contador da sessão (seguro entre threads)"""
+        with self._lock:
+            value = self._counters.get(counter, 0) + amount
+            self._counters[counter] = value
+        return value
+    
+    def get_counters(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+    
+    def set_deadline(self, seconds: float, research_share: float = 1.0):
+        """Define o prazo da execução; a fase de pesquisa termina em research_share do prazo"""
+        start = time.monotonic()
+        self.deadline = start + seconds
+        self.research_deadline = start + seconds * research_share
+    
+    def time_left(self, research: bool = False) -> Optional[float]:
+        """Segundos até o prazo (None sem prazo); research=True usa o corte da fase de pesquisa"""
+        deadline = self.research_deadline if research else self.deadline
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+    
+    def deadline_passed(self, research: bool = False) -> bool:
+        return self.time_left(research) == 0.0
+
+# Sessão usada fora de research_session (CLI, scripts): mantém o comportamento de instância única
+_default_session = ResearchSession(run_id="default")
+_current_session: contextvars.ContextVar = contextvars.ContextVar("research_session", default=None)
+
+def current_session() -> ResearchSession:
+    """Sessão ativa no contexto atual (ou a sessão padrão do processo)"""
+    return _current_session.get() or _default_session
+
+@contextmanager
+def research_session(run_id: Optional[str] = None, query: Optional[str] = None) -> Iterator[ResearchSession]:
+    """
+    Ativa uma sessão nova no contexto atual.
+    
+    Threads disparadas com run_in_context (utils.tracing) e nós do LangGraph
+    herdam o contexto, então enxergam a mesma sessão.
+    """
+    session = ResearchSession(run_id, query)
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
+
+class SessionLocal:
+    """
+    Proxy para um recurso por sessão.
+    
+    Permite manter as instâncias globais dos módulos (research_memory,
+    citation_processor) enquanto cada execução enxerga a sua própria cópia.
+    """
+    
+    __slots__ = ("_name", "_factory")
+    
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_factory", factory)
+    
+    def get(self) -> Any:
+        """Instância do recurso na sessão atual"""
+        return current_session().get_resource(self._name, self._factory)
+    
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self.get(), attribute)
+    
+    def __setattr__(self, attribute: str, value: Any):
+        setattr(self.get(), attribute, value)
+    
+    def __repr__(self) -> str:
+        return f"<SessionLocal {self._name}: {self.get()!r}>"
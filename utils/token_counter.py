@@ -0,0 +1,273 @@
+import os
+import sys
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any
+from config import Config
+
+# Modelos reconhecidos por prefixo quando o tiktoken não conhece o nome exato
+_ENCODING_BY_PREFIX = [
+    ("gpt-4o", "o200k_base"),
+    ("gpt-4.1", "o200k_base"),
+    ("gpt-4.5", "o200k_base"),
+    ("o1", "o200k_base"),
+    ("o3", "o200k_base"),
+    ("o4", "o200k_base"),
+    ("gpt-4", "cl100k_base"),
+    ("gpt-3.5", "cl100k_base"),
+]
+
+# Os encodings (regex, tokens especiais e sha256 dos ranks) vêm de tiktoken_ext.openai_public;
+# só a leitura dos ranks é redirecionada para <encoding>.tiktoken em TOKENIZER_BPE_DIR (nada é baixado)
+_CONSTRUCTOR_LOCK = threading.Lock()
+
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TokenCounter:
+    """
+    Contador de tokens baseado no tokenizer BPE do modelo (tiktoken).
+    
+    O tokenizer é carregado sob demanda na primeira contagem, somente a partir
+    do arquivo BPE local em TOKENIZER_BPE_DIR (nunca é baixado; provisione com
+    `python -m utils.token_counter --download`). Se não estiver disponível
+    (pacote ou arquivo ausente), usa a heurística de 1 token ≈ 4 caracteres e
+    registra o motivo em fallback_reason / get_stats. As contagens são
+    memorizadas por hash do conteúdo, então recontar o mesmo texto não
+    reexecuta o BPE.
+    """
+    
+    def __init__(self, model: str = None, backend: str = None, encoding_name: str = None, max_entries: int = None):
+        self.model = model or Config.MODEL_NAME
+        self.backend = (backend or Config.TOKEN_COUNTER_BACKEND).lower()
+        self.encoding_name = encoding_name or Config.TOKEN_COUNTER_ENCODING or None
+        self.max_entries = max_entries or Config.TOKEN_COUNTER_CACHE_SIZE
+        
+        self._encoding = None
+        self._loaded = False
+        self.fallback_reason: Optional[str] = None
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def heuristic_count(text: str) -> int:
+        """Aproximação usada quando o tokenizer não está disponível"""
+        return len(text) // 4
+    
+    @property
+    def is_exact(self) -> bool:
+        """True se as contagens vêm do tokenizer real"""
+        return self._get_encoding() is not None
+    
+    def count(self, text: str) -> int:
+        """Conta os tokens de um texto"""
+        if not text:
+            return 0
+        
+        encoding = self._get_encoding()
+        if encoding is None:
+            return self.heuristic_count(text)
+        
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        
+        # O BPE roda fora do lock para não serializar contagens em threads diferentes
+        tokens = len(encoding.encode(text, disallowed_special=()))
+        
+        with self._lock:
+            self._cache[key] = tokens
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        
+        return tokens
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Corta o texto em até max_tokens tokens, terminando em palavra completa (com "...")"""
+        if not text or self.count(text) <= max_tokens:
+            return text
+        
+        encoding = self._get_encoding()
+        if encoding is None:
+            truncated = text[:max_tokens * 4]
+        else:
+            # Reserva os tokens das reticências para o resultado caber no limite
+            limit = max(max_tokens - self.count("..."), 0)
+            truncated = encoding.decode(encoding.encode(text, disallowed_special=())[:limit])
+        
+        last_space = truncated.rfind(" ")
+        if last_space > len(truncated) * 0.8:
+            truncated = truncated[:last_space]
+        return truncated.rstrip() + "..."
+    
+    def clear(self):
+        """Limpa as contagens memorizadas"""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do contador"""
+        total = self.hits + self.misses
+        exact = self.is_exact
+        return {
+            "backend": "tiktoken" if exact else "heuristic",
+            "exact": exact,
+            "fallback_reason": self.fallback_reason,
+            "encoding": getattr(self._encoding, "name", None),
+            "cached_counts": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0
+        }
+    
+    def _get_encoding(self):
+        """Carrega o tokenizer uma única vez (falhas também ficam memorizadas)"""
+        if self._loaded:
+            return self._encoding
+        
+        with self._load_lock:
+            if not self._loaded:
+                if self.backend == "tiktoken":
+                    self._encoding = self._load_encoding()
+                else:
+                    self.fallback_reason = f"TOKEN_COUNTER_BACKEND={self.backend}"
+                self._loaded = True
+        
+        return self._encoding
+    
+    def _load_encoding(self):
+        """Monta o encoding do modelo a partir do arquivo BPE local; None se indisponível"""
+        try:
+            import tiktoken
+            from tiktoken.model import encoding_name_for_model
+        except ImportError:
+            return self._fallback("tiktoken não instalado")
+        
+        encoding_name = self.encoding_name
+        if not encoding_name:
+            try:
+                encoding_name = encoding_name_for_model(self.model)
+            except KeyError:
+                encoding_name = _encoding_for_prefix(self.model)
+        
+        try:
+            return tiktoken.Encoding(**_encoding_spec(encoding_name, _local_bpe_loader))
+        except FileNotFoundError as e:
+            return self._fallback(f"arquivo BPE não encontrado ({e.filename}); rode `python -m utils.token_counter --download`")
+        except Exception as e:
+            return self._fallback(f"encoding {encoding_name} indisponível ({type(e).__name__}: {e})")
+    
+    def _fallback(self, reason: str):
+        """Registra por que a contagem ficou aproximada (visível em get_stats)"""
+        self.fallback_reason = reason
+        print(f"⚠️ Tokenizer indisponível: {reason}. Contagem de tokens APROXIMADA (1 token ≈ 4 caracteres)")
+        return None
+
+def _bpe_dir() -> str:
+    """Diretório dos arquivos BPE (caminhos relativos partem da raiz do projeto)"""
+    return os.path.join(_PROJECT_DIR, Config.TOKENIZER_BPE_DIR)
+
+def _bpe_path(url: str) -> str:
+    """Caminho local do arquivo BPE publicado em url (mesmo nome de arquivo)"""
+    return os.path.join(_bpe_dir(), url.rsplit("/", 1)[-1])
+
+def _local_bpe_loader(url: str, expected_hash: Optional[str] = None) -> Dict[bytes, int]:
+    """Lê os ranks do arquivo local em vez de url (o tiktoken confere o sha256)"""
+    from tiktoken.load import load_tiktoken_bpe
+    
+    path = _bpe_path(url)
+    if not os.path.exists(path):
+        raise FileNotFoundError(2, "arquivo BPE não encontrado", path)
+    return load_tiktoken_bpe(path, expected_hash=expected_hash)
+
+def _downloading_bpe_loader(url: str, expected_hash: Optional[str] = None) -> Dict[bytes, int]:
+    """Baixa url para TOKENIZER_BPE_DIR (conferindo o sha256) e lê os ranks"""
+    from tiktoken.load import read_file, check_hash
+    
+    path = _bpe_path(url)
+    if not os.path.exists(path):
+        contents = read_file(url)
+        if expected_hash and not check_hash(contents, expected_hash):
+            raise ValueError(f"Hash inesperado para {url}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(contents)
+        os.replace(path + ".tmp", path)
+    return _local_bpe_loader(url, expected_hash)
+
+def _encoding_spec(encoding_name: str, bpe_loader) -> Dict[str, Any]:
+    """Parâmetros do encoding segundo tiktoken_ext.openai_public, lendo os ranks com bpe_loader"""
+    from tiktoken_ext import openai_public
+    
+    constructor = openai_public.ENCODING_CONSTRUCTORS.get(encoding_name)
+    if constructor is None:
+        raise KeyError(f"encoding desconhecido: {encoding_name}")
+    
+    # Os construtores chamam load_tiktoken_bpe(url, expected_hash) do próprio módulo
+    with _CONSTRUCTOR_LOCK:
+        original = openai_public.load_tiktoken_bpe
+        openai_public.load_tiktoken_bpe = bpe_loader
+        try:
+            return constructor()
+        finally:
+            openai_public.load_tiktoken_bpe = original
+
+def download_bpe_files(encoding_names: List[str]) -> List[str]:
+    """Provisiona os arquivos BPE em TOKENIZER_BPE_DIR; retorna os caminhos"""
+    paths = []
+    for encoding_name in encoding_names:
+        _encoding_spec(encoding_name, _downloading_bpe_loader)
+        paths.append(os.path.join(_bpe_dir(), f"{encoding_name}.tiktoken"))
+    return paths
+
+def _encoding_for_prefix(model: str) -> str:
+    """Encoding provável para modelos que o tiktoken ainda não conhece pelo nome"""
+    for prefix, encoding_name in _ENCODING_BY_PREFIX:
+        if model.startswith(prefix):
+            return encoding_name
+    return "cl100k_base"
+
+# Instância global compartilhada (memória, helpers e orçamento de prompts)
+token_counter = TokenCounter()
+
+def count_tokens(text: Optional[str]) -> int:
+    """Conta tokens com o tokenizer do modelo configurado"""
+    return token_counter.count(text or "")
+
+def truncate_tokens(text: Optional[str], max_tokens: int) -> str:
+    """Trunca o texto no limite de tokens do tokenizer configurado"""
+    return token_counter.truncate(text or "", max_tokens)
+
+def main():
+    """Linha de comando: provisiona os arquivos BPE usados na contagem de tokens"""
+    parser = argparse.ArgumentParser(description="Tokenizer local da contagem de tokens")
+    parser.add_argument("--download", action="store_true", help="Baixa os arquivos BPE para TOKENIZER_BPE_DIR")
+    parser.add_argument("encodings", nargs="*", default=["cl100k_base", "o200k_base"], help="Encodings a provisionar")
+    args = parser.parse_args()
+    
+    if args.download:
+        try:
+            for path in download_bpe_files(args.encodings):
+                print(f"✅ {path}")
+        except Exception as e:
+            print(f"❌ Falha ao baixar os arquivos BPE ({type(e).__name__}): {e}")
+            return 1
+    
+    stats = TokenCounter().get_stats()
+    print(f"Tokenizer: {stats['backend']} ({stats['encoding'] or stats['fallback_reason']})")
+    return 0 if stats["exact"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
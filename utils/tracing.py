@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Iterator
+
+class Span:
+    """Intervalo cronometrado (nó do grafo, chamada de LLM, pesquisa, subagente)"""
+    
+    def __init__(self, name: str, category: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.thread_id = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.end = None
+        self.error = None
+    
+    def set(self, **attributes):
+        """Acrescenta atributos ao span (tokens, tamanhos, cache hit...)"""
+        self.attributes.update(attributes)
+    
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+    
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        data = {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "category": self.category,
+            "start_ms": (self.start - origin) * 1000,
+            "duration_ms": self.duration * 1000,
+            "thread": self.thread_name,
+            "attributes": self.attributes
+        }
+        if self.error:
+            data["error"] = self.error
+        return data
+
+class _NullSpan:
+    """Span vazio usado quando não há trace ativo (custo praticamente nulo)"""
+    
+    duration = 0.0
+    
+    def set(self, **attributes):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Trace:
+    """Coleção de spans de uma execução do workflow"""
+    
+    def __init__(self, name: str, **attributes):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes
+        self.created_at = datetime.now()
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+    
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+    
+    def to_records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            spans = list(self.spans)
+        return [span.to_dict(self.origin) for span in sorted(spans, key=lambda span: span.start)]
+    
+    def export_jsonl(self, path: str) -> str:
+        """Exporta um span por linha (JSON lines)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in self.to_records():
+                record["trace_id"] = self.trace_id
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        return path
+    
+    def export_chrome_trace(self, path: str) -> str:
+        """Exporta no formato Chrome Trace (chrome://tracing, ui.perfetto.dev)"""
+        pid = os.getpid()
+        events = []
+        threads = {}
+        
+        with self._lock:
+            spans = list(self.spans)
+        
+        for span in spans:
+            threads[span.thread_id] = span.thread_name
+            args = dict(span.attributes)
+            if span.error:
+                args["error"] = span.error
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": (span.start - self.origin) * 1_000_000,
+                "dur": span.duration * 1_000_000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": args
+            })
+        
+        for thread_id, thread_name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id, "args": {"name": thread_name}})
+        
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "traceEvents": events,
+                "displayTimeUnit": "ms",
+                "otherData": {"trace_id": self.trace_id, "name": self.name, **self.attributes}
+            }, f, ensure_ascii=False, default=str)
+        return path
+    
+    def export(self, directory: str, trace_format: str = "chrome") -> str:
+        """Exporta o trace para um arquivo no diretório indicado"""
+        os.makedirs(directory, exist_ok=True)
+        stem = f"{self.name}_{self.created_at.strftime('%Y%m%d_%H%M%S')}_{self.trace_id[:8]}"
+        
+        if trace_format == "jsonl":
+            return self.export_jsonl(os.path.join(directory, f"{stem}.jsonl"))
+        return self.export_chrome_trace(os.path.join(directory, f"{stem}.json"))
+    
+    def slowest(self, limit: int = 10, categories: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Spans mais demorados (opcionalmente filtrados por categoria)"""
+        records = [
+            record for record in self.to_records()
+            if categories is None or record["category"] in categories
+        ]
+        return sorted(records, key=lambda record: record["duration_ms"], reverse=True)[:limit]
+    
+    def print_summary(self, limit: int = 10):
+        """Imprime os spans mais lentos (subagentes, LLM e pesquisas)"""
+        print("\n🐢 Spans mais lentos:")
+        print("-" * 100)
+        for record in self.slowest(limit, categories=["subagent", "llm", "search"]):
+            attributes = record["attributes"]
+            detail = attributes.get("query") or attributes.get("task") or attributes.get("model") or ""
+            cache = " (cache)" if attributes.get("cache_hit") else ""
+            print(f"{record['duration_ms']:>9.0f} ms  {record['name']:<44.44} {str(detail)[:40]}{cache}")
+        print("-" * 100)
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("research_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("research_span", default=None)
+
+def get_current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextmanager
+def trace_run(name: str, enabled: bool = True, **attributes) -> Iterator[Optional[Trace]]:
+    """Ativa um trace no contexto atual; spans abertos dentro dele são registrados"""
+    if not enabled:
+        yield None
+        return
+    
+    trace = Trace(name, **attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+@contextmanager
+def span(name: str, category: str = "internal", **attributes):
+    """Abre um span filho do span atual (no-op sem trace ativo)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NULL_SPAN
+        return
+    
+    parent = _current_span.get()
+    current = Span(name, category, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+        trace.add(current)
+
+def traced_node(name: str, func: Callable) -> Callable:
+    """Envolve um nó do grafo em um span (preserva a assinatura, incluindo config)"""
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(name, "node"):
+            return func(*args, **kwargs)
+    
+    return wrapper
+
+def run_in_context(func: Callable) -> Callable:
+    """Captura o contexto atual para que spans abertos em outras threads fiquem no mesmo trace"""
+    context = contextvars.copy_context()
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Cada chamada roda em uma cópia: um mesmo Context não pode ser usado por duas threads
+        return context.copy().run(func, *args, **kwargs)
+    
+    return wrapper